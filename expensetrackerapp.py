@@ -1,32 +1,2115 @@
 import os
 import sys
+import re
+import csv
+import time
+STARTED = time.perf_counter()  # start of --startup-time measurements
+import hashlib
+import json
+import warnings
+import contextlib
+import itertools
+import queue
+import threading
+import random
+import tempfile
+import argparse
 import datetime
 import calendar
-import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-from tkcalendar import DateEntry
+from tkinter import ttk, messagebox, simpledialog, filedialog
 import sqlite3
-from PIL import Image, ImageTk
-import numpy as np
 
-# Set backend for matplotlib
-matplotlib.use("TkAgg")
+# numpy, pandas, matplotlib and tkcalendar are imported by the code that
+# uses them, the first time it runs
+
+DATABASE_PATH = "expense_tracker.db"
+
+EXPENSE_CATEGORIES = ["Food", "Transport", "Housing", "Entertainment", "Shopping", "Utilities", "Health", "Education", "Other"]
+INCOME_CATEGORIES = ["Salary", "Freelance", "Investments", "Gifts", "Other"]
+PAYMENT_METHODS = ["Cash", "Credit Card", "Debit Card", "Bank Transfer", "Mobile Payment", "Other"]
+
+# Schema migrations, applied in order and tracked with PRAGMA user_version.
+# Append new steps to the end; never edit a step that has already shipped.
+SCHEMA_MIGRATIONS = [
+    # 1: normalise dates to ISO YYYY-MM-DD so BETWEEN range filters can use the
+    #    covering indexes on (date, type, category) and (type, date)
+    """
+    UPDATE transactions SET date = date(date)
+    WHERE date(date) IS NOT NULL AND date != date(date);
+
+    -- amount is appended so SUM() queries are answered from the index alone
+    CREATE INDEX IF NOT EXISTS idx_transactions_date_type_category
+        ON transactions (date, type, category, amount);
+    CREATE INDEX IF NOT EXISTS idx_transactions_type_date
+        ON transactions (type, date, amount);
+    """,
+    # 2: full-text index for search_transactions, kept in sync by triggers
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+        description, category, payment_method, type,
+        content='transactions', content_rowid='id', prefix='2 3'
+    );
+
+    CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions BEGIN
+        INSERT INTO transactions_fts (rowid, description, category, payment_method, type)
+        VALUES (new.id, new.description, new.category, new.payment_method, new.type);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS transactions_fts_delete AFTER DELETE ON transactions BEGIN
+        INSERT INTO transactions_fts (transactions_fts, rowid, description, category, payment_method, type)
+        VALUES ('delete', old.id, old.description, old.category, old.payment_method, old.type);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS transactions_fts_update AFTER UPDATE ON transactions BEGIN
+        INSERT INTO transactions_fts (transactions_fts, rowid, description, category, payment_method, type)
+        VALUES ('delete', old.id, old.description, old.category, old.payment_method, old.type);
+        INSERT INTO transactions_fts (rowid, description, category, payment_method, type)
+        VALUES (new.id, new.description, new.category, new.payment_method, new.type);
+    END;
+
+    INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild');
+    """,
+    # 3: (date, id) ordering for keyset pagination of the transaction list
+    """
+    CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (date);
+    """,
+    # 4: monthly rollup maintained by triggers, so dashboards never rescan history
+    """
+    CREATE TABLE IF NOT EXISTS monthly_rollup (
+        year INTEGER NOT NULL,
+        month INTEGER NOT NULL,
+        type TEXT NOT NULL,
+        category TEXT NOT NULL,
+        total REAL NOT NULL DEFAULT 0,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (year, month, type, category)
+    ) WITHOUT ROWID;
+
+    INSERT INTO monthly_rollup (year, month, type, category, total, count)
+    SELECT CAST(substr(date, 1, 4) AS INTEGER), CAST(substr(date, 6, 2) AS INTEGER),
+           COALESCE(type, ''), COALESCE(category, ''), SUM(COALESCE(amount, 0)), COUNT(*)
+    FROM transactions
+    WHERE date IS NOT NULL
+    GROUP BY 1, 2, 3, 4;
+
+    CREATE TRIGGER IF NOT EXISTS monthly_rollup_insert AFTER INSERT ON transactions
+    WHEN new.date IS NOT NULL BEGIN
+        INSERT INTO monthly_rollup (year, month, type, category, total, count)
+        VALUES (CAST(substr(new.date, 1, 4) AS INTEGER), CAST(substr(new.date, 6, 2) AS INTEGER),
+                COALESCE(new.type, ''), COALESCE(new.category, ''), COALESCE(new.amount, 0), 1)
+        ON CONFLICT (year, month, type, category)
+        DO UPDATE SET total = total + excluded.total, count = count + 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS monthly_rollup_delete AFTER DELETE ON transactions
+    WHEN old.date IS NOT NULL BEGIN
+        UPDATE monthly_rollup SET total = total - COALESCE(old.amount, 0), count = count - 1
+        WHERE year = CAST(substr(old.date, 1, 4) AS INTEGER) AND month = CAST(substr(old.date, 6, 2) AS INTEGER)
+          AND type = COALESCE(old.type, '') AND category = COALESCE(old.category, '');
+        DELETE FROM monthly_rollup
+        WHERE year = CAST(substr(old.date, 1, 4) AS INTEGER) AND month = CAST(substr(old.date, 6, 2) AS INTEGER)
+          AND type = COALESCE(old.type, '') AND category = COALESCE(old.category, '') AND count <= 0;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS monthly_rollup_update AFTER UPDATE OF date, amount, type, category ON transactions BEGIN
+        UPDATE monthly_rollup SET total = total - COALESCE(old.amount, 0), count = count - 1
+        WHERE old.date IS NOT NULL
+          AND year = CAST(substr(old.date, 1, 4) AS INTEGER) AND month = CAST(substr(old.date, 6, 2) AS INTEGER)
+          AND type = COALESCE(old.type, '') AND category = COALESCE(old.category, '');
+        DELETE FROM monthly_rollup
+        WHERE old.date IS NOT NULL
+          AND year = CAST(substr(old.date, 1, 4) AS INTEGER) AND month = CAST(substr(old.date, 6, 2) AS INTEGER)
+          AND type = COALESCE(old.type, '') AND category = COALESCE(old.category, '') AND count <= 0;
+        INSERT INTO monthly_rollup (year, month, type, category, total, count)
+        SELECT CAST(substr(new.date, 1, 4) AS INTEGER), CAST(substr(new.date, 6, 2) AS INTEGER),
+               COALESCE(new.type, ''), COALESCE(new.category, ''), COALESCE(new.amount, 0), 1
+        WHERE new.date IS NOT NULL
+        ON CONFLICT (year, month, type, category)
+        DO UPDATE SET total = total + excluded.total, count = count + 1;
+    END;
+    """,
+    # 5: content hash of imported statement lines, used to skip re-imports
+    """
+    ALTER TABLE transactions ADD COLUMN import_hash TEXT;
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_import_hash ON transactions (import_hash);
+    """,
+    # 6: one budget per category and month, so a year of budgets can be
+    #    created with INSERT OR IGNORE and edited with an upsert
+    """
+    DELETE FROM budgets WHERE id NOT IN (
+        SELECT MAX(id) FROM budgets GROUP BY year, month, category
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_budgets_period ON budgets (year, month, category);
+    """,
+    # 7: recurring transaction rules; next_date is NULL once a rule has ended
+    """
+    CREATE TABLE IF NOT EXISTS recurring_rules (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        frequency TEXT NOT NULL CHECK (frequency IN ('daily', 'weekly', 'monthly')),
+        interval INTEGER NOT NULL DEFAULT 1 CHECK (interval >= 1),
+        start_date TEXT NOT NULL,
+        end_date TEXT,
+        next_date TEXT,
+        generated INTEGER NOT NULL DEFAULT 0,
+        amount REAL NOT NULL,
+        type TEXT NOT NULL,
+        category TEXT,
+        payment_method TEXT,
+        description TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_recurring_rules_next_date ON recurring_rules (next_date);
+    """,
+    # 8: per-month anomaly detection results, keyed by a content signature
+    """
+    CREATE TABLE IF NOT EXISTS anomaly_cache (
+        year INTEGER NOT NULL,
+        month INTEGER NOT NULL,
+        signature TEXT NOT NULL,
+        results TEXT NOT NULL,
+        PRIMARY KEY (year, month)
+    ) WITHOUT ROWID;
+    """,
+]
+
+def create_schema(conn):
+    """Create the base tables if needed and apply pending migrations"""
+    create_base_tables(conn)
+
+    # Indexes and later schema changes
+    migrate_schema(conn)
+
+def create_base_tables(conn):
+    """Create the version 0 tables that the migrations build on"""
+    cursor = conn.cursor()
+
+    # Transactions table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS transactions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT,
+        amount REAL,
+        type TEXT,
+        category TEXT,
+        payment_method TEXT,
+        description TEXT
+    )
+    ''')
+
+    # Budgets table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS budgets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        category TEXT,
+        amount REAL,
+        month TEXT,
+        year TEXT
+    )
+    ''')
+
+    conn.commit()
+
+def migrate_schema(conn):
+    """
+    Bring the database up to the latest schema version.
+
+    Each pending step runs inside its own transaction together with the
+    user_version bump, so an interrupted upgrade resumes where it stopped.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+
+    for number, script in enumerate(SCHEMA_MIGRATIONS[version:], start=version + 1):
+        try:
+            conn.executescript(f"BEGIN; {script} PRAGMA user_version = {number}; COMMIT;")
+        except sqlite3.OperationalError as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            if "fts5" not in str(e):
+                raise
+            # SQLite was built without FTS5; search falls back to LIKE
+            conn.execute(f"PRAGMA user_version = {number}")
+
+def month_bounds(year, month_num):
+    """Return the first and last ISO dates of a month"""
+    last_day = calendar.monthrange(int(year), month_num)[1]
+    return f"{year}-{month_num:02d}-01", f"{year}-{month_num:02d}-{last_day:02d}"
+
+def previous_months(year, month_num, count):
+    """Return the (year, month) pairs of the `count` months ending with the given month"""
+    months = []
+    for offset in range(count - 1, -1, -1):
+        index = int(year) * 12 + (month_num - 1) - offset
+        months.append((index // 12, index % 12 + 1))
+    return months
+
+class PeriodSummary:
+    """
+    Income/expense/net totals for a date range, broken down by month, category and day.
+
+    Built from the rows of a single grouped query so every report, chart and
+    export can slice the same data instead of querying month by month.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.income = 0
+        self.expenses = 0
+        self.months = {}
+        self.categories = {}
+        self.days = {}
+
+        for date, transaction_type, category, total in rows:
+            key = (int(date[:4]), int(date[5:7]))
+            income, expenses = self.months.get(key, (0, 0))
+
+            if transaction_type == "Income":
+                income += total
+                self.income += total
+            elif transaction_type == "Expense":
+                expenses += total
+                self.expenses += total
+            self.months[key] = (income, expenses)
+
+            by_category = self.categories.setdefault(transaction_type, {})
+            by_category[category] = by_category.get(category, 0) + total
+
+            by_day = self.days.setdefault(transaction_type, {})
+            by_day[date] = by_day.get(date, 0) + total
+
+        self.net = self.income - self.expenses
+
+    def month(self, year, month_num):
+        """Summary restricted to one month, computed without touching the database"""
+        prefix = f"{year}-{month_num:02d}"
+        return PeriodSummary([row for row in self.rows if row[0].startswith(prefix)])
+
+    def month_series(self, months):
+        """(month name, income, expenses, net) for each (year, month) pair, zero-filled"""
+        series = []
+        for year, month_num in months:
+            income, expenses = self.months.get((year, month_num), (0, 0))
+            series.append((calendar.month_name[month_num], income, expenses, income - expenses))
+        return series
+
+    def category_totals(self, transaction_type="Expense"):
+        """(category, total) pairs sorted by total, largest first"""
+        totals = self.categories.get(transaction_type, {})
+        return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+    def daily_totals(self, transaction_type="Expense"):
+        """(ISO date, total) pairs in date order"""
+        return sorted(self.days.get(transaction_type, {}).items())
+
+class TransactionAggregator:
+    """Shared aggregation layer for the dashboard, reports, charts and exports"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def summarize(self, start_date, end_date):
+        """
+        Aggregate all transactions between two ISO dates (inclusive).
+
+        Returns:
+            PeriodSummary built from one GROUP BY query
+        """
+        cursor = self.conn.cursor()
+        cursor.execute(
+            """
+            SELECT date, type, category, SUM(amount)
+            FROM transactions
+            WHERE date BETWEEN ? AND ?
+            GROUP BY date, type, category
+            """,
+            (start_date, end_date)
+        )
+        return PeriodSummary(cursor.fetchall())
+
+    def summarize_months(self, months):
+        """Aggregate an ordered list of (year, month) pairs in one query"""
+        start_date = month_bounds(*months[0])[0]
+        end_date = month_bounds(*months[-1])[1]
+        return self.summarize(start_date, end_date)
+
+    def rollup(self, months):
+        """
+        Month-level totals for an ordered list of (year, month) pairs, read
+        from the trigger-maintained monthly_rollup table.
+
+        Returns:
+            PeriodSummary keyed by "YYYY-MM" periods instead of days
+        """
+        (first_year, first_month), (last_year, last_month) = months[0], months[-1]
+        cursor = self.conn.cursor()
+        cursor.execute(
+            """
+            SELECT printf('%04d-%02d', year, month), type, category, total
+            FROM monthly_rollup
+            WHERE (year, month) BETWEEN (?, ?) AND (?, ?)
+            """,
+            (first_year, first_month, last_year, last_month)
+        )
+        return PeriodSummary(cursor.fetchall())
+
+class BudgetEngine:
+    """Budget vs actual for a month, with a month-end spending forecast"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def status(self, year, month_num, categories, today=None):
+        """
+        Budget, spending and forecast for each category in one month.
+
+        Spending comes from the monthly rollup, joined to the budgets in one
+        grouped query. For the current month the forecast extends the running
+        daily rate to the end of the month. For past months it is the actual
+        spending, and for future months it is zero.
+
+        Returns:
+            List of (category, budget, spent, remaining, percentage, forecast)
+        """
+        if not categories:
+            return []
+
+        values = ", ".join("(?, ?)" for _ in categories)
+        params = [value for position, category in enumerate(categories) for value in (position, category)]
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"""
+            WITH wanted(position, category) AS (VALUES {values})
+            SELECT wanted.category, COALESCE(MAX(budgets.amount), 0), COALESCE(MAX(monthly_rollup.total), 0)
+            FROM wanted
+            LEFT JOIN budgets
+                ON budgets.category = wanted.category AND budgets.month = ? AND budgets.year = ?
+            LEFT JOIN monthly_rollup
+                ON (monthly_rollup.year, monthly_rollup.month, monthly_rollup.type, monthly_rollup.category)
+                 = (?, ?, 'Expense', wanted.category)
+            GROUP BY wanted.position
+            ORDER BY wanted.position
+            """,
+            params + [calendar.month_name[month_num], str(year), int(year), month_num]
+        )
+        rows = cursor.fetchall()
+
+        import numpy as np
+        budget = np.array([row[1] for row in rows], dtype=float)
+        spent = np.array([row[2] for row in rows], dtype=float)
+        remaining = budget - spent
+        percentage = np.divide(spent * 100, budget, out=np.zeros_like(spent), where=budget > 0)
+        forecast = spent * self.forecast_factor(year, month_num, today)
+
+        return list(zip(
+            [row[0] for row in rows],
+            budget.tolist(), spent.tolist(), remaining.tolist(), percentage.tolist(), forecast.tolist()
+        ))
+
+    @staticmethod
+    def forecast_factor(year, month_num, today=None):
+        """Multiplier from spending so far to projected month-end spending"""
+        today = today or datetime.date.today()
+        if (int(year), month_num) < (today.year, today.month):
+            return 1.0
+        if (int(year), month_num) > (today.year, today.month):
+            return 0.0
+        return calendar.monthrange(today.year, today.month)[1] / today.day
+
+    def ensure_year(self, year, categories, amount=0.0):
+        """Create any missing budgets for every month of a year in one batch"""
+        rows = [
+            (category, amount, calendar.month_name[month_num], str(year))
+            for month_num in range(1, 13)
+            for category in categories
+        ]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO budgets (category, amount, month, year) VALUES (?, ?, ?, ?)",
+                rows
+            )
+
+    def set_budget(self, year, month_num, category, amount):
+        with self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO budgets (category, amount, month, year) VALUES (?, ?, ?, ?)
+                ON CONFLICT (year, month, category) DO UPDATE SET amount = excluded.amount
+                """,
+                (category, amount, calendar.month_name[month_num], str(year))
+            )
+
+    def get_budget(self, year, month_num, category):
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT amount FROM budgets WHERE category = ? AND month = ? AND year = ?",
+            (category, calendar.month_name[month_num], str(year))
+        )
+        result = cursor.fetchone()
+        return result[0] if result else 0
+
+class RecurringScheduler:
+    """
+    Recurring transaction rules and their materialization.
+
+    Each rule remembers how many occurrences it has produced and the date of
+    the next one. materialize() inserts every occurrence that has come due,
+    for all rules, in one executemany. The rollup and search triggers keep
+    the summaries in step, and each occurrence carries an import_hash, so
+    running it twice never inserts a duplicate.
+    """
+
+    FREQUENCIES = ["daily", "weekly", "monthly"]
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def add_rule(self, start_date, frequency, amount, transaction_type, category,
+                 payment_method="", description="", interval=1, end_date=None):
+        """Create a rule; its first occurrence is on start_date. Returns its id"""
+        if frequency not in self.FREQUENCIES:
+            raise ValueError(f"Unknown frequency: {frequency}")
+        if interval < 1:
+            raise ValueError("Interval must be at least 1")
+        if end_date and end_date < start_date:
+            raise ValueError("End date is before the start date")
+
+        cursor = self.conn.execute(
+            """
+            INSERT INTO recurring_rules (frequency, interval, start_date, end_date, next_date,
+                                         amount, type, category, payment_method, description)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (frequency, interval, start_date, end_date or None, start_date,
+             amount, transaction_type, category, payment_method, description)
+        )
+        return cursor.lastrowid
+
+    def delete_rule(self, rule_id):
+        """Stop a rule; transactions it already created are kept"""
+        self.conn.execute("DELETE FROM recurring_rules WHERE id = ?", (rule_id,))
+
+    def rules(self):
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT id, frequency, interval, start_date, end_date, next_date, amount, type, category, "
+            "payment_method, description FROM recurring_rules ORDER BY id"
+        )
+        return cursor.fetchall()
+
+    @staticmethod
+    def occurrence(start_date, frequency, interval, index):
+        """Date of a rule's index-th occurrence; monthly rules keep their day, clamped to the month end"""
+        start = datetime.date.fromisoformat(start_date)
+        if frequency == "daily":
+            return start + datetime.timedelta(days=interval * index)
+        if frequency == "weekly":
+            return start + datetime.timedelta(weeks=interval * index)
+
+        months = start.month - 1 + interval * index
+        year, month_num = start.year + months // 12, months % 12 + 1
+        return datetime.date(year, month_num, min(start.day, calendar.monthrange(year, month_num)[1]))
+
+    def materialize(self, today=None):
+        """
+        Insert all occurrences due on or before today.
+
+        Returns:
+            Dictionary with the number of due rules and inserted transactions
+        """
+        today = today or datetime.date.today()
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT id, frequency, interval, start_date, end_date, generated, amount, type, category, "
+            "payment_method, description FROM recurring_rules WHERE next_date <= ?",
+            (today.isoformat(),)
+        )
+        due = cursor.fetchall()
+
+        transactions = []
+        progress = []
+        for rule_id, frequency, interval, start_date, end_date, generated, amount, transaction_type, category, payment_method, description in due:
+            until = min(today, datetime.date.fromisoformat(end_date)) if end_date else today
+            occurrence = self.occurrence(start_date, frequency, interval, generated)
+            while occurrence <= until:
+                transactions.append((
+                    occurrence.isoformat(), amount, transaction_type, category, payment_method, description,
+                    f"recurring:{rule_id}:{occurrence.isoformat()}"
+                ))
+                generated += 1
+                occurrence = self.occurrence(start_date, frequency, interval, generated)
+
+            # A rule past its end date has no next occurrence
+            finished = end_date and occurrence.isoformat() > end_date
+            progress.append((generated, None if finished else occurrence.isoformat(), rule_id))
+
+        with self.conn:
+            inserted = self.conn.executemany(
+                "INSERT OR IGNORE INTO transactions (date, amount, type, category, payment_method, description, import_hash) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                transactions
+            ).rowcount if transactions else 0
+            self.conn.executemany(
+                "UPDATE recurring_rules SET generated = ?, next_date = ? WHERE id = ?",
+                progress
+            )
+
+        return {"rules": len(due), "inserted": inserted}
+
+class AnomalyDetector:
+    """
+    Flags unusual expense spending per category.
+
+    Daily totals for the whole history are pivoted into a (day x category)
+    array and scored in one pass with robust z-scores. Each value is compared
+    with the median and median absolute deviation (MAD) of a trailing window:
+    - a day is compared with the spending days in the previous 90 days
+    - a month is compared with the totals of the previous 12 months
+    Only spikes are flagged, not unusually low spending, and only once the
+    window holds enough periods with spending in that category.
+
+    Results are cached per month in anomaly_cache. Each entry is keyed by the
+    threshold and a fingerprint of each category in the month and the 12
+    before it: total, count and the day-weighted sum SUM(day * amount), so
+    moving spending between days of a month also changes the key.
+    """
+
+    DAY_WINDOW = 90
+    MONTH_WINDOW = 12
+    MIN_DAY_HISTORY = 5
+    MIN_MONTH_HISTORY = 6
+
+    def __init__(self, conn, threshold=3.5):
+        self.conn = conn
+        self.threshold = threshold
+
+    def daily_totals(self):
+        """Expense totals as a DataFrame with one row per calendar day and one column per category"""
+        import pandas as pd
+
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT date, category, SUM(amount) FROM transactions WHERE type = 'Expense' GROUP BY date, category"
+        )
+        frame = pd.DataFrame(cursor.fetchall(), columns=["date", "category", "amount"])
+        frame["date"] = pd.to_datetime(frame["date"], format="%Y-%m-%d", errors="coerce")
+        frame = frame.dropna()
+        if frame.empty:
+            return None
+
+        daily = frame.pivot_table(index="date", columns="category", values="amount", aggfunc="sum", fill_value=0.0)
+        return daily.asfreq("D", fill_value=0.0)
+
+    @staticmethod
+    def robust_scores(values, history, min_history):
+        """
+        Robust z-scores of values (n x k) against history (n x k x window).
+
+        NaN entries in the history are ignored. The spread is 1.4826 * MAD,
+        floored at 5% of the median (and at 1), so a constant history such as
+        rent still flags a real change without dividing by zero.
+
+        Only history entries with spending count towards min_history. A
+        category that is mostly unused has a median and MAD of 0, and any
+        purchase would otherwise score as a spike against the floor of 1.
+
+        Returns:
+            (median, score) arrays; the score is NaN where there is too little history
+        """
+        import numpy as np
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            median = np.nanmedian(history, axis=2)
+            mad = np.nanmedian(np.abs(history - median[..., None]), axis=2)
+
+        sigma = np.fmax(1.4826 * mad, np.fmax(0.05 * np.abs(median), 1.0))
+        score = (values - median) / sigma
+        score[np.sum(history > 0, axis=2) < min_history] = np.nan
+        return median, score
+
+    @staticmethod
+    def trailing_windows(values, window):
+        """(n x k x window) view of the `window` rows before each row, NaN-padded at the start"""
+        import numpy as np
+
+        padded = np.vstack([np.full((window, values.shape[1]), np.nan), values])
+        return np.lib.stride_tricks.sliding_window_view(padded, window, axis=0)[:len(values)]
+
+    def detect(self):
+        """
+        Score the whole history at once.
+
+        Returns:
+            Dictionary of (year, month) to that month's anomalies, highest score first
+        """
+        import numpy as np
+
+        daily = self.daily_totals()
+        if daily is None:
+            return {}
+
+        categories = list(daily.columns)
+        results = {}
+
+        def collect(kind, index, values, expected, score, period_format):
+            rows, columns = np.nonzero(score > self.threshold)
+            for row, column in zip(rows, columns):
+                day = index[row]
+                results.setdefault((day.year, day.month), []).append({
+                    "kind": kind,
+                    "period": day.strftime(period_format),
+                    "category": categories[column],
+                    "amount": round(float(values[row, column]), 2),
+                    "expected": round(float(expected[row, column]), 2),
+                    "score": round(float(score[row, column]), 2),
+                })
+
+        # Days: only days with spending, against earlier spending days
+        values = daily.to_numpy()
+        history = self.trailing_windows(np.where(values > 0, values, np.nan), self.DAY_WINDOW)
+        expected, score = self.robust_scores(values, history, self.MIN_DAY_HISTORY)
+        score[values <= 0] = np.nan
+        collect("day", daily.index, values, expected, score, "%Y-%m-%d")
+
+        # Months: totals against the previous twelve months, empty months included
+        monthly = daily.resample("MS").sum()
+        values = monthly.to_numpy()
+        expected, score = self.robust_scores(values, self.trailing_windows(values, self.MONTH_WINDOW), self.MIN_MONTH_HISTORY)
+        collect("month", monthly.index, values, expected, score, "%Y-%m")
+
+        for anomalies in results.values():
+            anomalies.sort(key=lambda anomaly: -anomaly["score"])
+
+        # Months without anomalies are results too
+        first, last = daily.index[0], daily.index[-1]
+        for year, month_num in previous_months(last.year, last.month, (last.year - first.year) * 12 + last.month - first.month + 1):
+            results.setdefault((year, month_num), [])
+        return results
+
+    def signatures(self, months):
+        """Cache keys for (year, month) pairs, from one scan of the (date, type, category, amount) index"""
+        first_date = month_bounds(*previous_months(*months[0], self.MONTH_WINDOW + 1)[0])[0]
+        last_date = month_bounds(*months[-1])[1]
+        cursor = self.conn.cursor()
+        cursor.execute(
+            """
+            SELECT CAST(substr(date, 1, 4) AS INTEGER), CAST(substr(date, 6, 2) AS INTEGER), category,
+                   SUM(amount), COUNT(*), SUM(CAST(substr(date, 9, 2) AS INTEGER) * amount)
+            FROM transactions
+            WHERE date BETWEEN ? AND ? AND type = 'Expense'
+            GROUP BY 1, 2, 3
+            ORDER BY 1, 2, 3
+            """,
+            (first_date, last_date)
+        )
+        by_month = {}
+        for year, month_num, category, total, count, weighted in cursor.fetchall():
+            by_month.setdefault((year, month_num), []).append(f"{category}:{total or 0:.2f}:{count}:{weighted or 0:.2f}")
+
+        signatures = {}
+        for year, month_num in months:
+            window = previous_months(year, month_num, self.MONTH_WINDOW + 1)
+            content = f"{self.threshold}|" + "|".join(",".join(by_month.get(month, [])) for month in window)
+            signatures[(year, month_num)] = hashlib.sha1(content.encode("utf-8")).hexdigest()
+        return signatures
+
+    def cached(self, year, month_num, signature):
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT results FROM anomaly_cache WHERE year = ? AND month = ? AND signature = ?",
+            (year, month_num, signature)
+        )
+        result = cursor.fetchone()
+        return json.loads(result[0]) if result else None
+
+    def store(self, results, signatures):
+        """Save results for every month that has a signature (needs a writable connection)"""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO anomaly_cache (year, month, signature, results) VALUES (?, ?, ?, ?)",
+            [(year, month_num, signature, json.dumps(results.get((year, month_num), [])))
+             for (year, month_num), signature in signatures.items()]
+        )
+
+class TransactionSearch:
+    """Ranked full-text search over transactions, with a LIKE fallback"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'transactions_fts'")
+        self.has_fts = cursor.fetchone() is not None
+
+    @staticmethod
+    def match_query(text):
+        """
+        Turn free text into an FTS5 query where every word is a prefix match.
+
+        Returns:
+            Query string, or None if the text contains no searchable words
+        """
+        words = re.findall(r"\w+", text.lower())
+        if not words:
+            return None
+        return " ".join(f'"{word}"*' for word in words)
+
+    def query(self, text, start_date, end_date):
+        """
+        SQL selecting the rows that match `text`, for use with TransactionPager.
+
+        Returns:
+            (sql, params, descending) where the SQL ends with a sort_key column
+        """
+        match = self.match_query(text)
+
+        if self.has_fts and match:
+            sql = """
+                SELECT t.id, t.date, t.amount, t.type, t.category, t.payment_method, t.description,
+                       transactions_fts.rank AS sort_key
+                FROM transactions_fts
+                JOIN transactions t ON t.id = transactions_fts.rowid
+                WHERE transactions_fts MATCH ? AND t.date BETWEEN ? AND ?
+                """
+            # bm25 rank: lower is a better match
+            return sql, (match, start_date, end_date), False
+
+        sql, params = self.like_query(text.lower(), start_date, end_date, paged=True)
+        return sql, params, True
+
+    def search(self, text, start_date, end_date):
+        """Rows matching `text` between two ISO dates, best matches first"""
+        sql, params, descending = self.query(text, start_date, end_date)
+        order = "DESC" if descending else "ASC"
+        cursor = self.conn.cursor()
+        cursor.execute(f"SELECT * FROM ({sql}) ORDER BY sort_key {order}, id {order}", params)
+        return [row[:7] for row in cursor.fetchall()]
+
+    @staticmethod
+    def like_query(term, start_date, end_date, paged=False):
+        """
+        The unindexed substring search used when FTS5 is unavailable.
+
+        With `paged`, a sort_key column replaces the ORDER BY so the query can
+        be handed to TransactionPager.
+        """
+        pattern = f"%{term}%"
+        sort_column = ", date AS sort_key" if paged else ""
+        order_by = "" if paged else "ORDER BY date DESC"
+        sql = f"""
+            SELECT id, date, amount, type, category, payment_method, description{sort_column}
+            FROM transactions
+            WHERE date BETWEEN ? AND ? AND (LOWER(category) LIKE ? OR LOWER(payment_method) LIKE ? OR LOWER(description) LIKE ? OR LOWER(type) LIKE ?)
+            {order_by}
+            """
+        return sql, (start_date, end_date, pattern, pattern, pattern, pattern)
+
+class TransactionPager:
+    """
+    Keyset pagination over a transaction query.
+
+    `sql` selects the seven display columns followed by a `sort_key` column.
+    Rows are ordered by (sort_key, id) and each page continues from the key
+    of the last row seen, so fetching a page costs the same however deep
+    into the result the user has scrolled. Each page borrows a reader
+    connection from the storage pool.
+    """
+
+    def __init__(self, storage, sql, params=(), descending=True, page_size=100):
+        self.storage = storage
+        self.sql = sql
+        self.params = tuple(params)
+        self.descending = descending
+        self.page_size = page_size
+
+    def _fetch(self, key, forward):
+        # Walking backwards flips both the comparison and the sort order
+        newest_first = self.descending == forward
+        operator = "<" if newest_first else ">"
+        order = "DESC" if newest_first else "ASC"
+
+        where = f"WHERE (sort_key, id) {operator} (?, ?)" if key else ""
+        with self.storage.reader() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM ({self.sql}) {where} ORDER BY sort_key {order}, id {order} LIMIT ?",
+                self.params + (key or ()) + (self.page_size,)
+            ).fetchall()
+        return rows if forward else rows[::-1]
+
+    @staticmethod
+    def key(row):
+        """Pagination key of a fetched row"""
+        return (row[7], row[0])
+
+    def first_page(self):
+        return self._fetch(None, True)
+
+    def page_after(self, row):
+        """The page that follows `row` in display order"""
+        return self._fetch(self.key(row), True)
+
+    def page_before(self, row):
+        """The page that precedes `row` in display order"""
+        return self._fetch(self.key(row), False)
+
+class AmbiguousDatesError(ValueError):
+    """A statement's dates read differently in more than one date format"""
+
+    def __init__(self, formats):
+        super().__init__(
+            f"Dates match both {formats[0]} and {formats[1]}; choose the date format explicitly"
+        )
+        self.formats = formats
+
+class TransactionImporter:
+    """
+    Streaming bulk import of bank statement exports (CSV or OFX).
+
+    Records are read lazily, validated, mapped to the app's categories and
+    inserted in batches with executemany, one transaction per batch. Each
+    row carries a content hash so importing the same statement twice only
+    adds the lines that are new.
+
+    Every file is read with one date format, detected from its first
+    DATE_SAMPLE rows unless a date_format is given.
+    """
+
+    # Header aliases used by common bank CSV exports
+    CSV_COLUMNS = {
+        "date": ["date", "transaction date", "posted date", "posting date", "booking date", "value date"],
+        "amount": ["amount", "transaction amount", "value"],
+        "debit": ["debit", "withdrawal", "withdrawals", "money out", "paid out"],
+        "credit": ["credit", "deposit", "deposits", "money in", "paid in"],
+        "description": ["description", "details", "narrative", "payee", "name", "memo", "reference"],
+        "category": ["category"],
+        "type": ["type", "transaction type"],
+        "payment_method": ["payment method", "payment_method", "method"],
+    }
+
+    DATE_FORMATS = ["%Y-%m-%d", "%Y/%m/%d", "%m/%d/%Y", "%d/%m/%Y", "%d.%m.%Y", "%d-%m-%Y", "%Y%m%d"]
+
+    # Description keywords used when a statement has no usable category
+    CATEGORY_KEYWORDS = {
+        "Food": ["restaurant", "cafe", "coffee", "grocery", "supermarket", "pizza", "bakery", "food"],
+        "Transport": ["uber", "lyft", "taxi", "fuel", "petrol", "gas station", "parking", "train", "bus", "airline"],
+        "Housing": ["rent", "mortgage", "landlord"],
+        "Entertainment": ["netflix", "spotify", "cinema", "theatre", "steam", "concert"],
+        "Shopping": ["amazon", "ebay", "store", "shop", "mall"],
+        "Utilities": ["electric", "water", "internet", "phone", "mobile", "utility"],
+        "Health": ["pharmacy", "doctor", "dental", "hospital", "gym", "clinic"],
+        "Education": ["tuition", "school", "university", "course", "books"],
+        "Salary": ["salary", "payroll", "wages"],
+        "Investments": ["dividend", "interest", "brokerage"],
+    }
+
+    OFX_PAYMENT_METHODS = {
+        "ATM": "Cash",
+        "CASH": "Cash",
+        "POS": "Debit Card",
+        "XFER": "Bank Transfer",
+        "DIRECTDEP": "Bank Transfer",
+        "DIRECTDEBIT": "Bank Transfer",
+        "PAYMENT": "Bank Transfer",
+    }
+
+    OFX_TAG = re.compile(r"<(/?)(\w+)>([^<]*)")
+
+    DATE_SAMPLE = 1000
+
+    def __init__(self, conn, expense_categories=EXPENSE_CATEGORIES, income_categories=INCOME_CATEGORIES,
+                 batch_size=5000, date_format=None):
+        self.conn = conn
+        self.expense_categories = list(expense_categories)
+        self.income_categories = list(income_categories)
+        self.batch_size = batch_size
+        self.date_formats = [date_format] if date_format else self.DATE_FORMATS
+
+    def import_file(self, path, progress_callback=None):
+        """
+        Import one statement file.
+
+        Args:
+            path: CSV or OFX/QFX file
+            progress_callback: Function called with the stats after each batch
+
+        Returns:
+            Dictionary with stats about the import
+        """
+        records = self.read_ofx(path) if path.lower().endswith((".ofx", ".qfx")) else self.read_csv(path)
+
+        sample = list(itertools.islice(records, self.DATE_SAMPLE))
+        date_format = self.detect_date_format([record.get("date", "") for record in sample])
+        records = itertools.chain(sample, records)
+
+        stats = {"read": 0, "inserted": 0, "duplicates": 0, "invalid": 0, "seconds": 0.0, "rows_per_second": 0.0}
+        began = time.perf_counter()
+
+        # WAL with synchronous=NORMAL only syncs at checkpoints, not on every commit
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+
+        occurrences = {}
+        batch = []
+        for record in records:
+            stats["read"] += 1
+            row = self.normalize(record, date_format)
+            if row is None:
+                stats["invalid"] += 1
+                continue
+
+            # Identical lines within one statement are kept apart by their position
+            content = "|".join(str(value) for value in row[:3] + row[5:])
+            occurrences[content] = occurrences.get(content, 0) + 1
+            digest = hashlib.sha1(f"{content}|{occurrences[content]}".encode("utf-8")).hexdigest()
+            batch.append(row + (digest,))
+
+            if len(batch) >= self.batch_size:
+                self._insert_batch(batch, stats)
+                batch = []
+                if progress_callback:
+                    progress_callback(stats)
+
+        if batch:
+            self._insert_batch(batch, stats)
+
+        stats["seconds"] = time.perf_counter() - began
+        stats["rows_per_second"] = stats["read"] / stats["seconds"] if stats["seconds"] else 0.0
+        if progress_callback:
+            progress_callback(stats)
+        return stats
+
+    def _insert_batch(self, batch, stats):
+        with self.conn:
+            cursor = self.conn.executemany(
+                "INSERT OR IGNORE INTO transactions (date, amount, type, category, payment_method, description, import_hash) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                batch
+            )
+        # rowcount excludes rows written by the FTS and rollup triggers
+        stats["inserted"] += cursor.rowcount
+        stats["duplicates"] += len(batch) - cursor.rowcount
+
+    def read_csv(self, path):
+        """Yield one dictionary per CSV line, keyed by the canonical column names"""
+        with open(path, newline="", encoding="utf-8-sig") as csv_file:
+            reader = csv.reader(csv_file)
+            header = next(reader, None)
+            if header is None:
+                return
+
+            names = [name.strip().lower() for name in header]
+            columns = {}
+            for field, aliases in self.CSV_COLUMNS.items():
+                for alias in aliases:
+                    if alias in names:
+                        columns[field] = names.index(alias)
+                        break
+
+            for line in reader:
+                yield {field: line[index] for field, index in columns.items() if index < len(line)}
+
+    def read_ofx(self, path):
+        """Yield one dictionary per <STMTTRN> block, reading the file in chunks"""
+        record = None
+        tail = ""
+
+        with open(path, encoding="utf-8", errors="replace") as ofx_file:
+            for chunk in iter(lambda: ofx_file.read(65536), ""):
+                data = tail + chunk
+                # Keep a possibly incomplete trailing tag for the next chunk
+                cut = data.rfind("<")
+                data, tail = (data[:cut], data[cut:]) if cut > 0 else (data, "")
+
+                for closing, tag, value in self.OFX_TAG.findall(data):
+                    tag = tag.upper()
+                    if tag == "STMTTRN":
+                        if closing and record is not None:
+                            yield self._ofx_record(record)
+                            record = None
+                        elif not closing:
+                            record = {}
+                    elif record is not None and not closing:
+                        record[tag] = value.strip()
+
+            for closing, tag, value in self.OFX_TAG.findall(tail):
+                if tag.upper() == "STMTTRN" and closing and record is not None:
+                    yield self._ofx_record(record)
+
+    def _ofx_record(self, record):
+        description = " ".join(part for part in (record.get("NAME", ""), record.get("MEMO", "")) if part)
+        return {
+            "date": record.get("DTPOSTED", "")[:8],
+            "amount": record.get("TRNAMT", ""),
+            "description": description,
+            "payment_method": self.OFX_PAYMENT_METHODS.get(record.get("TRNTYPE", "").upper(), "Other"),
+        }
+
+    def normalize(self, record, date_format):
+        """
+        Validate a raw record and map it onto the transactions table.
+
+        Returns:
+            (date, amount, type, category, payment_method, description) or None if invalid
+        """
+        date = self.parse_date(record.get("date", ""), date_format)
+        if date is None:
+            return None
+
+        if record.get("debit", "").strip() or record.get("credit", "").strip():
+            debit = self.parse_amount(record.get("debit", "")) or 0.0
+            credit = self.parse_amount(record.get("credit", "")) or 0.0
+            amount = credit - abs(debit)
+        else:
+            amount = self.parse_amount(record.get("amount", ""))
+        if not amount:
+            return None
+
+        # An explicit type column wins over the sign of the amount
+        transaction_type = record.get("type", "").strip().title()
+        if transaction_type not in ("Income", "Expense"):
+            transaction_type = "Income" if amount > 0 else "Expense"
+
+        description = record.get("description", "").strip()
+        category = self.map_category(record.get("category", ""), description, transaction_type)
+        payment_method = record.get("payment_method", "").strip() or "Other"
+        if payment_method not in PAYMENT_METHODS:
+            payment_method = "Other"
+
+        return (date, round(abs(amount), 2), transaction_type, category, payment_method, description)
+
+    def detect_date_format(self, dates):
+        """
+        The date format that reads the most of a statement's sample dates.
+
+        Raises:
+            AmbiguousDatesError: if another format reads as many dates but
+                disagrees on some of them, e.g. 01/02/2024 as %m/%d/%Y or %d/%m/%Y
+        """
+        dates = [text for text in dates if text.strip()]
+        parsed = {date_format: [self.parse_date(text, date_format) for text in dates] for date_format in self.date_formats}
+        counts = {date_format: sum(date is not None for date in values) for date_format, values in parsed.items()}
+
+        best = max(counts.values())
+        candidates = [date_format for date_format in self.date_formats if counts[date_format] == best]
+        for other in candidates[1:]:
+            if parsed[other] != parsed[candidates[0]]:
+                raise AmbiguousDatesError((candidates[0], other))
+        return candidates[0]
+
+    @staticmethod
+    def parse_date(text, date_format):
+        try:
+            return datetime.datetime.strptime(text.strip(), date_format).strftime("%Y-%m-%d")
+        except ValueError:
+            return None
+
+    @staticmethod
+    def parse_amount(text):
+        text = text.strip()
+        negative = text.startswith("(") and text.endswith(")")
+        cleaned = re.sub(r"[^\d.\-]", "", text)
+        try:
+            amount = float(cleaned)
+        except ValueError:
+            return None
+        return -abs(amount) if negative else amount
+
+    def map_category(self, category, description, transaction_type):
+        known = self.income_categories if transaction_type == "Income" else self.expense_categories
+
+        category = category.strip()
+        for name in known:
+            if name.lower() == category.lower():
+                return name
+
+        text = f"{category} {description}".lower()
+        for name, keywords in self.CATEGORY_KEYWORDS.items():
+            if name in known and any(keyword in text for keyword in keywords):
+                return name
+        return "Other"
+
+class TransactionExporter:
+    """
+    Streaming export of transactions to CSV, Parquet or Arrow IPC files.
+
+    Rows are read with fetchmany and written one chunk at a time, so memory
+    use depends on the chunk size rather than on the number of rows. With
+    partitioned=True the output is a directory in the year=YYYY/month=MM
+    layout that Spark, DuckDB and pyarrow datasets read directly.
+    """
+
+    FORMATS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+
+    COLUMNS = ["date", "amount", "type", "category", "payment_method", "description"]
+    CSV_HEADER = ["Date", "Amount", "Type", "Category", "Payment Method", "Description"]
+
+    def __init__(self, conn, chunk_size=50000):
+        self.conn = conn
+        self.chunk_size = chunk_size
+
+    def export(self, start_date, end_date, path, fmt="csv", partitioned=False, progress_callback=None):
+        """
+        Export the transactions between two dates.
+
+        Args:
+            start_date, end_date: Inclusive ISO date range
+            path: Output file, or output directory when partitioned
+            fmt: "csv", "parquet" or "arrow"
+            partitioned: Split the output into year=YYYY/month=MM directories
+            progress_callback: Function called with the stats after each chunk
+
+        Returns:
+            Dictionary with stats about the export
+        """
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+
+        stats = {"rows": 0, "total": 0, "files": 0, "seconds": 0.0, "rows_per_second": 0.0}
+        began = time.perf_counter()
+
+        # Answered from the date index, only used for progress
+        stats["total"] = self.conn.execute(
+            "SELECT COUNT(*) FROM transactions WHERE date BETWEEN ? AND ?", (start_date, end_date)
+        ).fetchone()[0]
+
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM transactions WHERE date BETWEEN ? AND ? ORDER BY date, id",
+            (start_date, end_date)
+        )
+
+        writer = None
+        partition = None
+        try:
+            while True:
+                rows = cursor.fetchmany(self.chunk_size)
+                if not rows:
+                    break
+
+                if not partitioned:
+                    if writer is None:
+                        writer = self._open(path, fmt)
+                        stats["files"] += 1
+                    writer.write(rows)
+                else:
+                    # Rows arrive in date order, so each month is opened once
+                    for month, month_rows in itertools.groupby(rows, key=lambda row: row[0][:7]):
+                        if month != partition:
+                            if writer is not None:
+                                writer.close()
+                            partition = month
+                            writer = self._open(self.partition_path(path, month, fmt), fmt)
+                            stats["files"] += 1
+                        writer.write(list(month_rows))
+
+                stats["rows"] += len(rows)
+                if progress_callback:
+                    progress_callback(stats)
+
+            # An empty range still produces a (header only) file
+            if writer is None and not partitioned:
+                writer = self._open(path, fmt)
+                stats["files"] += 1
+        finally:
+            if writer is not None:
+                writer.close()
+
+        stats["seconds"] = time.perf_counter() - began
+        stats["rows_per_second"] = stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+        return stats
+
+    def partition_path(self, path, month, fmt):
+        year, month_num = month.split("-")
+        directory = os.path.join(path, f"year={year}", f"month={month_num}")
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f"part-0{self.FORMATS[fmt]}")
+
+    def _open(self, path, fmt):
+        if fmt == "csv":
+            return _CsvChunkWriter(path, self.CSV_HEADER)
+        return _ArrowChunkWriter(path, fmt, self.COLUMNS)
+
+class _CsvChunkWriter:
+    def __init__(self, path, header):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(header)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+class _ArrowChunkWriter:
+    def __init__(self, path, fmt, columns):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet and Arrow exports need pyarrow (pip install pyarrow)")
+
+        self.pa = pa
+        self.columns = columns
+        self.schema = pa.schema([
+            ("date", pa.date32()),
+            ("amount", pa.float64()),
+            ("type", pa.string()),
+            ("category", pa.string()),
+            ("payment_method", pa.string()),
+            ("description", pa.string()),
+        ])
+        if fmt == "parquet":
+            self.writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+        else:
+            self.writer = pa.ipc.new_file(path, self.schema)
+
+    def write(self, rows):
+        pa = self.pa
+        columns = list(zip(*rows))
+        arrays = [pa.array(columns[0], pa.string()).cast(pa.date32())]
+        arrays += [pa.array(values, field.type) for values, field in zip(columns[1:], list(self.schema)[1:])]
+        self.writer.write_batch(pa.record_batch(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+class SQLiteStorage:
+    """
+    Pooled SQLite backend for one ledger file.
+
+    The database runs in WAL mode so readers never wait for the writer.
+    All writes go through one connection guarded by a lock. Reads borrow a
+    connection from a pool that grows up to `readers` connections; they
+    can be used from any thread, one thread at a time.
+    """
+
+    def __init__(self, path, readers=4, timeout=30):
+        self.path = path
+        self.readers = readers
+        self.timeout = timeout
+
+        self.write_lock = threading.Lock()
+        self.write_conn = self.connect()
+        self.write_conn.execute("PRAGMA journal_mode = WAL")
+        create_schema(self.write_conn)
+
+        self.idle = queue.Queue()
+        self.pool_lock = threading.Lock()
+        self.opened = 0
+
+    def connect(self, read_only=False):
+        conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+        conn.execute("PRAGMA synchronous = NORMAL")
+        if read_only:
+            conn.execute("PRAGMA query_only = 1")
+        return conn
+
+    @contextlib.contextmanager
+    def reader(self):
+        """Borrow a read-only connection from the pool"""
+        try:
+            conn = self.idle.get_nowait()
+        except queue.Empty:
+            with self.pool_lock:
+                grow = self.opened < self.readers
+                if grow:
+                    self.opened += 1
+            conn = self.connect(read_only=True) if grow else self.idle.get()
+
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self.idle.put(conn)
+
+    @contextlib.contextmanager
+    def writer(self):
+        """Hold the write lock; the block runs in one transaction"""
+        with self.write_lock:
+            with self.write_conn:
+                yield self.write_conn
+
+    def close(self):
+        with self.write_lock:
+            self.write_conn.close()
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+class Ledger:
+    """
+    Headless API over one ledger database.
+
+    Every operation the UI performs is available here, so ledgers can be
+    scripted, served and load-tested without Tk. Methods can be called from
+    any number of threads.
+    """
+
+    def __init__(self, storage, expense_categories=EXPENSE_CATEGORIES, income_categories=INCOME_CATEGORIES):
+        self.storage = storage
+        self.expense_categories = list(expense_categories)
+        self.income_categories = list(income_categories)
+
+    @classmethod
+    def open(cls, path, readers=4, **kwargs):
+        return cls(SQLiteStorage(path, readers=readers), **kwargs)
+
+    # Transactions
+
+    def add_transaction(self, date, amount, transaction_type, category, payment_method="", description=""):
+        """Insert a transaction and return its id"""
+        with self.storage.writer() as conn:
+            cursor = conn.execute(
+                "INSERT INTO transactions (date, amount, type, category, payment_method, description) VALUES (?, ?, ?, ?, ?, ?)",
+                (date, amount, transaction_type, category, payment_method, description)
+            )
+        return cursor.lastrowid
+
+    def update_transaction(self, transaction_id, date, amount, transaction_type, category, payment_method, description):
+        with self.storage.writer() as conn:
+            conn.execute(
+                """
+                UPDATE transactions 
+                SET date = ?, amount = ?, type = ?, category = ?, payment_method = ?, description = ? 
+                WHERE id = ?
+                """,
+                (date, amount, transaction_type, category, payment_method, description, transaction_id)
+            )
+
+    def delete_transaction(self, transaction_id):
+        with self.storage.writer() as conn:
+            conn.execute("DELETE FROM transactions WHERE id = ?", (transaction_id,))
+
+    def get_transaction(self, transaction_id):
+        with self.storage.reader() as conn:
+            return conn.execute(
+                "SELECT id, date, amount, type, category, payment_method, description FROM transactions WHERE id = ?",
+                (transaction_id,)
+            ).fetchone()
+
+    def month_pager(self, start_date, end_date, page_size=100):
+        """Transactions between two dates, newest first"""
+        return TransactionPager(
+            self.storage,
+            "SELECT id, date, amount, type, category, payment_method, description, date AS sort_key "
+            "FROM transactions WHERE date BETWEEN ? AND ?",
+            (start_date, end_date),
+            page_size=page_size
+        )
+
+    def search_pager(self, text, start_date=None, end_date=None, page_size=100):
+        """Search matches, best first; without dates the whole ledger is searched"""
+        with self.storage.reader() as conn:
+            sql, params, descending = TransactionSearch(conn).query(
+                text, start_date or "0000-01-01", end_date or "9999-12-31"
+            )
+        return TransactionPager(self.storage, sql, params, descending, page_size)
+
+    # Summaries
+
+    def summarize(self, start_date, end_date):
+        with self.storage.reader() as conn:
+            return TransactionAggregator(conn).summarize(start_date, end_date)
+
+    def rollup(self, months):
+        with self.storage.reader() as conn:
+            return TransactionAggregator(conn).rollup(months)
+
+    # Budgets
+
+    def budget_status(self, year, month_num, categories=None, today=None):
+        with self.storage.reader() as conn:
+            return BudgetEngine(conn).status(year, month_num, categories or self.expense_categories, today)
+
+    def get_budget(self, year, month_num, category):
+        with self.storage.reader() as conn:
+            return BudgetEngine(conn).get_budget(year, month_num, category)
+
+    def set_budget(self, year, month_num, category, amount):
+        with self.storage.writer() as conn:
+            BudgetEngine(conn).set_budget(year, month_num, category, amount)
+
+    def ensure_budget_year(self, year, categories=None):
+        with self.storage.writer() as conn:
+            BudgetEngine(conn).ensure_year(year, categories or self.expense_categories)
+
+    # Recurring transactions
+
+    def add_recurring_rule(self, start_date, frequency, amount, transaction_type, category,
+                           payment_method="", description="", interval=1, end_date=None):
+        with self.storage.writer() as conn:
+            return RecurringScheduler(conn).add_rule(
+                start_date, frequency, amount, transaction_type, category,
+                payment_method, description, interval, end_date
+            )
+
+    def delete_recurring_rule(self, rule_id):
+        with self.storage.writer() as conn:
+            RecurringScheduler(conn).delete_rule(rule_id)
+
+    def recurring_rules(self):
+        with self.storage.reader() as conn:
+            return RecurringScheduler(conn).rules()
+
+    def materialize_recurring(self, today=None):
+        """Insert every recurring occurrence that has come due"""
+        with self.storage.writer() as conn:
+            return RecurringScheduler(conn).materialize(today)
+
+    # Insights
+
+    def anomalies(self, year, month_num, threshold=3.5, conn=None):
+        """
+        Unusual spending in a month, highest score first.
+
+        A cache hit costs two indexed reads. On a miss the whole history is
+        scored once and every month's results are cached.
+
+        Args:
+            conn: Read connection to query on, such as a QueryExecutor job's;
+                one is borrowed from the pool if omitted
+        """
+        key = (int(year), month_num)
+        reader = self.storage.reader() if conn is None else contextlib.nullcontext(conn)
+        with reader as conn:
+            detector = AnomalyDetector(conn, threshold)
+            signature = detector.signatures([key])[key]
+            cached = detector.cached(*key, signature)
+            if cached is not None:
+                return cached
+
+            results = detector.detect()
+            months = sorted(set(results) | {key})
+            signatures = detector.signatures(months)
+
+        with self.storage.writer() as conn:
+            AnomalyDetector(conn).store(results, signatures)
+        return results.get(key, [])
+
+    # Bulk import and export
+
+    def import_file(self, path, progress_callback=None, date_format=None):
+        """Import a statement; other writers wait until it finishes"""
+        with self.storage.writer() as conn:
+            importer = TransactionImporter(conn, self.expense_categories, self.income_categories, date_format=date_format)
+            return importer.import_file(path, progress_callback)
+
+    def export(self, start_date, end_date, path, fmt="csv", partitioned=False, progress_callback=None):
+        with self.storage.reader() as conn:
+            return TransactionExporter(conn).export(start_date, end_date, path, fmt, partitioned, progress_callback)
+
+    def close(self):
+        self.storage.close()
+
+class LedgerRegistry:
+    """
+    Ledgers for many users, served from one process.
+
+    Each user's ledgers live in their own directory as <root>/<user>/<name>.db
+    and are opened once, on first use.
+    """
+
+    NAME_PATTERN = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+    def __init__(self, root, readers=4):
+        self.root = root
+        self.readers = readers
+        self.ledgers = {}
+        self.lock = threading.Lock()
+
+    def path(self, user, name="default"):
+        for part in (user, name):
+            if not self.NAME_PATTERN.match(part) or part.startswith("."):
+                raise ValueError(f"Invalid user or ledger name: {part!r}")
+        return os.path.join(self.root, user, f"{name}.db")
+
+    def ledger(self, user, name="default"):
+        """Open (or reuse) a user's ledger"""
+        with self.lock:
+            key = (user, name)
+            if key not in self.ledgers:
+                path = self.path(user, name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                self.ledgers[key] = Ledger.open(path, readers=self.readers)
+            return self.ledgers[key]
+
+    def names(self, user):
+        """Ledger names that exist on disk for a user"""
+        directory = os.path.dirname(self.path(user))
+        if not os.path.isdir(directory):
+            return []
+        return sorted(entry[:-3] for entry in os.listdir(directory) if entry.endswith(".db"))
+
+    def close(self):
+        with self.lock:
+            for ledger in self.ledgers.values():
+                ledger.close()
+            self.ledgers = {}
+
+def benchmark_search(rows=1_000_000, terms=("coffee", "grocer", "netflix", "store42", "store4242")):
+    """
+    Compare the LIKE search with the FTS5 index on a synthetic ledger.
+
+    The ledger is written to a temporary database file so the timings include
+    real page reads rather than an in-memory table.
+    """
+    words = ["coffee", "rent", "uber", "grocery", "groceries", "netflix", "pharmacy",
+             "books", "fuel", "lunch", "dinner", "gym", "insurance", "electricity", "phone"]
+    categories = ["Food", "Transport", "Housing", "Entertainment", "Shopping", "Utilities", "Health", "Education", "Other"]
+    payments = ["Cash", "Credit Card", "Debit Card", "Bank Transfer", "Mobile Payment", "Other"]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        conn = sqlite3.connect(os.path.join(tmp_dir, "benchmark.db"))
+        create_base_tables(conn)
+
+        start = datetime.date(2015, 1, 1)
+        rng = random.Random(42)
+        conn.executemany(
+            "INSERT INTO transactions (date, amount, type, category, payment_method, description) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    (start + datetime.timedelta(days=rng.randrange(3650))).isoformat(),
+                    round(rng.uniform(1, 500), 2),
+                    "Expense",
+                    rng.choice(categories),
+                    rng.choice(payments),
+                    " ".join(rng.sample(words, 2)) + f" store{rng.randrange(10000)}",
+                )
+                for _ in range(rows)
+            )
+        )
+        conn.commit()
+
+        began = time.perf_counter()
+        migrate_schema(conn)
+        print(f"Built indexes for {rows:,} rows in {time.perf_counter() - began:.2f}s")
+
+        search = TransactionSearch(conn)
+        print(f"{'term':<12}{'matches':>10}{'LIKE (ms)':>12}{'FTS (ms)':>12}{'speedup':>10}")
+        for term in terms:
+            began = time.perf_counter()
+            like_rows = conn.execute(*search.like_query(term, "2015-01-01", "2024-12-31")).fetchall()
+            like_ms = (time.perf_counter() - began) * 1000
+
+            began = time.perf_counter()
+            fts_rows = search.search(term, "2015-01-01", "2024-12-31")
+            fts_ms = (time.perf_counter() - began) * 1000
+
+            print(f"{term:<12}{len(fts_rows):>10,}{like_ms:>12.1f}{fts_ms:>12.1f}{like_ms / max(fts_ms, 0.001):>9.1f}x")
+
+            if len(like_rows) != len(fts_rows):
+                print(f"  note: LIKE matched {len(like_rows):,} rows (substring rather than word-prefix match)")
+
+        conn.close()
+
+def benchmark_concurrency(threads=16, seconds=5.0, ledgers=4, write_ratio=0.2, seed_rows=20000):
+    """
+    Mixed read/write load from many threads against several ledgers.
+
+    Each thread picks a random ledger and either adds a transaction or runs
+    one of the UI's reads (dashboard rollup, month page, search, budgets).
+    Prints throughput and latency percentiles per operation.
+    """
+    operations = ["add", "rollup", "page", "search", "budget"]
+    descriptions = ["coffee shop", "grocery store", "uber ride", "netflix", "pharmacy", "rent", "lunch"]
+    today = datetime.date.today()
+    months = previous_months(today.year, today.month, 6)
+    start_date, end_date = month_bounds(today.year, today.month)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        registry = LedgerRegistry(tmp_dir)
+        users = [f"user{number}" for number in range(ledgers)]
+
+        rng = random.Random(42)
+        for user in users:
+            ledger = registry.ledger(user)
+            with ledger.storage.writer() as conn:
+                conn.executemany(
+                    "INSERT INTO transactions (date, amount, type, category, payment_method, description) VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        (
+                            (today - datetime.timedelta(days=rng.randrange(180))).isoformat(),
+                            round(rng.uniform(1, 300), 2),
+                            "Expense",
+                            rng.choice(EXPENSE_CATEGORIES),
+                            rng.choice(PAYMENT_METHODS),
+                            rng.choice(descriptions),
+                        )
+                        for _ in range(seed_rows)
+                    )
+                )
+            ledger.ensure_budget_year(today.year)
+
+        latencies = {operation: [] for operation in operations}
+        errors = []
+        deadline = time.perf_counter() + seconds
+
+        def worker(number):
+            local_rng = random.Random(number)
+            timings = {operation: [] for operation in operations}
+            while time.perf_counter() < deadline:
+                ledger = registry.ledger(local_rng.choice(users))
+                if local_rng.random() < write_ratio:
+                    operation = "add"
+                else:
+                    operation = local_rng.choice(operations[1:])
+
+                began = time.perf_counter()
+                try:
+                    if operation == "add":
+                        ledger.add_transaction(
+                            today.isoformat(), round(local_rng.uniform(1, 300), 2), "Expense",
+                            local_rng.choice(EXPENSE_CATEGORIES), "Cash", local_rng.choice(descriptions)
+                        )
+                    elif operation == "rollup":
+                        ledger.rollup(months).month_series(months)
+                    elif operation == "page":
+                        ledger.month_pager(start_date, end_date).first_page()
+                    elif operation == "search":
+                        ledger.search_pager(local_rng.choice(descriptions).split()[0], start_date, end_date).first_page()
+                    else:
+                        ledger.budget_status(today.year, today.month)
+                except sqlite3.Error as e:
+                    errors.append(e)
+                    continue
+                timings[operation].append(time.perf_counter() - began)
+
+            for operation, values in timings.items():
+                latencies[operation].extend(values)
+
+        workers = [threading.Thread(target=worker, args=(number,)) for number in range(threads)]
+        began = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - began
+
+        import numpy as np
+        total = sum(len(values) for values in latencies.values())
+        print(f"{threads} threads, {ledgers} ledgers, {write_ratio:.0%} writes, {elapsed:.1f}s")
+        print(f"{'operation':<10}{'count':>10}{'ops/s':>10}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}")
+        for operation in operations:
+            values = np.array(latencies[operation]) * 1000
+            if not len(values):
+                continue
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            print(f"{operation:<10}{len(values):>10,}{len(values) / elapsed:>10,.0f}{p50:>10.2f}{p95:>10.2f}{p99:>10.2f}")
+        print(f"{'total':<10}{total:>10,}{total / elapsed:>10,.0f}")
+        print(f"errors: {len(errors)}" + (f" (first: {errors[0]})" if errors else ""))
+
+        registry.close()
+
+class JobCancelled(Exception):
+    """Raised inside a background job once it has been cancelled"""
+
+class Job:
+    """A unit of work for QueryExecutor, with progress and cancellation"""
+
+    def __init__(self, job_id, work, on_done, on_error, on_progress, results):
+        self.id = job_id
+        self.work = work
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.results = results
+        self.cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def check(self):
+        """Stop the job here if it was cancelled"""
+        if self.cancelled:
+            raise JobCancelled()
+
+    def report(self, fraction, message=""):
+        """Send progress (0.0-1.0, or None if unknown) back to the UI thread"""
+        self.check()
+        self.results.put(("progress", self, (fraction, message)))
+
+class QueryExecutor:
+    """
+    Runs queries and report work on a background thread, using read-only
+    connections borrowed from the ledger's storage pool.
+
+    Work functions are called as work(conn, job) on the worker thread and
+    must not touch Tk. Their results, errors and progress go through a
+    queue that the Tk main loop polls with root.after, so every callback
+    runs on the UI thread.
+    """
+
+    def __init__(self, root, storage, poll_ms=50):
+        self.root = root
+        self.storage = storage
+        self.poll_ms = poll_ms
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.conn = None
+        self.running = None
+        # Guards conn and running, so cancel() never interrupts the next job's query
+        self.lock = threading.Lock()
+        self.next_id = 0
+
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        self.root.after(self.poll_ms, self._poll)
+
+    def submit(self, work, on_done=None, on_error=None, on_progress=None):
+        """
+        Queue work for the worker thread.
+
+        Returns:
+            The Job, which can be passed to cancel()
+        """
+        self.next_id += 1
+        job = Job(self.next_id, work, on_done, on_error, on_progress, self.results)
+        self.jobs.put(job)
+        return job
+
+    def cancel(self, job):
+        if job is None:
+            return
+        job.cancel_event.set()
+
+        # Abort a query that is already running on the worker connection
+        with self.lock:
+            if self.running is job and self.conn is not None:
+                self.conn.interrupt()
+
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            if job.cancelled:
+                continue
+
+            with self.storage.reader() as conn:
+                with self.lock:
+                    self.conn = conn
+                    self.running = job
+                try:
+                    result = job.work(conn, job)
+                    self.results.put(("done", job, result))
+                except JobCancelled:
+                    pass
+                except Exception as e:
+                    if not job.cancelled:
+                        self.results.put(("error", job, e))
+                finally:
+                    with self.lock:
+                        self.running = None
+                        self.conn = None
+
+    def _poll(self):
+        # Rescheduled even if a callback raises, or every later job would hang
+        try:
+            while True:
+                try:
+                    kind, job, payload = self.results.get_nowait()
+                except queue.Empty:
+                    break
+
+                # Results of cancelled jobs are dropped
+                if job.cancelled:
+                    continue
+
+                callback = {"done": job.on_done, "error": job.on_error, "progress": job.on_progress}[kind]
+                if callback is not None:
+                    callback(*payload) if kind == "progress" else callback(payload)
+        finally:
+            self.root.after(self.poll_ms, self._poll)
+
+    def shutdown(self):
+        self.jobs.put(None)
+
+def new_figure(**kwargs):
+    """Create a matplotlib Figure, importing matplotlib on first use"""
+    from matplotlib.figure import Figure
+    return Figure(**kwargs)
+
+def embed_figure(figure, master):
+    """Attach a Figure to a Tk container"""
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    return FigureCanvasTkAgg(figure, master=master)
+
+REPORT_TYPES = ["Monthly Summary", "Category Analysis", "Income vs Expenses", "Annual Overview"]
+
+def report_data(conn, report_type, month, year):
+    """Data behind a report; database work only, safe off the Tk thread"""
+    aggregator = TransactionAggregator(conn)
+    month_num = list(calendar.month_name).index(month)
+
+    if report_type == "Monthly Summary":
+        return aggregator.summarize(*month_bounds(year, month_num))
+    elif report_type == "Category Analysis":
+        return aggregator.rollup([(int(year), month_num)])
+    elif report_type == "Income vs Expenses":
+        months = previous_months(year, month_num, 6)
+        return aggregator.rollup(months).month_series(months)
+    elif report_type == "Annual Overview":
+        return aggregator.rollup([(int(year), m) for m in range(1, 13)])
+
+def plot_category_pie(ax, categories, title):
+    ax.pie([category[1] for category in categories], labels=[category[0] for category in categories],
+           autopct='%1.1f%%', startangle=90)
+    ax.axis('equal')
+    ax.set_title(title)
+
+def plot_daily_spending(ax, daily_spending):
+    ax.bar([int(day[0][8:10]) for day in daily_spending], [day[1] for day in daily_spending], color='#3498db')
+    ax.set_xlabel('Day of Month')
+    ax.set_ylabel('Amount ($)')
+    ax.set_title('Daily Spending')
+    ax.set_xticks(range(1, 32, 5))
+
+def plot_category_bars(ax, categories):
+    category_amounts = [category[1] for category in categories]
+    y_pos = range(len(categories))
+
+    ax.barh(y_pos, category_amounts, align='center', color='#3498db')
+    ax.set_yticks(y_pos)
+    ax.set_yticklabels([category[0] for category in categories])
+    ax.invert_yaxis()  # Labels read top-to-bottom
+    ax.set_xlabel('Amount ($)')
+    ax.set_title('Expenses by Category')
+
+    # Add amount labels
+    for i, v in enumerate(category_amounts):
+        ax.text(v + 0.1, i, f'${v:.2f}', va='center')
+
+def plot_income_expenses(ax, months_data, title, show_net=True, rotation=0):
+    import numpy as np
+
+    months = [data[0] for data in months_data]
+    x = np.arange(len(months))
+    width = 0.35
+
+    ax.bar(x - width/2, [data[1] for data in months_data], width, label='Income', color='#2ecc71')
+    ax.bar(x + width/2, [data[2] for data in months_data], width, label='Expenses', color='#e74c3c')
+
+    if show_net:
+        # Net line and zero line
+        ax.plot(x, [data[3] for data in months_data], 'o-', label='Net', color='#3498db', linewidth=2)
+        ax.axhline(y=0, color='gray', linestyle='-', alpha=0.3)
+
+    ax.set_xlabel('Month')
+    ax.set_ylabel('Amount ($)')
+    ax.set_title(title)
+    ax.set_xticks(x)
+    ax.set_xticklabels(months, rotation=rotation)
+    ax.legend()
+
+def plot_table(ax, header, rows):
+    ax.axis('off')
+    if rows:
+        table = ax.table(cellText=rows, colLabels=header, loc='upper center', cellLoc='right', colLoc='right')
+        table.auto_set_font_size(False)
+        table.set_fontsize(9)
+        table.scale(1, 1.3)
+
+def render_report(report_type, month, year, data):
+    """
+    Draw a report on a new Figure, without Tk.
+
+    The page shows the same totals, tables and charts as the Reports tab.
+    Save it with figure.savefig; PNG and PDF use the Agg and PDF backends.
+    """
+    figure = new_figure(figsize=(11.69, 8.27))
+    title = f"{report_type}: {year}" if report_type == "Annual Overview" else f"{report_type}: {month} {year}"
+    figure.suptitle(title, fontsize=16, fontweight='bold')
+
+    if report_type in ("Monthly Summary", "Annual Overview"):
+        prefix = "Annual" if report_type == "Annual Overview" else "Total"
+        figure.text(0.05, 0.90, f"{prefix} Income: ${data.income:.2f}    {prefix} Expenses: ${data.expenses:.2f}    "
+                    f"Net: ${data.net:.2f}", fontsize=12)
+
+    if report_type == "Monthly Summary":
+        pie_ax, bar_ax = figure.subplots(1, 2)
+        categories = data.category_totals("Expense")
+        daily_spending = data.daily_totals("Expense")
+        if categories:
+            plot_category_pie(pie_ax, categories, 'Expense Categories')
+        else:
+            pie_ax.axis('off')
+        if daily_spending:
+            plot_daily_spending(bar_ax, daily_spending)
+        else:
+            bar_ax.axis('off')
+
+    elif report_type == "Category Analysis":
+        table_ax, bar_ax = figure.subplots(1, 2, gridspec_kw={"width_ratios": [2, 3]})
+        categories = data.category_totals("Expense")
+        total_expenses = sum(amount for _, amount in categories)
+        rows = [[category, f"${amount:.2f}", f"{amount / total_expenses * 100:.1f}%"] for category, amount in categories]
+        if rows:
+            rows.append(["Total", f"${total_expenses:.2f}", "100.0%"])
+            plot_category_bars(bar_ax, categories)
+        else:
+            bar_ax.axis('off')
+            figure.text(0.5, 0.5, "No expense data available for this period", ha='center', fontsize=12)
+        plot_table(table_ax, ["Category", "Amount", "% of Total"], rows)
+
+    elif report_type == "Income vs Expenses":
+        table_ax, chart_ax = figure.subplots(2, 1, gridspec_kw={"height_ratios": [1, 2]})
+        rows = [[name, f"${income:.2f}", f"${expenses:.2f}", f"${net:.2f}"] for name, income, expenses, net in data]
+        plot_table(table_ax, ["Month", "Income", "Expenses", "Net"], rows)
+        plot_income_expenses(chart_ax, data, 'Income vs Expenses')
+
+    elif report_type == "Annual Overview":
+        months = [(int(year), month_num) for month_num in range(1, 13)]
+        bar_ax, pie_ax = figure.subplots(2, 1)
+        plot_income_expenses(bar_ax, data.month_series(months), f'Monthly Income vs Expenses - {year}', show_net=False, rotation=45)
+        categories = data.category_totals("Expense")
+        if categories:
+            plot_category_pie(pie_ax, categories, f'Expense Categories - {year}')
+        else:
+            pie_ax.axis('off')
+
+    figure.tight_layout(rect=(0, 0, 1, 0.88))
+    return figure
+
+def _render_ledger_month(ledger_path, year, month_num, report_types, out_dir, fmt):
+    # Runs in a worker process with its own read-only connection
+    conn = sqlite3.connect(f"file:{ledger_path}?mode=ro", uri=True)
+    month = calendar.month_name[month_num]
+    ledger_name = os.path.splitext(os.path.basename(ledger_path))[0]
+    written = []
+    try:
+        for report_type in report_types:
+            # The annual overview is drawn once per year, with the December batch
+            if report_type == "Annual Overview":
+                if month_num != 12:
+                    continue
+                directory = os.path.join(out_dir, ledger_name, str(year))
+            else:
+                directory = os.path.join(out_dir, ledger_name, f"{year}-{month_num:02d}")
+            os.makedirs(directory, exist_ok=True)
+
+            path = os.path.join(directory, f"{report_type.lower().replace(' ', '-')}.{fmt}")
+            figure = render_report(report_type, month, year, report_data(conn, report_type, month, year))
+            figure.savefig(path, format=fmt, dpi=100)
+            written.append(path)
+    finally:
+        conn.close()
+    return written
+
+def render_reports(ledger_paths, months, out_dir, fmt="png", report_types=REPORT_TYPES, workers=None, progress_callback=None):
+    """
+    Render reports for many ledgers and months in parallel processes.
+
+    Files are written as <out_dir>/<ledger>/<YYYY-MM>/<report>.<fmt>, with the
+    annual overview in <out_dir>/<ledger>/<YYYY>/ when December is included.
+
+    Returns:
+        List of the files written
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    written = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_render_ledger_month, ledger_path, year, month_num, list(report_types), out_dir, fmt)
+            for ledger_path in ledger_paths
+            for year, month_num in months
+        ]
+        for done, future in enumerate(as_completed(futures), 1):
+            written.extend(future.result())
+            if progress_callback:
+                progress_callback(done, len(futures))
+    return sorted(written)
+
+class ChartPanel:
+    """
+    A matplotlib figure embedded once in a Tk container and updated in place.
+
+    Data artists are created with animated=True so they stay out of the
+    cached background. A refresh that keeps the axes limits only restores
+    that background and blits the changed artists; anything that moves the
+    axes (new limits, tick labels, title) triggers a single full redraw.
+    """
+
+    def __init__(self, master, figsize):
+        self.figure = new_figure(figsize=figsize)
+        self.ax = self.figure.add_subplot(111)
+        self.canvas = embed_figure(self.figure, master)
+        self.widget = self.canvas.get_tk_widget()
+        self.widget.pack(fill="both", expand=True)
+        self.empty_label = tk.Label(master, text="No data available", font=("Arial", 12), bg="white")
+
+        # Artists updated on refresh, and the data labels they were built for
+        self.artists = {}
+        self.labels = None
+        self.background = None
+        self.canvas.mpl_connect("draw_event", self.on_draw)
+
+    def animated(self):
+        """Every artist registered in self.artists, flattened"""
+        flat = []
+        for artist in self.artists.values():
+            flat.extend(artist if isinstance(artist, (list, tuple)) else [artist])
+        return flat
+
+    def on_draw(self, event):
+        # Cache the static parts, then paint the animated artists on top
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        for artist in self.animated():
+            self.figure.draw_artist(artist)
+
+    def show_empty(self):
+        self.widget.pack_forget()
+        self.empty_label.pack(pady=50)
+
+    def show_chart(self):
+        self.empty_label.pack_forget()
+        if not self.widget.winfo_ismapped():
+            self.widget.pack(fill="both", expand=True)
+
+    def fit_ylim(self, values):
+        """
+        Grow or shrink the y axis to fit `values`.
+
+        Returns:
+            True if the limits changed and the canvas needs a full redraw
+        """
+        low = min(min(values, default=0), 0)
+        high = max(max(values, default=0), 1)
+        bottom, top = self.ax.get_ylim()
+
+        # Keep the current limits while the data fits and still fills the axis
+        if bottom <= low and high <= top and high > top / 2 and (low == 0 or low < bottom / 2):
+            return False
+
+        self.ax.set_ylim(low * 1.15, high * 1.15)
+        return True
+
+    def refresh(self, full=False):
+        if full or self.background is None:
+            self.canvas.draw_idle()
+            return
+
+        self.canvas.restore_region(self.background)
+        for artist in self.animated():
+            self.figure.draw_artist(artist)
+        self.canvas.blit(self.figure.bbox)
 
 class ExpenseTrackerApp:
-    def __init__(self, root):
+    def __init__(self, root, ledger=None):
         self.root = root
         self.root.title("Expense Tracker")
         self.root.geometry("1200x700")
         self.root.configure(bg="#f5f5f5")
         
-        # Database setup
-        self.conn = sqlite3.connect("expense_tracker.db")
-        self.create_tables()
-        
+        # Database setup; all storage access goes through the ledger
+        self.ledger = ledger or Ledger.open(DATABASE_PATH)
+
+        # Reports and exports run on a worker thread
+        self.executor = QueryExecutor(self.root, self.ledger.storage)
+        self.report_job = None
+
         # Variables
         self.transaction_id = None
         self.selected_category = tk.StringVar()
@@ -34,82 +2117,60 @@ class ExpenseTrackerApp:
         self.selected_payment = tk.StringVar()
         self.amount_var = tk.StringVar()
         self.description_var = tk.StringVar()
+        self.repeat_var = tk.StringVar(value="Never")
+        self.repeat_until_var = tk.StringVar()
         self.search_var = tk.StringVar()
+        self.live_search = tk.BooleanVar(value=True)
+        self.search_job = None
+
+        # Virtual transaction list: only a window of rows lives in the Treeview
+        self.pager = None
+        self.window_rows = []
+        self.window_at_start = True
+        self.window_at_end = True
+        self.max_window_rows = 300
+        self.paging_job = None
+
+        # Dashboard and budget charts, created on first draw and then reused
+        self.category_chart = None
+        self.daily_chart = None
+        self.trends_chart = None
+        self.budget_chart = None
         self.filter_month = tk.StringVar(value=datetime.datetime.now().strftime("%B"))
         self.filter_year = tk.StringVar(value=str(datetime.datetime.now().year))
         
         # Pre-populate categories
-        self.expense_categories = ["Food", "Transport", "Housing", "Entertainment", "Shopping", "Utilities", "Health", "Education", "Other"]
-        self.income_categories = ["Salary", "Freelance", "Investments", "Gifts", "Other"]
-        self.payment_methods = ["Cash", "Credit Card", "Debit Card", "Bank Transfer", "Mobile Payment", "Other"]
+        self.expense_categories = list(EXPENSE_CATEGORIES)
+        self.income_categories = list(INCOME_CATEGORIES)
+        self.payment_methods = list(PAYMENT_METHODS)
         
         # Create initial monthly budgets
         self.initialize_budgets()
+
+        # Catch up on recurring transactions, then check again every hour
+        self.ledger.materialize_recurring()
+        self.current_frame = None
+        self.scheduler_interval = 60 * 60 * 1000
+        self.root.after(self.scheduler_interval, self.run_scheduler)
         
         # Create main frames
         self.create_main_frames()
         
-        # Create widgets
+        # Create widgets; each panel is built the first time its tab is shown
         self.create_sidebar()
-        self.create_transaction_form()
-        self.create_transaction_list()
-        self.create_visualization_panel()
-        self.create_budget_panel()
-        
-        # Load initial data
-        self.load_transactions()
-        self.load_summary()
-        self.load_budget_view()
-        
-        # Set default active tab
+        self.panel_builders = {
+            "transactions": [self.create_transaction_form, self.create_transaction_list],
+            "dashboard": [self.create_visualization_panel],
+            "budget": [self.create_budget_panel],
+            "insights": [self.create_insights_panel],
+        }
+        
+        # Set default active tab, which also loads its data
         self.show_frame("transactions")
 
-    def create_tables(self):
-        cursor = self.conn.cursor()
-        
-        # Transactions table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS transactions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            date TEXT,
-            amount REAL,
-            type TEXT,
-            category TEXT,
-            payment_method TEXT,
-            description TEXT
-        )
-        ''')
-        
-        # Budgets table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS budgets (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            category TEXT,
-            amount REAL,
-            month TEXT,
-            year TEXT
-        )
-        ''')
-        
-        self.conn.commit()
-    
     def initialize_budgets(self):
-        cursor = self.conn.cursor()
-        current_month = datetime.datetime.now().strftime("%B")
-        current_year = str(datetime.datetime.now().year)
-        
-        # Check if budgets exist for the current month
-        cursor.execute("SELECT COUNT(*) FROM budgets WHERE month = ? AND year = ?", (current_month, current_year))
-        count = cursor.fetchone()[0]
-        
-        if count == 0:
-            # Initialize with default budgets
-            for category in self.expense_categories:
-                cursor.execute(
-                    "INSERT INTO budgets (category, amount, month, year) VALUES (?, ?, ?, ?)",
-                    (category, 0.0, current_month, current_year)
-                )
-            self.conn.commit()
+        # Pre-create this year's budgets in one batch; existing ones are kept
+        self.ledger.ensure_budget_year(datetime.datetime.now().year, self.expense_categories)
     
     def create_main_frames(self):
         # Container for all frames
@@ -138,6 +2199,9 @@ class ExpenseTrackerApp:
         
         # Budget frame
         self.frames["budget"] = tk.Frame(self.content, bg="#f5f5f5")
+
+        # Insights frame
+        self.frames["insights"] = tk.Frame(self.content, bg="#f5f5f5")
         
         for frame in self.frames.values():
             frame.pack(fill="both", expand=True)
@@ -153,7 +2217,8 @@ class ExpenseTrackerApp:
             ("Transactions", "transactions"),
             ("Dashboard", "dashboard"),
             ("Reports", "reports"),
-            ("Budget", "budget")
+            ("Budget", "budget"),
+            ("Insights", "insights")
         ]
         
         for text, view in nav_buttons:
@@ -183,6 +2248,11 @@ class ExpenseTrackerApp:
         for frame in self.frames.values():
             frame.pack_forget()
         
+        # Build the panel on first use
+        for build in self.panel_builders.pop(frame_name, []):
+            build()
+        self.current_frame = frame_name
+
         # Show selected frame
         self.frames[frame_name].pack(fill="both", expand=True)
         
@@ -195,6 +2265,8 @@ class ExpenseTrackerApp:
             self.generate_reports()
         elif frame_name == "budget":
             self.load_budget_view()
+        elif frame_name == "insights":
+            self.load_insights()
     
     def create_transaction_form(self):
         form_frame = tk.LabelFrame(self.frames["transactions"], text="Add Transaction", font=("Arial", 12, "bold"), bg="#f5f5f5", padx=10, pady=10)
@@ -206,6 +2278,7 @@ class ExpenseTrackerApp:
         
         # Date picker
         tk.Label(form_grid, text="Date:", bg="#f5f5f5", font=("Arial", 10)).grid(row=0, column=0, sticky="w", padx=5, pady=5)
+        from tkcalendar import DateEntry
         self.date_picker = DateEntry(form_grid, width=15, background='#1abc9c', foreground='white', date_pattern='yyyy-mm-dd')
         self.date_picker.grid(row=0, column=1, sticky="w", padx=5, pady=5)
         
@@ -236,6 +2309,15 @@ class ExpenseTrackerApp:
         tk.Label(form_grid, text="Description:", bg="#f5f5f5", font=("Arial", 10)).grid(row=2, column=2, sticky="w", padx=5, pady=5)
         self.description_entry = tk.Entry(form_grid, textvariable=self.description_var, width=25)
         self.description_entry.grid(row=2, column=3, sticky="w", padx=5, pady=5)
+
+        # Repeat
+        tk.Label(form_grid, text="Repeat:", bg="#f5f5f5", font=("Arial", 10)).grid(row=3, column=0, sticky="w", padx=5, pady=5)
+        self.repeat_combo = ttk.Combobox(form_grid, textvariable=self.repeat_var, state="readonly", width=15, values=["Never", "Daily", "Weekly", "Monthly"])
+        self.repeat_combo.grid(row=3, column=1, sticky="w", padx=5, pady=5)
+
+        tk.Label(form_grid, text="Until (optional):", bg="#f5f5f5", font=("Arial", 10)).grid(row=3, column=2, sticky="w", padx=5, pady=5)
+        self.repeat_until_entry = tk.Entry(form_grid, textvariable=self.repeat_until_var, width=15)
+        self.repeat_until_entry.grid(row=3, column=3, sticky="w", padx=5, pady=5)
         
         # Action buttons
         button_frame = tk.Frame(form_frame, bg="#f5f5f5")
@@ -251,6 +2333,9 @@ class ExpenseTrackerApp:
         self.cancel_button = tk.Button(button_frame, text="Cancel", bg="#e74c3c", fg="white", font=("Arial", 10, "bold"), padx=15, pady=5, command=self.cancel_edit)
         self.cancel_button.pack(side="left", padx=5)
         self.cancel_button.config(state="disabled")
+
+        recurring_button = tk.Button(button_frame, text="Recurring...", bg="#9b59b6", fg="white", font=("Arial", 10, "bold"), padx=15, pady=5, command=self.manage_recurring)
+        recurring_button.pack(side="right", padx=5)
         
         # Initialize category dropdown
         self.update_categories()
@@ -297,6 +2382,16 @@ class ExpenseTrackerApp:
         
         search_btn = tk.Button(filter_frame, text="Search", bg="#3498db", fg="white", command=self.search_transactions)
         search_btn.pack(side="left", padx=5)
+
+        # Search-as-you-type
+        live_check = tk.Checkbutton(filter_frame, text="Live", variable=self.live_search, bg="#f5f5f5")
+        live_check.pack(side="left", padx=5)
+        search_entry.bind("<KeyRelease>", self.schedule_search)
+        search_entry.bind("<Return>", lambda event: self.search_transactions())
+
+        # Bulk statement import
+        import_btn = tk.Button(filter_frame, text="Import...", bg="#1abc9c", fg="white", command=self.import_statements)
+        import_btn.pack(side="right", padx=5)
         
         # Transactions list
         list_frame = tk.Frame(self.frames["transactions"], bg="white")
@@ -325,9 +2420,9 @@ class ExpenseTrackerApp:
         self.transaction_tree.column("description", width=200)
         
         # Add scrollbar
-        scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.transaction_tree.yview)
-        self.transaction_tree.configure(yscrollcommand=scrollbar.set)
-        scrollbar.pack(side="right", fill="y")
+        self.transaction_scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.transaction_tree.yview)
+        self.transaction_tree.configure(yscrollcommand=self.on_transaction_scroll)
+        self.transaction_scrollbar.pack(side="right", fill="y")
         self.transaction_tree.pack(fill="both", expand=True)
         
         # Bind select event
@@ -453,7 +2548,7 @@ class ExpenseTrackerApp:
         list_frame.pack(fill="both", expand=True, pady=10)
         
         # Create treeview
-        columns = ("category", "budget", "spent", "remaining", "percentage")
+        columns = ("category", "budget", "spent", "remaining", "percentage", "forecast")
         self.budget_tree = ttk.Treeview(list_frame, columns=columns, show="headings", selectmode="browse")
         
         # Define headings
@@ -462,6 +2557,7 @@ class ExpenseTrackerApp:
         self.budget_tree.heading("spent", text="Spent")
         self.budget_tree.heading("remaining", text="Remaining")
         self.budget_tree.heading("percentage", text="% Used")
+        self.budget_tree.heading("forecast", text="Forecast")
         
         # Define columns
         self.budget_tree.column("category", width=150)
@@ -469,6 +2565,10 @@ class ExpenseTrackerApp:
         self.budget_tree.column("spent", width=100)
         self.budget_tree.column("remaining", width=100)
         self.budget_tree.column("percentage", width=100)
+        self.budget_tree.column("forecast", width=100)
+
+        # Categories projected to end the month over budget
+        self.budget_tree.tag_configure("over", foreground="#e74c3c")
         
         # Add scrollbar
         scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.budget_tree.yview)
@@ -502,15 +2602,11 @@ class ExpenseTrackerApp:
     def set_budget(self):
         selected_item = self.budget_tree.selection()[0]
         category = self.budget_tree.item(selected_item, "values")[0]
+        year = self.budget_year.get()
+        month_num = list(calendar.month_name).index(self.budget_month.get())
         
         # Get current budget
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "SELECT amount FROM budgets WHERE category = ? AND month = ? AND year = ?",
-            (category, self.budget_month.get(), self.budget_year.get())
-        )
-        result = cursor.fetchone()
-        current_budget = result[0] if result else 0
+        current_budget = self.ledger.get_budget(year, month_num, category)
         
         # Ask for new budget
         new_budget = simpledialog.askfloat(
@@ -522,11 +2618,7 @@ class ExpenseTrackerApp:
         
         if new_budget is not None:
             # Update budget
-            cursor.execute(
-                "UPDATE budgets SET amount = ? WHERE category = ? AND month = ? AND year = ?",
-                (new_budget, category, self.budget_month.get(), self.budget_year.get())
-            )
-            self.conn.commit()
+            self.ledger.set_budget(year, month_num, category, new_budget)
             
             # Refresh budget view
             self.load_budget_view()
@@ -536,91 +2628,148 @@ class ExpenseTrackerApp:
         for item in self.budget_tree.get_children():
             self.budget_tree.delete(item)
         
-        # Get all categories
-        categories = self.expense_categories
-        
-        # Get budgets for selected month and year
-        cursor = self.conn.cursor()
-        
-        for category in categories:
-            # Get budget
-            cursor.execute(
-                "SELECT amount FROM budgets WHERE category = ? AND month = ? AND year = ?",
-                (category, self.budget_month.get(), self.budget_year.get())
-            )
-            result = cursor.fetchone()
-            budget = result[0] if result else 0
-            
-            # Get spending for this category in selected month
-            month_num = list(calendar.month_name).index(self.budget_month.get())
-            start_date = f"{self.budget_year.get()}-{month_num:02d}-01"
-            end_date = f"{self.budget_year.get()}-{month_num:02d}-{calendar.monthrange(int(self.budget_year.get()), month_num)[1]}"
-            
-            cursor.execute(
-                "SELECT SUM(amount) FROM transactions WHERE category = ? AND type = 'Expense' AND date BETWEEN ? AND ?",
-                (category, start_date, end_date)
-            )
-            result = cursor.fetchone()
-            spent = result[0] if result and result[0] else 0
-            
-            # Calculate remaining and percentage
-            remaining = budget - spent
-            percentage = (spent / budget * 100) if budget > 0 else 0
-            
+        # Budgets, spending and forecast for all categories in one query
+        month_num = list(calendar.month_name).index(self.budget_month.get())
+        status = self.ledger.budget_status(self.budget_year.get(), month_num, self.expense_categories)
+
+        for category, budget, spent, remaining, percentage, forecast in status:
             # Add to treeview
             self.budget_tree.insert("", "end", values=(
                 category,
                 f"${budget:.2f}",
                 f"${spent:.2f}",
                 f"${remaining:.2f}",
-                f"{percentage:.1f}%"
-            ))
+                f"{percentage:.1f}%",
+                f"${forecast:.2f}"
+            ), tags=("over",) if budget > 0 and forecast > budget else ())
         
         # Create budget chart
-        self.create_budget_chart()
-    
-    def create_budget_chart(self):
-        # Clear previous chart
-        for widget in self.budget_chart_canvas.winfo_children():
-            widget.destroy()
-        
-        # Get data from treeview
-        categories = []
-        budgets = []
-        spent = []
-        
-        for item in self.budget_tree.get_children():
-            values = self.budget_tree.item(item, "values")
-            categories.append(values[0])
-            budgets.append(float(values[1].replace("$", "")))
-            spent.append(float(values[2].replace("$", "")))
-        
-        # Create figure
-        fig, ax = plt.subplots(figsize=(10, 6))
-        
-        # Set width of bars
-        bar_width = 0.35
-        index = np.arange(len(categories))
-        
-        # Create bars
-        budget_bars = ax.bar(index, budgets, bar_width, label='Budget', color='#3498db')
-        spent_bars = ax.bar(index + bar_width, spent, bar_width, label='Spent', color='#e74c3c')
-        
-        # Add labels
-        ax.set_xlabel('Categories')
-        ax.set_ylabel('Amount ($)')
-        ax.set_title(f'Budget vs Spent - {self.budget_month.get()} {self.budget_year.get()}')
-        ax.set_xticks(index + bar_width / 2)
-        ax.set_xticklabels(categories, rotation=45, ha='right')
-        ax.legend()
-        
-        plt.tight_layout()
-        
-        # Embed in tkinter
-        canvas = FigureCanvasTkAgg(fig, master=self.budget_chart_canvas)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
+        self.create_budget_chart(status)
     
+    def create_budget_chart(self, status):
+        import numpy as np
+
+        categories = [row[0] for row in status]
+        budgets = [row[1] for row in status]
+        spent = [row[2] for row in status]
+
+        if self.budget_chart is None:
+            self.budget_chart = ChartPanel(self.budget_chart_canvas, (10, 6))
+            ax = self.budget_chart.ax
+
+            # Set width of bars
+            bar_width = 0.35
+            index = np.arange(len(categories))
+
+            # Create bars, updated in place on refresh
+            budget_bars = ax.bar(index, [0] * len(categories), bar_width, label='Budget', color='#3498db', animated=True)
+            spent_bars = ax.bar(index + bar_width, [0] * len(categories), bar_width, label='Spent', color='#e74c3c', animated=True)
+
+            # Add labels
+            ax.set_xlabel('Categories')
+            ax.set_ylabel('Amount ($)')
+            ax.set_xticks(index + bar_width / 2)
+            ax.set_xticklabels(categories, rotation=45, ha='right')
+            ax.legend()
+            self.budget_chart.artists = {"budget": list(budget_bars), "spent": list(spent_bars)}
+        chart = self.budget_chart
+
+        for bar, amount in zip(chart.artists["budget"], budgets):
+            bar.set_height(amount)
+        for bar, amount in zip(chart.artists["spent"], spent):
+            bar.set_height(amount)
+
+        # The title is part of the background, so a new month needs a full draw
+        title = f'Budget vs Spent - {self.budget_month.get()} {self.budget_year.get()}'
+        full = chart.fit_ylim(budgets + spent)
+        if chart.ax.get_title() != title:
+            chart.ax.set_title(title)
+            chart.figure.tight_layout()
+            full = True
+        chart.refresh(full=full)
+
+    def create_insights_panel(self):
+        insights_frame = tk.LabelFrame(self.frames["insights"], text="Unusual Spending", font=("Arial", 12, "bold"), bg="#f5f5f5")
+        insights_frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+        # Month selector
+        month_frame = tk.Frame(insights_frame, bg="#f5f5f5")
+        month_frame.pack(fill="x", padx=10, pady=10)
+
+        months = list(calendar.month_name)[1:]
+        tk.Label(month_frame, text="Month:", bg="#f5f5f5", font=("Arial", 10)).pack(side="left", padx=5)
+        self.insights_month = tk.StringVar(value=datetime.datetime.now().strftime("%B"))
+        ttk.Combobox(month_frame, textvariable=self.insights_month, values=months, width=10, state="readonly").pack(side="left", padx=5)
+
+        # Year selector
+        tk.Label(month_frame, text="Year:", bg="#f5f5f5", font=("Arial", 10)).pack(side="left", padx=5)
+        current_year = datetime.datetime.now().year
+        years = [str(year) for year in range(current_year - 10, current_year + 1)]
+        self.insights_year = tk.StringVar(value=str(current_year))
+        ttk.Combobox(month_frame, textvariable=self.insights_year, values=years, width=6, state="readonly").pack(side="left", padx=5)
+
+        tk.Button(month_frame, text="Load", bg="#3498db", fg="white", command=self.load_insights).pack(side="left", padx=5)
+
+        self.insights_status = tk.Label(month_frame, text="", bg="#f5f5f5", font=("Arial", 9), fg="#7f8c8d")
+        self.insights_status.pack(side="left", padx=10)
+
+        # Anomaly list
+        list_frame = tk.Frame(insights_frame, bg="white")
+        list_frame.pack(fill="both", expand=True, pady=10)
+
+        columns = ("period", "kind", "category", "amount", "expected", "score")
+        self.insights_tree = ttk.Treeview(list_frame, columns=columns, show="headings", selectmode="browse")
+        for column, heading, width in zip(
+            columns,
+            ["Date / Month", "Level", "Category", "Spent", "Typical", "Score"],
+            [120, 80, 150, 100, 100, 80]
+        ):
+            self.insights_tree.heading(column, text=heading)
+            self.insights_tree.column(column, width=width)
+
+        scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.insights_tree.yview)
+        self.insights_tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        self.insights_tree.pack(fill="both", expand=True)
+
+        tk.Label(
+            insights_frame,
+            text="Days are compared with spending days in the previous 90 days, months with the previous 12 months. "
+                 "Score is a robust z-score (median and MAD); 3.5 or more is flagged.",
+            bg="#f5f5f5", font=("Arial", 9), fg="#7f8c8d", wraplength=800, justify="left"
+        ).pack(anchor="w", padx=10, pady=(0, 10))
+
+    def load_insights(self):
+        year = int(self.insights_year.get())
+        month_num = list(calendar.month_name).index(self.insights_month.get())
+
+        # A cache miss scores the whole history, so keep it off the Tk thread
+        self.insights_status.config(text="Analysing spending history...")
+        self.executor.submit(
+            lambda conn, job: self.ledger.anomalies(year, month_num, conn=conn),
+            self.show_insights,
+            lambda e: messagebox.showerror("Insights Error", f"An error occurred: {str(e)}")
+        )
+
+    def show_insights(self, anomalies):
+        for item in self.insights_tree.get_children():
+            self.insights_tree.delete(item)
+
+        for anomaly in anomalies:
+            self.insights_tree.insert("", "end", values=(
+                anomaly["period"],
+                "Month" if anomaly["kind"] == "month" else "Day",
+                anomaly["category"],
+                f"${anomaly['amount']:.2f}",
+                f"${anomaly['expected']:.2f}",
+                f"{anomaly['score']:.1f}"
+            ))
+
+        if anomalies:
+            self.insights_status.config(text=f"{len(anomalies)} unusual spending entries")
+        else:
+            self.insights_status.config(text="No unusual spending found")
+
     def generate_reports(self):
         # Clear previous content
         for widget in self.frames["reports"].winfo_children():
@@ -668,13 +2817,34 @@ class ExpenseTrackerApp:
         # Export button
         export_btn = tk.Button(
             controls_frame, 
-            text="Export to CSV", 
+            text="Export", 
             bg="#3498db", 
             fg="white", 
             font=("Arial", 10, "bold"),
-            command=lambda: self.export_report(report_type.get(), report_month.get(), report_year.get())
+            command=lambda: self.export_report(
+                report_type.get(), report_month.get(), report_year.get(),
+                export_format.get().lower(), partitioned.get()
+            )
         )
         export_btn.pack(side="left", padx=5)
+
+        # Export format
+        export_format = tk.StringVar(value="CSV")
+        format_combo = ttk.Combobox(controls_frame, textvariable=export_format, values=["CSV", "Parquet", "Arrow"], width=8, state="readonly")
+        format_combo.pack(side="left", padx=5)
+
+        partitioned = tk.BooleanVar(value=False)
+        tk.Checkbutton(controls_frame, text="Partition by month", variable=partitioned, bg="#f5f5f5").pack(side="left", padx=5)
+
+        # Progress of background report work
+        cancel_btn = tk.Button(controls_frame, text="Cancel", bg="#e74c3c", fg="white", command=self.cancel_report)
+        cancel_btn.pack(side="right", padx=5)
+
+        self.report_progress = ttk.Progressbar(controls_frame, mode="indeterminate", length=120)
+        self.report_progress.pack(side="right", padx=5)
+
+        self.report_status = tk.Label(controls_frame, text="", bg="#f5f5f5", font=("Arial", 9), fg="#7f8c8d")
+        self.report_status.pack(side="right", padx=5)
         
         # Report content frame
         self.report_frame = tk.Frame(self.frames["reports"], bg="white")
@@ -698,137 +2868,110 @@ class ExpenseTrackerApp:
             font=("Arial", 16, "bold"), 
             bg="white"
         ).pack()
-        
+
+        # Query on the worker thread, then draw here
+        self.run_report_job(
+            lambda conn, job: report_data(conn, report_type, month, year),
+            lambda data: self.display_report(report_type, month, year, data),
+            "Loading report..."
+        )
+
+    def display_report(self, report_type, month, year, data):
         if report_type == "Monthly Summary":
-            self.generate_monthly_summary(month, year)
+            self.generate_monthly_summary(month, year, data)
         elif report_type == "Category Analysis":
-            self.generate_category_analysis(month, year)
+            self.generate_category_analysis(month, year, data)
         elif report_type == "Income vs Expenses":
-            self.generate_income_expense_comparison(month, year)
+            self.generate_income_expense_comparison(month, year, data)
         elif report_type == "Annual Overview":
-            self.generate_annual_overview(year)
-    
-    def generate_monthly_summary(self, month, year):
+            self.generate_annual_overview(year, data)
+
+    def run_report_job(self, work, on_done, message):
+        # Only one report or export runs at a time
+        self.executor.cancel(self.report_job)
+
+        def finish(callback):
+            def handler(payload):
+                self.report_job = None
+                self.report_progress.stop()
+                self.report_progress.config(mode="indeterminate", value=0)
+                self.report_status.config(text="")
+                callback(payload)
+            return handler
+
+        def show_error(e):
+            messagebox.showerror("Report Error", f"An error occurred: {str(e)}")
+
+        def show_progress(fraction, text):
+            if fraction is not None:
+                self.report_progress.stop()
+                self.report_progress.config(mode="determinate", value=fraction * 100)
+            if text:
+                self.report_status.config(text=text)
+
+        self.report_status.config(text=message)
+        self.report_progress.config(mode="indeterminate")
+        self.report_progress.start(10)
+        self.report_job = self.executor.submit(work, finish(on_done), finish(show_error), show_progress)
+
+    def cancel_report(self):
+        if self.report_job is None:
+            return
+        self.executor.cancel(self.report_job)
+        self.report_job = None
+        self.report_progress.stop()
+        self.report_progress.config(mode="indeterminate", value=0)
+        self.report_status.config(text="Cancelled")
+
+    def generate_monthly_summary(self, month, year, summary):
         # Create summary frame
         summary_frame = tk.Frame(self.report_frame, bg="white")
         summary_frame.pack(fill="both", expand=True, padx=10, pady=10)
-        
-        # Get month number
-        month_num = list(calendar.month_name).index(month)
-        start_date = f"{year}-{month_num:02d}-01"
-        end_date = f"{year}-{month_num:02d}-{calendar.monthrange(int(year), month_num)[1]}"
-        
-        # Get data
-        cursor = self.conn.cursor()
-        
-        # Total income
-        cursor.execute(
-            "SELECT SUM(amount) FROM transactions WHERE type = 'Income' AND date BETWEEN ? AND ?",
-            (start_date, end_date)
-        )
-        total_income = cursor.fetchone()[0] or 0
-        
-        # Total expenses
-        cursor.execute(
-            "SELECT SUM(amount) FROM transactions WHERE type = 'Expense' AND date BETWEEN ? AND ?",
-            (start_date, end_date)
-        )
-        total_expenses = cursor.fetchone()[0] or 0
-        
-        # Balance
-        balance = total_income - total_expenses
-        
+
+        # Totals
+        total_income = summary.income
+        total_expenses = summary.expenses
+        balance = summary.net
+
         # Create summary labels
         tk.Label(summary_frame, text=f"Total Income: ${total_income:.2f}", font=("Arial", 12), bg="white").pack(anchor="w", pady=5)
         tk.Label(summary_frame, text=f"Total Expenses: ${total_expenses:.2f}", font=("Arial", 12), bg="white").pack(anchor="w", pady=5)
         tk.Label(summary_frame, text=f"Net Balance: ${balance:.2f}", font=("Arial", 12, "bold"), bg="white").pack(anchor="w", pady=5)
         
         # Get category breakdown
-        cursor.execute(
-            """
-            SELECT category, SUM(amount) as total
-            FROM transactions
-            WHERE type = 'Expense' AND date BETWEEN ? AND ?
-            GROUP BY category
-            ORDER BY total DESC
-            """,
-            (start_date, end_date)
-        )
-        categories = cursor.fetchall()
-        
+        categories = summary.category_totals("Expense")
+
         # Create charts frame
         charts_frame = tk.Frame(summary_frame, bg="white")
         charts_frame.pack(fill="both", expand=True, pady=10)
         
         # Create pie chart
         if categories:
-            fig, ax = plt.subplots(figsize=(6, 4))
-            
-            labels = [category[0] for category in categories]
-            sizes = [category[1] for category in categories]
+            fig = new_figure(figsize=(6, 4))
+            plot_category_pie(fig.subplots(), categories, 'Expense Categories')
             
-            ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90)
-            ax.axis('equal')
-            ax.set_title('Expense Categories')
-            
-            pie_canvas = FigureCanvasTkAgg(fig, master=charts_frame)
+            pie_canvas = embed_figure(fig, charts_frame)
             pie_canvas.draw()
             pie_canvas.get_tk_widget().pack(side="left", fill="both", expand=True)
         
         # Daily spending
-        cursor.execute(
-            """
-            SELECT strftime('%d', date) as day, SUM(amount) as total
-            FROM transactions
-            WHERE type = 'Expense' AND date BETWEEN ? AND ?
-            GROUP BY day
-            ORDER BY day
-            """,
-            (start_date, end_date)
-        )
-        daily_spending = cursor.fetchall()
-        
+        daily_spending = summary.daily_totals("Expense")
+
         if daily_spending:
-            fig2, ax2 = plt.subplots(figsize=(6, 4))
-            
-            days = [int(day[0]) for day in daily_spending]
-            amounts = [day[1] for day in daily_spending]
-            
-            ax2.bar(days, amounts, color='#3498db')
-            ax2.set_xlabel('Day of Month')
-            ax2.set_ylabel('Amount ($)')
-            ax2.set_title('Daily Spending')
-            
-            # Set x-axis ticks
-            ax2.set_xticks(range(1, 32, 5))
+            fig2 = new_figure(figsize=(6, 4))
+            plot_daily_spending(fig2.subplots(), daily_spending)
             
-            bar_canvas = FigureCanvasTkAgg(fig2, master=charts_frame)
+            bar_canvas = embed_figure(fig2, charts_frame)
             bar_canvas.draw()
             bar_canvas.get_tk_widget().pack(side="left", fill="both", expand=True)
     
-    def generate_category_analysis(self, month, year):
+    def generate_category_analysis(self, month, year, summary):
         # Create analysis frame
         analysis_frame = tk.Frame(self.report_frame, bg="white")
         analysis_frame.pack(fill="both", expand=True, padx=10, pady=10)
-        
-        # Get month number
-        month_num = list(calendar.month_name).index(month)
-        start_date = f"{year}-{month_num:02d}-01"
-        end_date = f"{year}-{month_num:02d}-{calendar.monthrange(int(year), month_num)[1]}"
-        
+
         # Get category data
-        cursor = self.conn.cursor()
-        cursor.execute(
-            """
-            SELECT category, SUM(amount) as total
-            FROM transactions
-            WHERE type = 'Expense' AND date BETWEEN ? AND ?
-            GROUP BY category
-            ORDER BY total DESC
-            """,
-            (start_date, end_date)
-        )
-        categories = cursor.fetchall()
+        categories = summary.category_totals("Expense")
         
         if not categories:
             tk.Label(analysis_frame, text="No expense data available for this period", font=("Arial", 12), bg="white").pack(pady=20)
@@ -867,72 +3010,19 @@ class ExpenseTrackerApp:
         chart_frame.pack(fill="both", expand=True, pady=10)
         
         # Create horizontal bar chart
-        fig, ax = plt.subplots(figsize=(8, 6))
-        
-        category_names = [category[0] for category in categories]
-        category_amounts = [category[1] for category in categories]
-        
-        # Sort for better visualization
-        y_pos = range(len(category_names))
-        
-        ax.barh(y_pos, category_amounts, align='center', color='#3498db')
-        ax.set_yticks(y_pos)
-        ax.set_yticklabels(category_names)
-        ax.invert_yaxis()  # Labels read top-to-bottom
-        ax.set_xlabel('Amount ($)')
-        ax.set_title('Expenses by Category')
+        fig = new_figure(figsize=(8, 6))
+        plot_category_bars(fig.subplots(), categories)
+        fig.tight_layout()
         
-        # Add amount labels
-        for i, v in enumerate(category_amounts):
-            ax.text(v + 0.1, i, f'${v:.2f}', va='center')
-        
-        plt.tight_layout()
-        
-        bar_canvas = FigureCanvasTkAgg(fig, master=chart_frame)
+        bar_canvas = embed_figure(fig, chart_frame)
         bar_canvas.draw()
         bar_canvas.get_tk_widget().pack(fill="both", expand=True)
     
-    def generate_income_expense_comparison(self, month, year):
+    def generate_income_expense_comparison(self, month, year, months_data):
         # Create comparison frame
         comparison_frame = tk.Frame(self.report_frame, bg="white")
         comparison_frame.pack(fill="both", expand=True, padx=10, pady=10)
-        
-        # Get month number
-        month_num = list(calendar.month_name).index(month)
-        
-        # Get data for the last 6 months
-        months_data = []
-        
-        for i in range(5, -1, -1):
-            # Calculate month and year
-            target_month = month_num - i
-            target_year = int(year)
-            
-            if target_month <= 0:
-                target_month += 12
-                target_year -= 1
-            
-            month_name = calendar.month_name[target_month]
-            start_date = f"{target_year}-{target_month:02d}-01"
-            end_date = f"{target_year}-{target_month:02d}-{calendar.monthrange(target_year, target_month)[1]}"
-            
-            # Get income
-            cursor = self.conn.cursor()
-            cursor.execute(
-                "SELECT SUM(amount) FROM transactions WHERE type = 'Income' AND date BETWEEN ? AND ?",
-                (start_date, end_date)
-            )
-            income = cursor.fetchone()[0] or 0
-            
-            # Get expenses
-            cursor.execute(
-                "SELECT SUM(amount) FROM transactions WHERE type = 'Expense' AND date BETWEEN ? AND ?",
-                (start_date, end_date)
-            )
-            expenses = cursor.fetchone()[0] or 0
-            
-            months_data.append((month_name, income, expenses, income - expenses))
-        
+
         # Create table
         table_frame = tk.Frame(comparison_frame, bg="white")
         table_frame.pack(fill="x", pady=10)
@@ -960,65 +3050,25 @@ class ExpenseTrackerApp:
         chart_frame = tk.Frame(comparison_frame, bg="white")
         chart_frame.pack(fill="both", expand=True, pady=10)
         
-        fig, ax = plt.subplots(figsize=(10, 6))
+        fig = new_figure(figsize=(10, 6))
+        plot_income_expenses(fig.subplots(), months_data, 'Income vs Expenses')
+        fig.tight_layout()
         
-        months = [data[0] for data in months_data]
-        incomes = [data[1] for data in months_data]
-        expenses = [data[2] for data in months_data]
-        nets = [data[3] for data in months_data]
-        
-        # Create bars
-        x = np.arange(len(months))
-        width = 0.35
-        
-        income_bars = ax.bar(x - width/2, incomes, width, label='Income', color='#2ecc71')
-        expense_bars = ax.bar(x + width/2, expenses, width, label='Expenses', color='#e74c3c')
-        
-        # Add net line
-        ax.plot(x, nets, 'o-', label='Net', color='#3498db', linewidth=2)
-        
-        # Add zero line
-        ax.axhline(y=0, color='gray', linestyle='-', alpha=0.3)
-        
-        # Add labels and legend
-        ax.set_xlabel('Month')
-        ax.set_ylabel('Amount ($)')
-        ax.set_title('Income vs Expenses')
-        ax.set_xticks(x)
-        ax.set_xticklabels(months)
-        ax.legend()
-        
-        plt.tight_layout()
-        
-        canvas = FigureCanvasTkAgg(fig, master=chart_frame)
+        canvas = embed_figure(fig, chart_frame)
         canvas.draw()
         canvas.get_tk_widget().pack(fill="both", expand=True)
     
-    def generate_annual_overview(self, year):
+    def generate_annual_overview(self, year, summary):
         # Create overview frame
         overview_frame = tk.Frame(self.report_frame, bg="white")
         overview_frame.pack(fill="both", expand=True, padx=10, pady=10)
-        
-        # Get yearly totals
-        cursor = self.conn.cursor()
-        
-        # Total income
-        cursor.execute(
-            "SELECT SUM(amount) FROM transactions WHERE type = 'Income' AND strftime('%Y', date) = ?",
-            (year,)
-        )
-        total_income = cursor.fetchone()[0] or 0
-        
-        # Total expenses
-        cursor.execute(
-            "SELECT SUM(amount) FROM transactions WHERE type = 'Expense' AND strftime('%Y', date) = ?",
-            (year,)
-        )
-        total_expenses = cursor.fetchone()[0] or 0
-        
-        # Net
-        net = total_income - total_expenses
-        
+
+        # Yearly totals, monthly breakdown and categories from one rollup read
+        months = [(int(year), month_num) for month_num in range(1, 13)]
+        total_income = summary.income
+        total_expenses = summary.expenses
+        net = summary.net
+
         # Create summary
         summary_frame = tk.Frame(overview_frame, bg="white")
         summary_frame.pack(fill="x", pady=10)
@@ -1028,359 +3078,230 @@ class ExpenseTrackerApp:
         tk.Label(summary_frame, text=f"Annual Net: ${net:.2f}", font=("Arial", 12, "bold"), bg="white").pack(anchor="w", pady=5)
         
         # Get monthly breakdown
-        monthly_data = []
-        
-        for month_num in range(1, 13):
-            month_name = calendar.month_name[month_num]
-            start_date = f"{year}-{month_num:02d}-01"
-            end_date = f"{year}-{month_num:02d}-{calendar.monthrange(int(year), month_num)[1]}"
-            
-            # Get income
-            cursor.execute(
-                "SELECT SUM(amount) FROM transactions WHERE type = 'Income' AND date BETWEEN ? AND ?",
-                (start_date, end_date)
-            )
-            income = cursor.fetchone()[0] or 0
-            
-            # Get expenses
-            cursor.execute(
-                "SELECT SUM(amount) FROM transactions WHERE type = 'Expense' AND date BETWEEN ? AND ?",
-                (start_date, end_date)
-            )
-            expenses = cursor.fetchone()[0] or 0
-            
-            monthly_data.append((month_name, income, expenses, income - expenses))
-        
+        monthly_data = summary.month_series(months)
+
         # Create chart
         charts_frame = tk.Frame(overview_frame, bg="white")
         charts_frame.pack(fill="both", expand=True, pady=10)
         
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 8))
+        fig = new_figure(figsize=(10, 8))
+        ax1, ax2 = fig.subplots(2, 1)
         
         # Monthly comparison chart
-        months = [data[0] for data in monthly_data]
-        incomes = [data[1] for data in monthly_data]
-        expenses = [data[2] for data in monthly_data]
-        nets = [data[3] for data in monthly_data]
-        
-        x = np.arange(len(months))
-        width = 0.35
-        
-        ax1.bar(x - width/2, incomes, width, label='Income', color='#2ecc71')
-        ax1.bar(x + width/2, expenses, width, label='Expenses', color='#e74c3c')
-        
-        ax1.set_xlabel('Month')
-        ax1.set_ylabel('Amount ($)')
-        ax1.set_title(f'Monthly Income vs Expenses - {year}')
-        ax1.set_xticks(x)
-        ax1.set_xticklabels(months, rotation=45)
-        ax1.legend()
+        plot_income_expenses(ax1, monthly_data, f'Monthly Income vs Expenses - {year}', show_net=False, rotation=45)
         
         # Get category breakdown for the year
-        cursor.execute(
-            """
-            SELECT category, SUM(amount) as total
-            FROM transactions
-            WHERE type = 'Expense' AND strftime('%Y', date) = ?
-            GROUP BY category
-            ORDER BY total DESC
-            """,
-            (year,)
-        )
-        categories = cursor.fetchall()
-        
+        categories = summary.category_totals("Expense")
+
         if categories:
-            category_names = [category[0] for category in categories]
-            category_amounts = [category[1] for category in categories]
-            
-            # Create pie chart
-            ax2.pie(category_amounts, labels=category_names, autopct='%1.1f%%', startangle=90)
-            ax2.axis('equal')
-            ax2.set_title(f'Expense Categories - {year}')
+            plot_category_pie(ax2, categories, f'Expense Categories - {year}')
         
-        plt.tight_layout()
+        fig.tight_layout()
         
-        canvas = FigureCanvasTkAgg(fig, master=charts_frame)
+        canvas = embed_figure(fig, charts_frame)
         canvas.draw()
         canvas.get_tk_widget().pack(fill="both", expand=True)
     
-    def export_report(self, report_type, month, year):
-        try:
-            # Get month number
-            month_num = list(calendar.month_name).index(month)
-            
-            if report_type == "Monthly Summary" or report_type == "Category Analysis":
-                # Export monthly transactions
-                start_date = f"{year}-{month_num:02d}-01"
-                end_date = f"{year}-{month_num:02d}-{calendar.monthrange(int(year), month_num)[1]}"
-                
-                cursor = self.conn.cursor()
-                cursor.execute(
-                    "SELECT date, amount, type, category, payment_method, description FROM transactions WHERE date BETWEEN ? AND ? ORDER BY date",
-                    (start_date, end_date)
-                )
-                transactions = cursor.fetchall()
-                
-                # Create DataFrame
-                df = pd.DataFrame(transactions, columns=["Date", "Amount", "Type", "Category", "Payment Method", "Description"])
-                
-                # Save to CSV
-                filename = f"expense_report_{month}_{year}.csv"
-                df.to_csv(filename, index=False)
-                
-                messagebox.showinfo("Export Successful", f"Report has been saved as {filename}")
-                
-            elif report_type == "Annual Overview":
-                # Export annual transactions
-                cursor = self.conn.cursor()
-                cursor.execute(
-                    "SELECT date, amount, type, category, payment_method, description FROM transactions WHERE strftime('%Y', date) = ? ORDER BY date",
-                    (year,)
-                )
-                transactions = cursor.fetchall()
-                
-                # Create DataFrame
-                df = pd.DataFrame(transactions, columns=["Date", "Amount", "Type", "Category", "Payment Method", "Description"])
-                
-                # Save to CSV
-                filename = f"annual_expense_report_{year}.csv"
-                df.to_csv(filename, index=False)
-                
-                messagebox.showinfo("Export Successful", f"Report has been saved as {filename}")
-                
-            elif report_type == "Income vs Expenses":
-                # Export monthly summaries
-                monthly_data = []
-                
-                for m in range(1, 13):
-                    m_name = calendar.month_name[m]
-                    start_date = f"{year}-{m:02d}-01"
-                    end_date = f"{year}-{m:02d}-{calendar.monthrange(int(year), m)[1]}"
-                    
-                    # Get income
-                    cursor = self.conn.cursor()
-                    cursor.execute(
-                        "SELECT SUM(amount) FROM transactions WHERE type = 'Income' AND date BETWEEN ? AND ?",
-                        (start_date, end_date)
-                    )
-                    income = cursor.fetchone()[0] or 0
-                    
-                    # Get expenses
-                    cursor.execute(
-                        "SELECT SUM(amount) FROM transactions WHERE type = 'Expense' AND date BETWEEN ? AND ?",
-                        (start_date, end_date)
-                    )
-                    expenses = cursor.fetchone()[0] or 0
-                    
-                    monthly_data.append((m_name, income, expenses, income - expenses))
-                
-                # Create DataFrame
-                df = pd.DataFrame(monthly_data, columns=["Month", "Income", "Expenses", "Net"])
-                
-                # Save to CSV
-                filename = f"income_vs_expenses_{year}.csv"
+    def export_report(self, report_type, month, year, fmt="csv", partitioned=False):
+        self.run_report_job(
+            lambda conn, job: self.write_export(conn, job, report_type, month, year, fmt, partitioned),
+            lambda filename: messagebox.showinfo("Export Successful", f"Report has been saved as {filename}"),
+            "Exporting..."
+        )
+
+    @staticmethod
+    def write_export(conn, job, report_type, month, year, fmt="csv", partitioned=False):
+        # Runs on the worker thread; returns the name of the file or directory written
+        # Get month number
+        month_num = list(calendar.month_name).index(month)
+        extension = "" if partitioned else TransactionExporter.FORMATS[fmt]
+
+        if report_type == "Income vs Expenses":
+            # Export monthly summaries, only twelve rows
+            months = [(int(year), m) for m in range(1, 13)]
+            monthly_data = TransactionAggregator(conn).rollup(months).month_series(months)
+
+            # Create DataFrame
+            import pandas as pd
+            df = pd.DataFrame(monthly_data, columns=["Month", "Income", "Expenses", "Net"])
+            filename = f"income_vs_expenses_{year}{TransactionExporter.FORMATS[fmt]}"
+            if fmt == "parquet":
+                df.to_parquet(filename, index=False)
+            elif fmt == "arrow":
+                df.to_feather(filename)
+            else:
                 df.to_csv(filename, index=False)
-                
-                messagebox.showinfo("Export Successful", f"Report has been saved as {filename}")
-        
-        except Exception as e:
-            messagebox.showerror("Export Error", f"An error occurred: {str(e)}")
-    
+            return filename
+
+        if report_type == "Annual Overview":
+            # Export annual transactions
+            start_date, end_date = f"{year}-01-01", f"{year}-12-31"
+            filename = f"annual_expense_report_{year}{extension}"
+        else:
+            # Export monthly transactions
+            start_date, end_date = month_bounds(year, month_num)
+            filename = f"expense_report_{month}_{year}{extension}"
+
+        def progress(stats):
+            job.report(stats["rows"] / stats["total"] if stats["total"] else None, f"{stats['rows']:,} rows written")
+
+        TransactionExporter(conn).export(start_date, end_date, filename, fmt, partitioned, progress)
+        return filename
+
     def load_summary(self):
         # Get current month and year
         current_month = datetime.datetime.now().month
         current_year = datetime.datetime.now().year
-        
-        start_date = f"{current_year}-{current_month:02d}-01"
-        end_date = f"{current_year}-{current_month:02d}-{calendar.monthrange(current_year, current_month)[1]}"
-        
-        # Get totals
-        cursor = self.conn.cursor()
-        
-        # Income
-        cursor.execute(
-            "SELECT SUM(amount) FROM transactions WHERE type = 'Income' AND date BETWEEN ? AND ?",
-            (start_date, end_date)
-        )
-        income = cursor.fetchone()[0] or 0
-        
-        # Expenses
-        cursor.execute(
-            "SELECT SUM(amount) FROM transactions WHERE type = 'Expense' AND date BETWEEN ? AND ?",
-            (start_date, end_date)
-        )
-        expenses = cursor.fetchone()[0] or 0
-        
-        # Balance
-        balance = income - expenses
-        
+
+        start_date, end_date = month_bounds(current_year, current_month)
+
+        # Six-month trend and the current month's totals come from the rollup
+        trend_months = previous_months(current_year, current_month, 6)
+        trend_summary = self.ledger.rollup(trend_months)
+        summary = trend_summary.month(current_year, current_month)
+
         # Update summary cards
-        self.income_amount.config(text=f"${income:.2f}")
-        self.expense_amount.config(text=f"${expenses:.2f}")
-        self.balance_amount.config(text=f"${balance:.2f}")
-        
+        self.income_amount.config(text=f"${summary.income:.2f}")
+        self.expense_amount.config(text=f"${summary.expenses:.2f}")
+        self.balance_amount.config(text=f"${summary.net:.2f}")
+
         # Create category chart
-        self.create_category_chart(start_date, end_date)
-        
-        # Create daily spending chart
-        self.create_daily_chart(start_date, end_date)
-        
+        self.create_category_chart(summary)
+
+        # Create daily spending chart (day-level, from the date index)
+        self.create_daily_chart(self.ledger.summarize(start_date, end_date))
+
         # Create trends chart
-        self.create_trends_chart()
-    
-    def create_category_chart(self, start_date, end_date):
-        # Clear previous chart
-        for widget in self.category_chart_canvas.winfo_children():
-            widget.destroy()
-        
+        self.create_trends_chart(trend_summary.month_series(trend_months))
+
+    def create_category_chart(self, summary):
+        import numpy as np
+
+        if self.category_chart is None:
+            self.category_chart = ChartPanel(self.category_chart_canvas, (5, 4))
+        chart = self.category_chart
+
         # Get category data
-        cursor = self.conn.cursor()
-        cursor.execute(
-            """
-            SELECT category, SUM(amount) as total
-            FROM transactions
-            WHERE type = 'Expense' AND date BETWEEN ? AND ?
-            GROUP BY category
-            ORDER BY total DESC
-            """,
-            (start_date, end_date)
-        )
-        categories = cursor.fetchall()
-        
+        categories = summary.category_totals("Expense")
+
         if not categories:
             # No data
-            tk.Label(self.category_chart_canvas, text="No data available", font=("Arial", 12), bg="white").pack(pady=50)
+            chart.show_empty()
             return
-        
-        # Create figure
-        fig, ax = plt.subplots(figsize=(5, 4))
-        
+        chart.show_chart()
+
         labels = [category[0] for category in categories]
         sizes = [category[1] for category in categories]
-        
-        # Create pie chart
-        ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90)
-        ax.axis('equal')
-        
-        # Embed in tkinter
-        canvas = FigureCanvasTkAgg(fig, master=self.category_chart_canvas)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
-    
-    def create_daily_chart(self, start_date, end_date):
-        # Clear previous chart
-        for widget in self.date_chart_canvas.winfo_children():
-            widget.destroy()
-        
+        total = sum(sizes)
+
+        if chart.labels == labels:
+            # Same categories: move the existing wedges and labels
+            theta1 = 90
+            wedges, texts, autotexts = chart.artists["wedges"], chart.artists["texts"], chart.artists["autotexts"]
+            for wedge, text, autotext, size in zip(wedges, texts, autotexts, sizes):
+                theta2 = theta1 + 360 * size / total
+                wedge.set_theta1(theta1)
+                wedge.set_theta2(theta2)
+
+                middle = np.deg2rad((theta1 + theta2) / 2)
+                x, y = np.cos(middle), np.sin(middle)
+                text.set_position((1.1 * x, 1.1 * y))
+                text.set_horizontalalignment("left" if x > 0 else "right")
+                autotext.set_position((0.6 * x, 0.6 * y))
+                autotext.set_text(f"{size / total * 100:.1f}%")
+                theta1 = theta2
+            chart.refresh()
+            return
+
+        # Different categories: rebuild the pie on the existing figure
+        chart.ax.clear()
+        wedges, texts, autotexts = chart.ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90)
+        chart.ax.axis('equal')
+        for artist in wedges + texts + autotexts:
+            artist.set_animated(True)
+        chart.artists = {"wedges": wedges, "texts": texts, "autotexts": autotexts}
+        chart.labels = labels
+        chart.refresh(full=True)
+
+    def create_daily_chart(self, summary):
+        if self.daily_chart is None:
+            self.daily_chart = ChartPanel(self.date_chart_canvas, (5, 4))
+            ax = self.daily_chart.ax
+
+            # One bar per possible day, updated in place on refresh
+            bars = ax.bar(range(1, 32), [0] * 31, color='#3498db', animated=True)
+            ax.set_xlabel('Day of Month')
+            ax.set_ylabel('Amount ($)')
+
+            # Set x-axis ticks
+            ax.set_xticks(range(1, 32, 5))
+            self.daily_chart.artists["bars"] = list(bars)
+        chart = self.daily_chart
+
         # Get daily data
-        cursor = self.conn.cursor()
-        cursor.execute(
-            """
-            SELECT strftime('%d', date) as day, SUM(amount) as total
-            FROM transactions
-            WHERE type = 'Expense' AND date BETWEEN ? AND ?
-            GROUP BY day
-            ORDER BY day
-            """,
-            (start_date, end_date)
-        )
-        daily_spending = cursor.fetchall()
-        
+        daily_spending = summary.daily_totals("Expense")
+
         if not daily_spending:
             # No data
-            tk.Label(self.date_chart_canvas, text="No data available", font=("Arial", 12), bg="white").pack(pady=50)
+            chart.show_empty()
             return
-        
-        # Create figure
-        fig, ax = plt.subplots(figsize=(5, 4))
-        
-        days = [int(day[0]) for day in daily_spending]
-        amounts = [day[1] for day in daily_spending]
-        
-        # Create bar chart
-        ax.bar(days, amounts, color='#3498db')
-        ax.set_xlabel('Day of Month')
-        ax.set_ylabel('Amount ($)')
-        
-        # Set x-axis ticks
-        ax.set_xticks(range(1, 32, 5))
-        
-        # Embed in tkinter
-        canvas = FigureCanvasTkAgg(fig, master=self.date_chart_canvas)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
-    
-    def create_trends_chart(self):
-        # Clear previous chart
-        for widget in self.trends_chart_canvas.winfo_children():
-            widget.destroy()
-        
-        # Get data for the last 6 months
-        current_date = datetime.datetime.now()
-        months_data = []
-        
-        for i in range(5, -1, -1):
-            # Calculate month and year
-            target_date = current_date - datetime.timedelta(days=30 * i)
-            target_month = target_date.month
-            target_year = target_date.year
-            
-            month_name = calendar.month_name[target_month]
-            start_date = f"{target_year}-{target_month:02d}-01"
-            end_date = f"{target_year}-{target_month:02d}-{calendar.monthrange(target_year, target_month)[1]}"
-            
-            # Get income
-            cursor = self.conn.cursor()
-            cursor.execute(
-                "SELECT SUM(amount) FROM transactions WHERE type = 'Income' AND date BETWEEN ? AND ?",
-                (start_date, end_date)
-            )
-            income = cursor.fetchone()[0] or 0
-            
-            # Get expenses
-            cursor.execute(
-                "SELECT SUM(amount) FROM transactions WHERE type = 'Expense' AND date BETWEEN ? AND ?",
-                (start_date, end_date)
-            )
-            expenses = cursor.fetchone()[0] or 0
-            
-            months_data.append((month_name, income, expenses, income - expenses))
-        
+        chart.show_chart()
+
+        amounts = [0] * 31
+        for day, amount in daily_spending:
+            amounts[int(day[8:10]) - 1] = amount
+
+        for bar, amount in zip(chart.artists["bars"], amounts):
+            bar.set_height(amount)
+        chart.refresh(full=chart.fit_ylim(amounts))
+
+    def create_trends_chart(self, months_data):
+        if self.trends_chart is None:
+            self.trends_chart = ChartPanel(self.trends_chart_canvas, (8, 5))
+            ax = self.trends_chart.ax
+            x = range(len(months_data))
+
+            # Create line chart
+            self.trends_chart.artists = {
+                "income": ax.plot(x, [0] * len(x), 'o-', label='Income', color='#2ecc71', linewidth=2, animated=True)[0],
+                "expenses": ax.plot(x, [0] * len(x), 'o-', label='Expenses', color='#e74c3c', linewidth=2, animated=True)[0],
+                "net": ax.plot(x, [0] * len(x), 'o-', label='Net', color='#3498db', linewidth=2, animated=True)[0],
+            }
+
+            # Add zero line
+            ax.axhline(y=0, color='gray', linestyle='-', alpha=0.3)
+
+            # Add labels and legend
+            ax.set_xlabel('Month')
+            ax.set_ylabel('Amount ($)')
+            ax.set_title('6-Month Financial Trend')
+            ax.set_xticks(x)
+            ax.legend()
+            self.trends_chart.figure.tight_layout()
+        chart = self.trends_chart
+
         if all(data[1] == 0 and data[2] == 0 for data in months_data):
             # No data
-            tk.Label(self.trends_chart_canvas, text="No data available", font=("Arial", 12), bg="white").pack(pady=50)
+            chart.show_empty()
             return
-        
-        # Create figure
-        fig, ax = plt.subplots(figsize=(8, 5))
-        
+        chart.show_chart()
+
         months = [data[0] for data in months_data]
         incomes = [data[1] for data in months_data]
         expenses = [data[2] for data in months_data]
         nets = [data[3] for data in months_data]
-        
-        # Create line chart
-        ax.plot(months, incomes, 'o-', label='Income', color='#2ecc71', linewidth=2)
-        ax.plot(months, expenses, 'o-', label='Expenses', color='#e74c3c', linewidth=2)
-        ax.plot(months, nets, 'o-', label='Net', color='#3498db', linewidth=2)
-        
-        # Add zero line
-        ax.axhline(y=0, color='gray', linestyle='-', alpha=0.3)
-        
-        # Add labels and legend
-        ax.set_xlabel('Month')
-        ax.set_ylabel('Amount ($)')
-        ax.set_title('6-Month Financial Trend')
-        ax.legend()
-        
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        
-        # Embed in tkinter
-        canvas = FigureCanvasTkAgg(fig, master=self.trends_chart_canvas)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
-    
+
+        chart.artists["income"].set_ydata(incomes)
+        chart.artists["expenses"].set_ydata(expenses)
+        chart.artists["net"].set_ydata(nets)
+
+        # Month labels only change when the calendar rolls over
+        full = chart.fit_ylim(incomes + expenses + nets)
+        if [label.get_text() for label in chart.ax.get_xticklabels()] != months:
+            chart.ax.set_xticklabels(months, rotation=45)
+            full = True
+        chart.refresh(full=full)
+
     def add_transaction(self):
         # Validate inputs
         try:
@@ -1407,20 +3328,30 @@ class ExpenseTrackerApp:
             messagebox.showerror("Invalid Input", "Please select a payment method")
             return
         
-        # Add to database
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "INSERT INTO transactions (date, amount, type, category, payment_method, description) VALUES (?, ?, ?, ?, ?, ?)",
-            (date, amount, transaction_type, category, payment_method, description)
-        )
-        self.conn.commit()
+        # Add to database, or as a rule whose due occurrences are inserted now
+        repeat = self.repeat_var.get()
+        if repeat != "Never":
+            until = self.repeat_until_var.get().strip()
+            try:
+                if until:
+                    until = datetime.date.fromisoformat(until).isoformat()
+                self.ledger.add_recurring_rule(
+                    date, repeat.lower(), amount, transaction_type, category,
+                    payment_method, description, end_date=until or None
+                )
+            except ValueError as e:
+                messagebox.showerror("Invalid Input", f"Until date: {str(e)}")
+                return
+            self.ledger.materialize_recurring()
+        else:
+            self.ledger.add_transaction(date, amount, transaction_type, category, payment_method, description)
         
         # Clear form
         self.clear_form()
         
-        # Refresh data
+        # Refresh data; the rollup triggers already updated the dashboard totals,
+        # which are read again when the dashboard is shown
         self.load_transactions()
-        self.load_summary()
         
         messagebox.showinfo("Success", "Transaction added successfully!")
     
@@ -1445,23 +3376,16 @@ class ExpenseTrackerApp:
         description = self.description_var.get()
         
         # Update database
-        cursor = self.conn.cursor()
-        cursor.execute(
-            """
-            UPDATE transactions 
-            SET date = ?, amount = ?, type = ?, category = ?, payment_method = ?, description = ? 
-            WHERE id = ?
-            """,
-            (date, amount, transaction_type, category, payment_method, description, self.transaction_id)
+        self.ledger.update_transaction(
+            self.transaction_id, date, amount, transaction_type, category, payment_method, description
         )
-        self.conn.commit()
         
         # Clear form
         self.cancel_edit()
         
-        # Refresh data
+        # Refresh data; the rollup triggers already updated the dashboard totals,
+        # which are read again when the dashboard is shown
         self.load_transactions()
-        self.load_summary()
         
         messagebox.showinfo("Success", "Transaction updated successfully!")
     
@@ -1478,17 +3402,15 @@ class ExpenseTrackerApp:
         transaction_id = self.transaction_tree.item(selected_item, "values")[0]
         
         # Delete from database
-        cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM transactions WHERE id = ?", (transaction_id,))
-        self.conn.commit()
+        self.ledger.delete_transaction(transaction_id)
         
         # Clear form if editing
         if self.transaction_id == transaction_id:
             self.cancel_edit()
         
-        # Refresh data
+        # Refresh data; the rollup triggers already updated the dashboard totals,
+        # which are read again when the dashboard is shown
         self.load_transactions()
-        self.load_summary()
         
         messagebox.showinfo("Success", "Transaction deleted successfully!")
     
@@ -1511,10 +3433,12 @@ class ExpenseTrackerApp:
         self.selected_payment.set(values[5])
         self.description_var.set(values[6])
         
-        # Update buttons
+        # Update buttons; an edit changes one transaction, never a rule
         self.add_button.config(state="disabled")
         self.update_button.config(state="normal")
         self.cancel_button.config(state="normal")
+        self.repeat_var.set("Never")
+        self.repeat_combo.config(state="disabled")
     
     def cancel_edit(self):
         # Clear form
@@ -1523,6 +3447,7 @@ class ExpenseTrackerApp:
         # Reset buttons
         self.add_button.config(state="normal")
         self.update_button.config(state="disabled")
+        self.repeat_combo.config(state="readonly")
         self.cancel_button.config(state="disabled")
         
         # Clear selection
@@ -1537,6 +3462,8 @@ class ExpenseTrackerApp:
         self.update_categories()
         self.selected_payment.set("")
         self.description_var.set("")
+        self.repeat_var.set("Never")
+        self.repeat_until_var.set("")
     
     def select_transaction(self, event):
         selected_item = self.transaction_tree.selection()
@@ -1548,10 +3475,6 @@ class ExpenseTrackerApp:
             self.edit_transaction()
     
     def load_transactions(self):
-        # Clear existing data
-        for item in self.transaction_tree.get_children():
-            self.transaction_tree.delete(item)
-        
         # Get filter values
         month = self.filter_month.get()
         year = self.filter_year.get()
@@ -1560,31 +3483,168 @@ class ExpenseTrackerApp:
         month_num = list(calendar.month_name).index(month)
         
         # Date range
-        start_date = f"{year}-{month_num:02d}-01"
-        end_date = f"{year}-{month_num:02d}-{calendar.monthrange(int(year), month_num)[1]}"
-        
-        # Get transactions
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "SELECT id, date, amount, type, category, payment_method, description FROM transactions WHERE date BETWEEN ? AND ? ORDER BY date DESC",
-            (start_date, end_date)
+        start_date, end_date = month_bounds(year, month_num)
+
+        # Page through the month newest first
+        self.show_pager(self.ledger.month_pager(start_date, end_date))
+
+    def show_pager(self, pager):
+        self.pager = pager
+        rows = pager.first_page()
+        self.window_at_start = True
+        self.window_at_end = len(rows) < pager.page_size
+        self.set_window_rows(rows)
+        self.transaction_tree.yview_moveto(0)
+
+    def set_window_rows(self, rows):
+        self.window_rows = rows
+
+        # Replace the widget contents in one call instead of deleting row by row
+        self.transaction_tree.delete(*self.transaction_tree.get_children())
+        for row in rows:
+            self.transaction_tree.insert("", "end", values=row[:7])
+
+    def on_transaction_scroll(self, first, last):
+        self.transaction_scrollbar.set(first, last)
+
+        # Fetch more rows once the view nears either edge of the window
+        near_end = float(last) > 0.9 and not self.window_at_end
+        near_start = float(first) < 0.1 and not self.window_at_start
+        if (near_end or near_start) and self.paging_job is None:
+            self.paging_job = self.root.after_idle(self.shift_window, float(first), near_end)
+
+    def shift_window(self, first, forward):
+        self.paging_job = None
+        if not self.window_rows:
+            return
+
+        # Index of the row at the top of the view, to keep it in place
+        top_index = int(round(first * len(self.window_rows)))
+
+        if forward:
+            page = self.pager.page_after(self.window_rows[-1])
+            self.window_at_end = len(page) < self.pager.page_size
+            rows = self.window_rows + page
+            trimmed = max(0, len(rows) - self.max_window_rows)
+            rows = rows[trimmed:]
+            if trimmed:
+                self.window_at_start = False
+            top_index -= trimmed
+        else:
+            page = self.pager.page_before(self.window_rows[0])
+            self.window_at_start = len(page) < self.pager.page_size
+            rows = page + self.window_rows
+            if len(rows) > self.max_window_rows:
+                rows = rows[:self.max_window_rows]
+                self.window_at_end = False
+            top_index += len(page)
+
+        if not page:
+            return
+
+        self.set_window_rows(rows)
+        self.transaction_tree.yview_moveto(max(top_index, 0) / len(rows))
+
+    def run_scheduler(self):
+        stats = self.ledger.materialize_recurring()
+
+        # The rollup triggers updated the totals; redraw the visible panel
+        if stats["inserted"] and self.current_frame in ("transactions", "dashboard", "budget", "insights"):
+            self.show_frame(self.current_frame)
+
+        self.root.after(self.scheduler_interval, self.run_scheduler)
+
+    def manage_recurring(self):
+        window = tk.Toplevel(self.root)
+        window.title("Recurring Transactions")
+        window.geometry("800x300")
+
+        columns = ("id", "repeat", "next", "until", "amount", "type", "category", "description")
+        tree = ttk.Treeview(window, columns=columns, show="headings", selectmode="browse")
+        for column, heading, width in zip(
+            columns,
+            ["ID", "Repeat", "Next", "Until", "Amount", "Type", "Category", "Description"],
+            [40, 80, 90, 90, 80, 70, 100, 200]
+        ):
+            tree.heading(column, text=heading)
+            tree.column(column, width=width)
+        tree.pack(fill="both", expand=True, padx=10, pady=10)
+
+        def load():
+            tree.delete(*tree.get_children())
+            for rule_id, frequency, interval, start_date, end_date, next_date, amount, transaction_type, category, payment_method, description in self.ledger.recurring_rules():
+                unit = {"daily": "days", "weekly": "weeks", "monthly": "months"}[frequency]
+                repeat = frequency.capitalize() if interval == 1 else f"Every {interval} {unit}"
+                tree.insert("", "end", values=(
+                    rule_id, repeat, next_date or "Ended", end_date or "", f"${amount:.2f}", transaction_type, category, description
+                ))
+
+        def delete():
+            selected_item = tree.selection()
+            if not selected_item:
+                return
+            if messagebox.askyesno("Confirm Delete", "Stop this recurring transaction? Existing transactions are kept.", parent=window):
+                self.ledger.delete_recurring_rule(tree.item(selected_item, "values")[0])
+                load()
+
+        tk.Button(window, text="Delete Rule", bg="#e74c3c", fg="white", command=delete).pack(side="right", padx=10, pady=(0, 10))
+        load()
+
+    def import_statements(self):
+        paths = filedialog.askopenfilenames(
+            title="Import bank statements",
+            filetypes=[("Bank statements", "*.csv *.ofx *.qfx"), ("All files", "*.*")]
         )
-        transactions = cursor.fetchall()
-        
-        # Add to treeview
-        for transaction in transactions:
-            self.transaction_tree.insert("", "end", values=transaction)
-    
+        if not paths:
+            return
+
+        totals = {"read": 0, "inserted": 0, "duplicates": 0, "invalid": 0, "seconds": 0.0}
+
+        try:
+            for path in paths:
+                try:
+                    stats = self.ledger.import_file(path)
+                except AmbiguousDatesError as e:
+                    date_format = simpledialog.askstring(
+                        "Date Format",
+                        f"{os.path.basename(path)}: {e}.\n\nEnter the format of its dates:",
+                        initialvalue=e.formats[0]
+                    )
+                    if not date_format:
+                        continue
+                    stats = self.ledger.import_file(path, date_format=date_format)
+                for key in totals:
+                    totals[key] += stats[key]
+        except (OSError, sqlite3.Error) as e:
+            messagebox.showerror("Import Error", f"An error occurred: {str(e)}")
+            return
+
+        self.load_transactions()
+
+        rate = totals["read"] / totals["seconds"] if totals["seconds"] else 0
+        messagebox.showinfo(
+            "Import Complete",
+            f"Imported {totals['inserted']} transactions\n"
+            f"Skipped {totals['duplicates']} duplicates and {totals['invalid']} invalid rows\n"
+            f"{rate:,.0f} rows/second"
+        )
+
+    def schedule_search(self, event=None):
+        if not self.live_search.get():
+            return
+
+        # Debounce keystrokes so typing quickly runs a single query
+        if self.search_job is not None:
+            self.root.after_cancel(self.search_job)
+        self.search_job = self.root.after(200, self.search_transactions)
+
     def search_transactions(self):
-        search_term = self.search_var.get().lower()
+        self.search_job = None
+        search_term = self.search_var.get().strip()
         if not search_term:
             self.load_transactions()
             return
         
-        # Clear existing data
-        for item in self.transaction_tree.get_children():
-            self.transaction_tree.delete(item)
-        
         # Get filter values
         month = self.filter_month.get()
         year = self.filter_year.get()
@@ -1593,27 +3653,110 @@ class ExpenseTrackerApp:
         month_num = list(calendar.month_name).index(month)
         
         # Date range
-        start_date = f"{year}-{month_num:02d}-01"
-        end_date = f"{year}-{month_num:02d}-{calendar.monthrange(int(year), month_num)[1]}"
-        
-        # Search in transactions
-        cursor = self.conn.cursor()
-        cursor.execute(
-            """
-            SELECT id, date, amount, type, category, payment_method, description 
-            FROM transactions 
-            WHERE date BETWEEN ? AND ? AND (LOWER(category) LIKE ? OR LOWER(payment_method) LIKE ? OR LOWER(description) LIKE ? OR LOWER(type) LIKE ?)
-            ORDER BY date DESC
-            """,
-            (start_date, end_date, f"%{search_term}%", f"%{search_term}%", f"%{search_term}%", f"%{search_term}%")
-        )
-        transactions = cursor.fetchall()
-        
-        # Add to treeview
-        for transaction in transactions:
-            self.transaction_tree.insert("", "end", values=transaction)
+        start_date, end_date = month_bounds(year, month_num)
+
+        # Page through the matches, best first
+        self.show_pager(self.ledger.search_pager(search_term, start_date, end_date))
 
 if __name__ == "__main__":
+    imported = time.perf_counter()
+    parser = argparse.ArgumentParser(description="Expense Tracker")
+    parser.add_argument("--benchmark-search", type=int, nargs="?", const=1_000_000, metavar="ROWS",
+                        help="compare LIKE and full-text search on a synthetic ledger and exit")
+    parser.add_argument("--benchmark-concurrency", type=int, nargs="?", const=16, metavar="THREADS",
+                        help="run mixed reads and writes from many threads against several ledgers and exit")
+    parser.add_argument("--import", dest="import_files", nargs="+", metavar="FILE",
+                        help="bulk import bank statement CSV/OFX files and exit")
+    parser.add_argument("--date-format", help="strptime format of statement dates, e.g. %%d/%%m/%%Y")
+    parser.add_argument("--export", nargs=3, metavar=("START", "END", "PATH"),
+                        help="export transactions between two ISO dates and exit")
+    parser.add_argument("--format", dest="export_format", choices=list(TransactionExporter.FORMATS), default="csv",
+                        help="file format used by --export")
+    parser.add_argument("--partitioned", action="store_true",
+                        help="write --export as a year=YYYY/month=MM directory tree")
+    parser.add_argument("--render-reports", metavar="OUT_DIR",
+                        help="render reports to PNG/PDF files without a display and exit")
+    parser.add_argument("--ledgers", nargs="+", metavar="DB",
+                        help="ledger databases for --render-reports (default: --db)")
+    parser.add_argument("--months", nargs=2, metavar=("FROM", "TO"),
+                        help="YYYY-MM range for --render-reports (default: the current year so far)")
+    parser.add_argument("--render-format", choices=["png", "pdf"], default="png",
+                        help="file format used by --render-reports")
+    parser.add_argument("--workers", type=int, help="processes used by --render-reports")
+    parser.add_argument("--startup-time", action="store_true",
+                        help="print the time to first paint of the main window and exit")
+    parser.add_argument("--db", default=DATABASE_PATH, help="ledger database file")
+    args = parser.parse_args()
+    DATABASE_PATH = args.db
+
+    if args.import_files:
+        ledger = Ledger.open(DATABASE_PATH)
+        for path in args.import_files:
+            try:
+                stats = ledger.import_file(
+                    path,
+                    progress_callback=lambda stats: print(f"\r{path}: {stats['read']:,} rows read", end="", flush=True),
+                    date_format=args.date_format
+                )
+            except AmbiguousDatesError as e:
+                sys.exit(f"{path}: {e} with --date-format")
+            print(
+                f"\r{path}: {stats['inserted']:,} imported, {stats['duplicates']:,} duplicates, "
+                f"{stats['invalid']:,} invalid in {stats['seconds']:.2f}s ({stats['rows_per_second']:,.0f} rows/s)"
+            )
+        ledger.close()
+        sys.exit(0)
+
+    if args.export:
+        ledger = Ledger.open(DATABASE_PATH)
+        start_date, end_date, path = args.export
+        stats = ledger.export(
+            start_date, end_date, path, args.export_format, args.partitioned,
+            progress_callback=lambda stats: print(f"\r{path}: {stats['rows']:,}/{stats['total']:,} rows", end="", flush=True)
+        )
+        print(f"\r{path}: {stats['rows']:,} rows in {stats['files']:,} files in {stats['seconds']:.2f}s ({stats['rows_per_second']:,.0f} rows/s)")
+        ledger.close()
+        sys.exit(0)
+
+    if args.render_reports:
+        if args.months:
+            (first_year, first_month), (last_year, last_month) = [map(int, value.split("-")) for value in args.months]
+        else:
+            today = datetime.date.today()
+            first_year, first_month, last_year, last_month = today.year, 1, today.year, today.month
+        count = (last_year * 12 + last_month) - (first_year * 12 + first_month) + 1
+        months = previous_months(last_year, last_month, count)
+
+        began = time.perf_counter()
+        written = render_reports(
+            args.ledgers or [DATABASE_PATH], months, args.render_reports, args.render_format, workers=args.workers,
+            progress_callback=lambda done, total: print(f"\r{done}/{total} ledger months rendered", end="", flush=True)
+        )
+        print(f"\n{len(written):,} reports written to {args.render_reports} in {time.perf_counter() - began:.2f}s")
+        sys.exit(0)
+
+    if args.benchmark_concurrency:
+        benchmark_concurrency(args.benchmark_concurrency)
+        sys.exit(0)
+
+    if args.benchmark_search:
+        benchmark_search(args.benchmark_search)
+        sys.exit(0)
+
     root = tk.Tk()
     app = ExpenseTrackerApp(root)
+
+    if args.startup_time:
+        built = time.perf_counter()
+        root.update()
+        painted = time.perf_counter()
+        heavy = [name for name in ("numpy", "pandas", "matplotlib", "tkcalendar", "PIL") if name in sys.modules]
+        print(
+            f"startup: imports {(imported - STARTED) * 1000:.0f} ms, build {(built - imported) * 1000:.0f} ms, "
+            f"first paint {(painted - built) * 1000:.0f} ms, total {(painted - STARTED) * 1000:.0f} ms"
+        )
+        print(f"heavy modules loaded: {', '.join(heavy) or 'none'}")
+        root.destroy()
+        sys.exit(0)
+
     root.mainloop()
\ No newline at end of file
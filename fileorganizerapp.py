@@ -1,12 +1,15 @@
 import os
+import re
+import time
 import shutil
+import fnmatch
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import threading
 
 class FileOrganizer:
     def __init__(self):
-        self.file_types = {
+        self._file_types = {
             'Images': ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.svg', '.webp'],
             'Documents': ['.pdf', '.doc', '.docx', '.txt', '.rtf', '.odt', '.xlsx', '.ppt', '.pptx', '.csv'],
             'Videos': ['.mp4', '.mov', '.avi', '.mkv', '.wmv', '.flv', '.webm'],
@@ -16,20 +19,206 @@ class FileOrganizer:
             'Executables': ['.exe', '.msi', '.app', '.bat', '.sh'],
             'Others': []
         }
+        # User rules, checked in order before the extension lists
+        self.rules = []
+        self._extension_index = None
+        self._rule_table = None
+    
+    @property
+    def file_types(self):
+        return self._file_types
+    
+    @file_types.setter
+    def file_types(self, file_types):
+        self._file_types = file_types
+        self._invalidate()
+    
+    def add_category(self, category, extensions=()):
+        """Add a category, or extra extensions to an existing one"""
+        known = self._file_types.setdefault(category, [])
+        known.extend(ext.lower() for ext in extensions if ext.lower() not in known)
+        self._invalidate()
+    
+    def remove_category(self, category):
+        """Remove a category and the rules that file into it"""
+        self._file_types.pop(category, None)
+        self.rules = [rule for rule in self.rules if rule['category'] != category]
+        self._invalidate()
+    
+    def add_rule(self, category, glob=None, regex=None, min_size=None, max_size=None,
+                 older_than=None, newer_than=None):
+        """
+        Add a rule sending matching files to category (created if new).
+        
+        Every given condition must hold: glob (case-insensitive, on the file
+        name), regex (searched in the file name), min_size/max_size in bytes,
+        and older_than/newer_than in days since last modification. Rules are
+        checked in the order added, before the extension lists.
+        """
+        rule = {"category": category, "glob": glob, "regex": regex, "min_size": min_size,
+                "max_size": max_size, "older_than": older_than, "newer_than": newer_than}
+        if not any(value is not None for key, value in rule.items() if key != "category"):
+            raise ValueError("A rule needs at least one condition")
+        if regex is not None:
+            re.compile(regex)  # Fail now rather than mid-run
+        self.rules.append(rule)
+        self._file_types.setdefault(category, [])
+        self._invalidate()
+        return rule
+    
+    def remove_rule(self, rule):
+        self.rules.remove(rule)
+        self._invalidate()
+    
+    def _invalidate(self):
+        # Rebuilt lazily the next time a file is categorized
+        self._extension_index = None
+        self._rule_table = None
+    
+    @property
+    def extension_index(self):
+        """Extension -> category; the first category listing an extension wins"""
+        index = self._extension_index
+        if index is None:
+            index = {}
+            for category, extensions in self._file_types.items():
+                for ext in extensions:
+                    index.setdefault(ext.lower(), category)
+            self._extension_index = index
+        return index
+    
+    def _compile_rules(self):
+        """
+        Group the rules by the literal extension their glob requires.
         
-    def organize_files(self, directory_path, categories=None, progress_callback=None):
+        A file then only checks rules for its own extension plus the rules
+        that can match any extension, still in the order they were added.
+        Each group also gets one combined regex of its name patterns, so a
+        name that matches none of them is rejected in a single search.
+        """
+        compiled, generic, by_extension = [], [], {}
+        for rule in self.rules:
+            patterns = []
+            extension = None
+            if rule["glob"]:
+                patterns.append(f"^(?i:{fnmatch.translate(rule['glob'])})")
+                glob_ext = os.path.splitext(rule["glob"])[1]
+                if glob_ext and not any(char in glob_ext for char in "*?[]"):
+                    extension = glob_ext.lower()
+            if rule["regex"]:
+                patterns.append(rule["regex"])
+            name_checks = [re.compile(pattern) for pattern in patterns]
+            max_age = rule["older_than"] * 86400 if rule["older_than"] is not None else None
+            min_age = rule["newer_than"] * 86400 if rule["newer_than"] is not None else None
+            entry = (len(compiled), rule["category"], patterns, name_checks,
+                     rule["min_size"], rule["max_size"], max_age, min_age)
+            compiled.append(entry)
+            (by_extension.setdefault(extension, []) if extension else generic).append(entry)
+        
+        def group(entries):
+            entries = sorted(entries, key=lambda entry: entry[0])
+            prefilter = None
+            # Only safe when every rule has a name pattern and none uses groups (back-references)
+            if entries and all(entry[2] for entry in entries) and \
+                    all(check.groups == 0 for entry in entries for check in entry[3]):
+                # A rule with glob and regex needs both; either alone is a superset test
+                try:
+                    prefilter = re.compile("|".join(f"(?:{entry[2][0]})" for entry in entries))
+                except re.error:
+                    pass  # e.g. a global (?i) flag, which only works at the start of a pattern
+            return prefilter, entries
+        
+        table = {ext: group(entries + generic) for ext, entries in by_extension.items()}
+        table[None] = group(generic)
+        return table
+    
+    def category_for(self, entry, now=None):
+        """
+        Category for a file, given its os.DirEntry (or path).
+        
+        Rules come first; size and age conditions only stat the file once a
+        rule's name conditions match, and a DirEntry caches that stat.
+        Otherwise the extension decides. Returns None for a file without an
+        extension that no rule matched.
+        """
+        if isinstance(entry, (str, os.PathLike)):
+            path = os.fspath(entry)
+            name, get_stat = os.path.basename(path), lambda: os.stat(path)
+        else:
+            name, get_stat = entry.name, entry.stat
+        file_ext = os.path.splitext(name)[1].lower()
+        
+        if self.rules:
+            # Read once: editing the rules during a run resets the attribute
+            table = self._rule_table
+            if table is None:
+                table = self._rule_table = self._compile_rules()
+            prefilter, rules = table.get(file_ext) or table[None]
+            if rules and (prefilter is None or prefilter.search(name)):
+                now = now or time.time()
+                for _, category, _, name_checks, min_size, max_size, max_age, min_age in rules:
+                    if not all(check.search(name) for check in name_checks):
+                        continue
+                    if min_size is not None or max_size is not None or max_age is not None or min_age is not None:
+                        try:
+                            stat = get_stat()
+                        except OSError:
+                            continue
+                        if min_size is not None and stat.st_size < min_size:
+                            continue
+                        if max_size is not None and stat.st_size > max_size:
+                            continue
+                        age = now - stat.st_mtime
+                        if max_age is not None and age < max_age:
+                            continue
+                        if min_age is not None and age > min_age:
+                            continue
+                    return category
+        
+        if not file_ext:
+            return None
+        return self.extension_index.get(file_ext, "Others")
+        
+    def iter_files(self, directory_path, recursive=False, exclude=()):
+        """
+        Yield a DirEntry for each file under directory_path as it is found.
+        
+        os.scandir returns each entry's type with the listing, so no extra
+        stat call is needed per file. In recursive mode subfolders are
+        walked too, except for names in exclude at the top level (the
+        category folders).
+        """
+        pending = [directory_path]
+        while pending:
+            path = pending.pop()
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if entry.is_file():
+                            yield entry
+                        elif recursive and entry.is_dir(follow_symlinks=False):
+                            if path != directory_path or entry.name not in exclude:
+                                pending.append(entry.path)
+            except OSError:
+                # Unreadable subfolder; carry on with the rest
+                if path == directory_path:
+                    raise
+        
+    def organize_files(self, directory_path, categories=None, progress_callback=None, recursive=False):
         """
         Organize files in the given directory based on their file extensions.
         
         Args:
             directory_path: Path to the directory to organize
             categories: List of categories to organize (None for all)
-            progress_callback: Function to call with progress updates
+            progress_callback: Function to call with progress updates (the
+                percentage is None in recursive mode, where the total is unknown)
+            recursive: Also organize files in subfolders, streaming them as found
         
         Returns:
             Dictionary with stats about the operation
         """
-        if not os.path.exists(directory_path):
+        if not os.path.isdir(directory_path):
             return {"status": "error", "message": "Directory does not exist"}
         
         # Prepare category list
@@ -43,52 +232,75 @@ class FileOrganizer:
             "categories": {}
         }
         
-        files = [f for f in os.listdir(directory_path) 
-                if os.path.isfile(os.path.join(directory_path, f))]
-        stats["total_files"] = len(files)
+        files = self.iter_files(directory_path, recursive, exclude=self.file_types)
+        total = None
+        if not recursive:
+            files = list(files)
+            total = len(files)
+            stats["total_files"] = total
         
-        for i, filename in enumerate(files):
-            if progress_callback:
-                progress = (i + 1) / len(files) * 100
+        now = time.time()
+        
+        # Names already taken in each category folder, read once per folder.
+        # Compared case-insensitively, as on Windows and macOS file systems.
+        taken_names = {}
+        last_update = 0.0
+        
+        for i, entry in enumerate(files, 1):
+            if recursive:
+                stats["total_files"] += 1
+            filename = entry.name
+            
+            # Progress updates are throttled; redrawing for every file costs more than the move
+            if progress_callback and (i == total or time.monotonic() - last_update >= 0.1):
+                last_update = time.monotonic()
+                progress = i / total * 100 if total else None
                 progress_callback(progress, f"Processing: {filename}")
             
-            file_path = os.path.join(directory_path, filename)
             file_ext = os.path.splitext(filename)[1].lower()
             
-            # Skip folders or files without extension
-            if not file_ext:
+            # Find which category this file belongs to
+            category = self.category_for(entry, now)
+            
+            # Skip files without extension that no rule claimed
+            if category is None:
                 stats["skipped_files"] += 1
                 continue
             
-            # Find which category this file belongs to
-            category = "Others"
-            for cat, extensions in self.file_types.items():
-                if file_ext in extensions:
-                    category = cat
-                    break
-            
             # Skip if category is not in our target list
             if category not in categories:
                 stats["skipped_files"] += 1
                 continue
             
-            # Create category folder if it doesn't exist
+            # Create each category folder once, and list what it already holds
             category_path = os.path.join(directory_path, category)
-            if not os.path.exists(category_path):
-                os.makedirs(category_path)
+            names = taken_names.get(category)
+            if names is None:
+                try:
+                    os.makedirs(category_path, exist_ok=True)
+                    with os.scandir(category_path) as existing:
+                        names = taken_names[category] = {item.name.casefold() for item in existing}
+                except OSError:
+                    stats["skipped_files"] += 1
+                    continue
             
             # Move file to category folder
             try:
-                destination = os.path.join(category_path, filename)
+                new_name = filename
                 # Handle file name conflicts
                 counter = 1
                 original_name = os.path.splitext(filename)[0]
-                while os.path.exists(destination):
+                while new_name.casefold() in names:
                     new_name = f"{original_name}_{counter}{file_ext}"
-                    destination = os.path.join(category_path, new_name)
                     counter += 1
-                    
-                shutil.move(file_path, destination)
+                destination = os.path.join(category_path, new_name)
+                
+                try:
+                    os.rename(entry.path, destination)
+                except OSError:
+                    # Different file system (recursive mode across mounts)
+                    shutil.move(entry.path, destination)
+                names.add(new_name.casefold())
                 
                 # Update statistics
                 stats["organized_files"] += 1
@@ -131,20 +343,12 @@ class FileOrganizerApp:
         browse_btn.pack(side=tk.RIGHT)
         
         # Categories frame
-        cat_frame = ttk.LabelFrame(main_frame, text="Categories to Organize", padding="10")
-        cat_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+        self.cat_frame = ttk.LabelFrame(main_frame, text="Categories to Organize", padding="10")
+        self.cat_frame.pack(fill=tk.BOTH, expand=True, pady=10)
         
         self.category_vars = {}
-        for i, category in enumerate(self.organizer.file_types.keys()):
-            var = tk.BooleanVar(value=True)
-            self.category_vars[category] = var
-            
-            # Create a checkbox for each category
-            row = i // 2
-            col = i % 2
-            
-            chk = ttk.Checkbutton(cat_frame, text=category, variable=var)
-            chk.grid(row=row, column=col, sticky=tk.W, padx=5, pady=2)
+        self.recursive_var = tk.BooleanVar(value=False)
+        self.build_category_checkboxes()
         
         # Progress frame
         progress_frame = ttk.LabelFrame(main_frame, text="Progress", padding="10")
@@ -173,6 +377,117 @@ class FileOrganizerApp:
         
         self.cancel_btn = ttk.Button(btn_frame, text="Cancel", command=self.cancel_organizing, state=tk.DISABLED)
         self.cancel_btn.pack(side=tk.RIGHT, padx=5)
+        
+        self.rules_btn = ttk.Button(btn_frame, text="Rules...", command=self.manage_rules)
+        self.rules_btn.pack(side=tk.LEFT, padx=5)
+    
+    def build_category_checkboxes(self):
+        # Rebuilt when rules add categories; existing choices are kept
+        for child in self.cat_frame.winfo_children():
+            child.destroy()
+        
+        row = 0
+        for i, category in enumerate(self.organizer.file_types.keys()):
+            if category not in self.category_vars:
+                self.category_vars[category] = tk.BooleanVar(value=True)
+            var = self.category_vars[category]
+            
+            # Create a checkbox for each category
+            row = i // 2
+            col = i % 2
+            
+            chk = ttk.Checkbutton(self.cat_frame, text=category, variable=var)
+            chk.grid(row=row, column=col, sticky=tk.W, padx=5, pady=2)
+        
+        recursive_chk = ttk.Checkbutton(self.cat_frame, text="Include subfolders", variable=self.recursive_var)
+        recursive_chk.grid(row=row + 1, column=0, columnspan=2, sticky=tk.W, padx=5, pady=(8, 2))
+    
+    def manage_rules(self):
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Rules")
+        dialog.transient(self.root)
+        
+        ttk.Label(dialog, text="Rules are checked top to bottom, before file extensions.").pack(
+            fill=tk.X, padx=10, pady=(10, 0))
+        
+        tree = ttk.Treeview(dialog, columns=("category", "conditions"), show="headings", height=8)
+        tree.heading("category", text="Category")
+        tree.heading("conditions", text="Conditions")
+        tree.column("category", width=120)
+        tree.column("conditions", width=380)
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        def describe(rule):
+            parts = []
+            if rule["glob"]:
+                parts.append(f"name like {rule['glob']}")
+            if rule["regex"]:
+                parts.append(f"name matches /{rule['regex']}/")
+            if rule["min_size"] is not None:
+                parts.append(f">= {rule['min_size'] / 1024 ** 2:g} MB")
+            if rule["max_size"] is not None:
+                parts.append(f"<= {rule['max_size'] / 1024 ** 2:g} MB")
+            if rule["older_than"] is not None:
+                parts.append(f"older than {rule['older_than']:g} days")
+            if rule["newer_than"] is not None:
+                parts.append(f"newer than {rule['newer_than']:g} days")
+            return ", ".join(parts)
+        
+        def refresh():
+            tree.delete(*tree.get_children())
+            for i, rule in enumerate(self.organizer.rules):
+                tree.insert("", tk.END, iid=str(i), values=(rule["category"], describe(rule)))
+        
+        form = ttk.Frame(dialog, padding="10")
+        form.pack(fill=tk.X)
+        fields = {}
+        labels = [("category", "Category"), ("glob", "Name pattern (e.g. invoice_*.pdf)"),
+                  ("regex", "Regular expression"), ("min_size", "Min size (MB)"), ("max_size", "Max size (MB)"),
+                  ("older_than", "Older than (days)"), ("newer_than", "Newer than (days)")]
+        for i, (key, label) in enumerate(labels):
+            ttk.Label(form, text=label).grid(row=i, column=0, sticky=tk.W, pady=2)
+            if key == "category":
+                fields[key] = ttk.Combobox(form, values=list(self.organizer.file_types.keys()), width=30)
+            else:
+                fields[key] = ttk.Entry(form, width=33)
+            fields[key].grid(row=i, column=1, sticky=tk.W, padx=5, pady=2)
+        
+        def add_rule():
+            values = {key: widget.get().strip() for key, widget in fields.items()}
+            if not values["category"]:
+                messagebox.showerror("Error", "Please choose or type a category.", parent=dialog)
+                return
+            try:
+                numbers = {}
+                for key in ("min_size", "max_size", "older_than", "newer_than"):
+                    if values[key]:
+                        numbers[key] = float(values[key])
+                for key in ("min_size", "max_size"):
+                    if key in numbers:
+                        numbers[key] = int(numbers[key] * 1024 ** 2)
+                self.organizer.add_rule(values["category"], glob=values["glob"] or None,
+                                        regex=values["regex"] or None, **numbers)
+            except (ValueError, re.error) as e:
+                messagebox.showerror("Error", f"Invalid rule: {e}", parent=dialog)
+                return
+            for widget in fields.values():
+                widget.delete(0, tk.END)
+            fields["category"].config(values=list(self.organizer.file_types.keys()))
+            refresh()
+            self.build_category_checkboxes()
+        
+        def remove_rule():
+            for iid in sorted(tree.selection(), key=int, reverse=True):
+                self.organizer.remove_rule(self.organizer.rules[int(iid)])
+            refresh()
+        
+        btns = ttk.Frame(dialog, padding=(10, 0, 10, 10))
+        btns.pack(fill=tk.X)
+        ttk.Button(btns, text="Close", command=dialog.destroy).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(btns, text="Remove Selected", command=remove_rule).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(btns, text="Add Rule", command=add_rule).pack(side=tk.RIGHT, padx=5)
+        
+        refresh()
     
     def browse_directory(self):
         directory = filedialog.askdirectory()
@@ -182,7 +497,13 @@ class FileOrganizerApp:
             self.dir_entry.insert(0, directory)
     
     def update_progress(self, value, message):
-        self.progress_bar["value"] = value
+        if value is None:
+            # Recursive scans stream files, so there is no total to measure against
+            self.progress_bar.config(mode="indeterminate")
+            self.progress_bar.step(5)
+        else:
+            self.progress_bar.config(mode="determinate")
+            self.progress_bar["value"] = value
         self.status_label.config(text=message)
         self.root.update_idletasks()
     
@@ -206,6 +527,7 @@ class FileOrganizerApp:
         
         self.is_organizing = True
         self.organize_btn.config(state=tk.DISABLED)
+        self.rules_btn.config(state=tk.DISABLED)
         self.cancel_btn.config(state=tk.NORMAL)
         
         # Clear previous results
@@ -216,17 +538,18 @@ class FileOrganizerApp:
         # Start organizing in a separate thread
         self.organize_thread = threading.Thread(
             target=self.run_organization,
-            args=(directory, selected_categories)
+            args=(directory, selected_categories, self.recursive_var.get())
         )
         self.organize_thread.daemon = True
         self.organize_thread.start()
     
-    def run_organization(self, directory, categories):
+    def run_organization(self, directory, categories, recursive=False):
         try:
             stats = self.organizer.organize_files(
                 directory,
                 categories=categories,
-                progress_callback=self.update_progress
+                progress_callback=self.update_progress,
+                recursive=recursive
             )
             
             self.root.after(0, lambda: self.display_results(stats))
@@ -243,7 +566,9 @@ class FileOrganizerApp:
     def reset_ui(self):
         self.is_organizing = False
         self.organize_btn.config(state=tk.NORMAL)
+        self.rules_btn.config(state=tk.NORMAL)
         self.cancel_btn.config(state=tk.DISABLED)
+        self.progress_bar.config(mode="determinate")
         self.progress_bar["value"] = 0
     
     def display_results(self, stats):
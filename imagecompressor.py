@@ -6,16 +6,28 @@ A vibrant command-line tool for image compression, rotation, and resizing
 
 import os
 import sys
+import glob
+import json
+import shutil
+import struct
+import hashlib
+import csv
 import argparse
+import contextlib
+import tempfile
+import multiprocessing
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from PIL import Image, ImageEnhance
+from PIL import Image, ImageEnhance, features
+import numpy as np
 import colorama
 from colorama import Fore, Back, Style
 import inquirer
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
-from rich.progress import Progress, SpinnerColumn, TextColumn
+from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, MofNCompleteColumn, TimeElapsedColumn, TimeRemainingColumn
 from rich.text import Text
 import time
 
@@ -23,8 +35,943 @@ import time
 colorama.init(autoreset=True)
 console = Console()
 
+MANIFEST_NAME = ".imagecompressor_manifest.jsonl"
+DEFAULT_CACHE_DIR = Path(os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache')) / 'imagecompressor'
+DEFAULT_CACHE_SIZE = 1024 ** 3
+
+def prepare_for_format(img, suffix):
+    """Flatten transparency onto white when the target format has no alpha channel"""
+    if suffix.lower() in ['.jpg', '.jpeg'] and img.mode in ('RGBA', 'LA', 'P'):
+        img = img.convert('RGBA')
+        rgb_img = Image.new('RGB', img.size, (255, 255, 255))
+        rgb_img.paste(img, mask=img.split()[-1])
+        return rgb_img
+    return img
+
+def save_atomic(img, output_path, **params):
+    """Save through a temporary file so an interrupted run never leaves a half-written output"""
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+    try:
+        img.save(temp_path, format=Image.registered_extensions()[output_path.suffix.lower()], **params)
+        os.replace(temp_path, output_path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+
+# Formats whose encoder takes a quality setting
+QUALITY_FORMATS = {'JPEG', 'WEBP', 'AVIF'}
+
+def write_atomic(data, output_path):
+    """Write encoded bytes through a temporary file, like save_atomic"""
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+    try:
+        temp_path.write_bytes(data)
+        os.replace(temp_path, output_path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+
+def parse_size(text):
+    """Parse a size such as '250000', '200KB' or '1.5MB' into bytes"""
+    text = str(text).strip().upper().replace(' ', '')
+    for unit, factor in (('GB', 1024 ** 3), ('MB', 1024 ** 2), ('KB', 1024), ('B', 1)):
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * factor)
+    return int(float(text))
+
+def encode_to_buffer(img, fmt, **params):
+    """Encode an image in memory and return the bytes"""
+    buffer = BytesIO()
+    img.save(buffer, format=fmt, **params)
+    return buffer.getvalue()
+
+def luminance(img):
+    """Luma channel as a float array, the input SSIM is computed on"""
+    return np.asarray(img.convert('L'), dtype=np.float64)
+
+def _box_mean(values, size):
+    # Mean over every size x size window, from a summed-area table
+    table = np.pad(values, ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+    return (table[size:, size:] - table[:-size, size:] - table[size:, :-size] + table[:-size, :-size]) / (size * size)
+
+def ssim(reference, candidate, window=7):
+    """
+    Mean structural similarity of two luma arrays (1.0 means identical).
+
+    Uses a uniform 7x7 window, as scikit-image does by default.
+    """
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    mean_x, mean_y = _box_mean(reference, window), _box_mean(candidate, window)
+    var_x = _box_mean(reference * reference, window) - mean_x ** 2
+    var_y = _box_mean(candidate * candidate, window) - mean_y ** 2
+    covariance = _box_mean(reference * candidate, window) - mean_x * mean_y
+    ssim_map = ((2 * mean_x * mean_y + c1) * (2 * covariance + c2)) / \
+               ((mean_x ** 2 + mean_y ** 2 + c1) * (var_x + var_y + c2))
+    return float(ssim_map.mean())
+
+def find_quality(img, fmt, max_bytes=None, min_ssim=None, low=1, high=95, **params):
+    """
+    Binary-search the encoder quality to meet a file size and/or SSIM target.
+
+    Each probe encodes the already-decoded image into memory (and, for an
+    SSIM target, decodes that buffer to compare it). Nothing touches disk.
+    With only max_bytes, the highest quality that fits is chosen. With
+    min_ssim, the lowest quality that reaches the SSIM is chosen, which
+    gives the smallest file. Extra params go to every encode.
+
+    Returns:
+        Dictionary with 'quality', 'data', 'ssim', 'probes' and 'met'
+    """
+    if fmt not in QUALITY_FORMATS:
+        data = encode_to_buffer(img, fmt, optimize=True, **params)
+        return {'quality': None, 'data': data, 'ssim': None, 'probes': 1,
+                'met': max_bytes is None or len(data) <= max_bytes}
+
+    reference = luminance(img) if min_ssim is not None else None
+    probes = {}
+
+    def probe(quality):
+        if quality not in probes:
+            data = encode_to_buffer(img, fmt, quality=quality, optimize=True, **params)
+            score = None
+            if reference is not None:
+                with Image.open(BytesIO(data)) as decoded:
+                    score = ssim(reference, luminance(decoded))
+            probes[quality] = (data, score)
+        return probes[quality]
+
+    def fits(quality):
+        data, score = probe(quality)
+        return (max_bytes is None or len(data) <= max_bytes), (min_ssim is None or score >= min_ssim)
+
+    if min_ssim is not None:
+        # Lowest quality whose SSIM is high enough
+        lo, hi = low, high
+        while lo < hi:
+            middle = (lo + hi) // 2
+            if fits(middle)[1]:
+                hi = middle
+            else:
+                lo = middle + 1
+        quality = lo
+    else:
+        # Highest quality that still fits the size budget
+        lo, hi = low, high
+        while lo < hi:
+            middle = (lo + hi + 1) // 2
+            if fits(middle)[0]:
+                lo = middle
+            else:
+                hi = middle - 1
+        quality = lo
+
+    size_ok, ssim_ok = fits(quality)
+    data, score = probe(quality)
+    return {'quality': quality, 'data': data, 'ssim': score, 'probes': len(probes), 'met': size_ok and ssim_ok}
+
+# Keep at least this much resolution for Lanczos after the cheap shrink steps
+REDUCING_GAP = 2
+
+def shrink_image(img, size):
+    """
+    Resize an opened image, shrinking on load when it is a JPEG.
+
+    For downscales, a JPEG is first decoded at a reduced DCT scale via
+    draft(), then box-reduced by an integer factor, and only the last
+    (at most REDUCING_GAP x) step uses Lanczos. Upscales go straight to
+    Lanczos.
+    """
+    width, height = size
+    if width < img.width and height < img.height:
+        if img.format == 'JPEG':
+            img.draft(img.mode, (width * REDUCING_GAP, height * REDUCING_GAP))
+        factor = min(img.width // (width * REDUCING_GAP), img.height // (height * REDUCING_GAP))
+        if factor > 1:
+            img = img.reduce(factor)
+    return img.resize(size, Image.Resampling.LANCZOS)
+
+def _resize_probe(method, path, size, repeat):
+    # Runs in a fresh process so the peak RSS belongs to one method only
+    started = time.perf_counter()
+    for _ in range(repeat):
+        with Image.open(path) as img:
+            if method == 'lanczos':
+                img.resize(size, Image.Resampling.LANCZOS)
+            else:
+                shrink_image(img, size)
+    seconds = (time.perf_counter() - started) / repeat
+    return seconds, peak_memory_kb()
+
+def peak_memory_kb():
+    """Peak resident memory of this process in KB, or None if unknown"""
+    # VmHWM resets on exec, unlike ru_maxrss which a spawned child inherits
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except ImportError:  # Not available on Windows
+        return None
+
+def benchmark_resize(path=None, size=(320, 240), repeat=3):
+    """
+    Compare a plain Lanczos resize with shrink_image on a large image.
+
+    Without a path, a synthetic 6000x4000 (24 MP) JPEG is generated.
+
+    Returns:
+        Dictionary of method -> (seconds per resize, peak RSS in KB)
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if path is None:
+            path = Path(temp_dir) / "benchmark_24mp.jpg"
+            x = np.linspace(0, 255, 6000, dtype=np.float32)
+            y = np.linspace(0, 255, 4000, dtype=np.float32)[:, None]
+            noise = np.random.default_rng(0).integers(0, 32, (4000, 6000), dtype=np.uint8)
+            channels = [(x + y) / 2 + noise, np.abs(x - y) + noise, np.broadcast_to(y, (4000, 6000)) + noise]
+            Image.fromarray(np.clip(np.stack(channels, axis=-1), 0, 255).astype(np.uint8)).save(path, quality=90)
+
+        results = {}
+        context = multiprocessing.get_context('spawn')
+        for method in ('lanczos', 'shrink'):
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                results[method] = executor.submit(_resize_probe, method, str(path), size, repeat).result()
+        return results
+
+# Tiled mode: images above TILED_PIXELS are streamed, holding about TILE_BUDGET bytes at a time
+TILED_PIXELS = 100_000_000
+TILE_BUDGET = 64 * 1024 ** 2
+TILE_SIZE = 256
+TIFF_BANDS = {'L': 1, 'RGB': 3, 'RGBA': 4}
+
+def image_header(path):
+    """Size, format and DPI from the header, even past Pillow's decompression-bomb limit"""
+    previous, Image.MAX_IMAGE_PIXELS = Image.MAX_IMAGE_PIXELS, None
+    try:
+        with Image.open(path) as img:
+            return {'width': img.width, 'height': img.height, 'format': img.format,
+                    'dpi': img.info.get('dpi', (72, 72))}
+    finally:
+        Image.MAX_IMAGE_PIXELS = previous
+
+def needs_tiling(path):
+    """True for TIFFs too large to process comfortably in memory"""
+    header = image_header(path)
+    return header['format'] == 'TIFF' and header['width'] * header['height'] > TILED_PIXELS
+
+def can_tile(path):
+    """True if TiffRegionReader can stream the file (an uncompressed 8-bit L/RGB/RGBA TIFF)"""
+    try:
+        TiffRegionReader(path).close()
+    except ValueError:
+        return False
+    return True
+
+class TiffRegionReader:
+    """
+    Read bands of rows from an uncompressed 8-bit TIFF straight off disk.
+
+    Pillow parses the header and reports where every strip or tile lives;
+    rows are then read from those offsets, so the full raster is never in
+    memory. Compressed TIFFs are decoded by libtiff as a single unit and
+    cannot be read this way.
+    """
+
+    def __init__(self, path):
+        previous, Image.MAX_IMAGE_PIXELS = Image.MAX_IMAGE_PIXELS, None
+        try:
+            with Image.open(path) as img:
+                if img.format != 'TIFF' or img.mode not in TIFF_BANDS:
+                    raise ValueError(f"Tiled mode needs an 8-bit L/RGB/RGBA TIFF, not {img.format} {img.mode}")
+                if any(tile[0] != 'raw' or tile[3][0] != img.mode or tile[3][-1] != 1 for tile in img.tile):
+                    raise ValueError("Tiled mode needs an uncompressed TIFF; save it without compression first")
+                self.width, self.height, self.mode = img.width, img.height, img.mode
+                self.tiles = [(tile[1], tile[2], tile[3][1]) for tile in img.tile]
+        finally:
+            Image.MAX_IMAGE_PIXELS = previous
+        self.bands = TIFF_BANDS[self.mode]
+        self.file = open(path, 'rb')
+
+    def read_rows(self, top, bottom):
+        """Rows [top, bottom) as a (rows, width, bands) uint8 array"""
+        band = np.empty((bottom - top, self.width, self.bands), dtype=np.uint8)
+        for (x0, y0, x1, y1), offset, stride in self.tiles:
+            first, last = max(top, y0), min(bottom, y1)
+            if first >= last:
+                continue
+            stride = stride or (x1 - x0) * self.bands
+            self.file.seek(offset + (first - y0) * stride)
+            rows = np.frombuffer(self.file.read((last - first) * stride), dtype=np.uint8)
+            rows = rows.reshape(last - first, stride)[:, :(x1 - x0) * self.bands]
+            band[first - top:last - top, x0:x1] = rows.reshape(last - first, x1 - x0, self.bands)
+        return band
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class TiffStreamWriter:
+    """
+    Write an uncompressed TIFF a region at a time.
+
+    The header and strip/tile tables are written up front, so pixel data
+    can then be written in any order. Files past 4 GB are written as
+    BigTIFF. With tile=N the file is tiled NxN (edge tiles padded), which
+    suits writers that produce columns, like a 90° rotation.
+    """
+
+    def __init__(self, path, size, mode, rows_per_strip=TILE_SIZE, tile=None):
+        self.width, self.height = size
+        self.bands = TIFF_BANDS[mode]
+        self.tile = tile
+        if tile:
+            self.tiles_across = -(-self.width // tile)
+            chunks = self.tiles_across * -(-self.height // tile)
+            self.chunk_bytes = tile * tile * self.bands
+        else:
+            self.rows_per_strip = min(rows_per_strip, self.height)
+            chunks = -(-self.height // self.rows_per_strip)
+            self.chunk_bytes = self.rows_per_strip * self.width * self.bands
+        self.row_bytes = self.width * self.bands
+        total = self.row_bytes * self.height if not tile else chunks * self.chunk_bytes
+
+        big = total + 4096 + chunks * 16 > 2 ** 32 - 1
+        offset_type, offset_format = (16, 'Q') if big else (4, 'I')
+        entries = [
+            (256, 4, [self.width]),
+            (257, 4, [self.height]),
+            (258, 3, [8] * self.bands),
+            (259, 3, [1]),
+            (262, 3, [1 if mode == 'L' else 2]),
+            (277, 3, [self.bands]),
+            (284, 3, [1]),
+        ]
+        if tile:
+            entries += [(322, 4, [tile]), (323, 4, [tile]), (324, offset_type, None), (325, offset_type, None)]
+        else:
+            entries += [(273, offset_type, None), (278, 4, [self.rows_per_strip]), (279, offset_type, None)]
+        if mode == 'RGBA':
+            entries.append((338, 3, [2]))  # Unassociated alpha
+        entries.sort()
+
+        # Lay out: header, IFD, out-of-line values, then pixel data
+        header_bytes, entry_bytes, count_bytes, inline = (16, 20, 8, 8) if big else (8, 12, 2, 4)
+        sizes = {'H': 2, 'I': 4, 'Q': 8}
+        formats = {3: 'H', 4: 'I', 16: 'Q'}
+        ifd_bytes = count_bytes + len(entries) * entry_bytes + inline
+        extra = header_bytes + ifd_bytes
+        layout = []
+        for tag, kind, values in entries:
+            count = chunks if values is None else len(values)
+            size = count * sizes[formats[kind]]
+            layout.append((tag, kind, values, count, extra if size > inline else None))
+            if size > inline:
+                extra += size + size % 2
+        self.data_start = (extra + 15) // 16 * 16
+
+        chunk_offsets = [self.data_start + index * self.chunk_bytes for index in range(chunks)]
+        chunk_counts = [self.chunk_bytes] * chunks
+        if not tile:
+            chunk_counts[-1] = total - self.chunk_bytes * (chunks - 1)
+
+        ifd = bytearray(struct.pack('<Q' if big else '<H', len(entries)))
+        external = bytearray()
+        for tag, kind, values, count, where in layout:
+            if values is None:
+                values = chunk_offsets if tag in (273, 324) else chunk_counts
+            data = struct.pack(f"<{count}{formats[kind]}", *values)
+            if where is None:
+                value = data.ljust(inline, b'\0')
+            else:
+                external += data + b'\0' * (len(data) % 2)
+                value = struct.pack('<' + offset_format, where)
+            ifd += struct.pack('<HHQ' if big else '<HHI', tag, kind, count) + value
+        ifd += b'\0' * inline  # No further IFDs
+
+        header = b'II+\0' + struct.pack('<HHQ', 8, 0, header_bytes) if big else b'II*\0' + struct.pack('<I', header_bytes)
+        self.file = open(path, 'wb')
+        self.file.write(header + ifd + external)
+        self.file.truncate(self.data_start + total)
+
+    def write_rows(self, top, rows):
+        """Write rows (a (rows, width[, bands]) array) starting at row top"""
+        self.file.seek(self.data_start + top * self.row_bytes)
+        self.file.write(np.ascontiguousarray(rows, dtype=np.uint8).data)
+
+    def write_tile(self, column, row, pixels):
+        """Write one tile (padded to tile x tile) at tile grid position (column, row)"""
+        tile = np.zeros((self.tile, self.tile, self.bands), dtype=np.uint8)
+        pixels = pixels.reshape(pixels.shape[0], pixels.shape[1], self.bands)
+        tile[:pixels.shape[0], :pixels.shape[1]] = pixels
+        self.file.seek(self.data_start + (row * self.tiles_across + column) * self.chunk_bytes)
+        self.file.write(tile.data)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _as_image(band):
+    return Image.fromarray(band[..., 0] if band.shape[-1] == 1 else band)
+
+def tiled_rotate(source, output, angle, tile=TILE_SIZE, progress_callback=None):
+    """
+    Rotate an uncompressed TIFF clockwise by 90, 180 or 270 degrees in bands.
+
+    Each band of input rows becomes a column of output tiles (or, for 180,
+    a band of output rows), so memory holds about two bands at a time.
+    """
+    if float(angle) % 360 not in RIGHT_ANGLES:
+        raise ValueError("Tiled mode only rotates by multiples of 90°")
+    angle = int(float(angle)) % 360
+    with TiffRegionReader(source) as reader:
+        if angle == 180:
+            with TiffStreamWriter(output, (reader.width, reader.height), reader.mode, tile) as writer:
+                for top in range(0, reader.height, tile):
+                    bottom = min(reader.height, top + tile)
+                    band = reader.read_rows(reader.height - bottom, reader.height - top)
+                    writer.write_rows(top, band[::-1, ::-1])
+                    if progress_callback:
+                        progress_callback(bottom, reader.height)
+            return
+
+        with TiffStreamWriter(output, (reader.height, reader.width), reader.mode, tile=tile) as writer:
+            for column in range(-(-reader.height // tile)):
+                if angle == 90:
+                    # Output columns [column * tile, ...) come from the bottom of the input upwards
+                    bottom = reader.height - column * tile
+                    rotated = np.rot90(reader.read_rows(max(0, bottom - tile), bottom), k=-1)
+                else:
+                    top = column * tile
+                    rotated = np.rot90(reader.read_rows(top, min(reader.height, top + tile)), k=1)
+                for row in range(-(-reader.width // tile)):
+                    writer.write_tile(column, row, rotated[row * tile:(row + 1) * tile])
+                if progress_callback:
+                    progress_callback(min(reader.height, (column + 1) * tile), reader.height)
+
+def tiled_resize(source, output, size, budget=TILE_BUDGET, progress_callback=None):
+    """
+    Resize an uncompressed TIFF in bands of output rows.
+
+    Like shrink_image, large reductions are first box-reduced by an integer
+    factor (here with numpy, while reading), then finished with Lanczos.
+    Each band reads enough extra input rows for the filter, and uses
+    resize(box=...) so bands join without seams.
+    """
+    width, height = size
+    with TiffRegionReader(source) as reader:
+        factor = max(1, min(reader.width // (width * REDUCING_GAP), reader.height // (height * REDUCING_GAP)))
+        source_width, source_height = reader.width // factor, reader.height // factor
+        scale = source_height / height
+        margin = int(np.ceil(3 * max(scale, 1))) + 1
+        input_row_bytes = reader.width * reader.bands * factor
+        rows = max(1, min(height, int(budget // (input_row_bytes * max(scale, 1)))))
+
+        def read_reduced(top, bottom):
+            band = reader.read_rows(top * factor, bottom * factor)
+            if factor == 1:
+                return band
+            if reader.mode == 'RGBA':
+                # Pillow premultiplies alpha, so transparent pixels don't tint the edges
+                box = (0, 0, source_width * factor, (bottom - top) * factor)
+                return np.asarray(_as_image(band).reduce(factor, box=box))
+            blocks = band[:, :source_width * factor].reshape(bottom - top, factor, source_width, factor, reader.bands)
+            return ((blocks.sum(axis=(1, 3), dtype=np.uint32) + factor * factor // 2) // (factor * factor)).astype(np.uint8)
+
+        with TiffStreamWriter(output, size, reader.mode, rows_per_strip=rows) as writer:
+            for out_top in range(0, height, rows):
+                out_bottom = min(height, out_top + rows)
+                top, bottom = out_top * scale, out_bottom * scale
+                first = max(0, int(top) - margin)
+                last = min(source_height, int(np.ceil(bottom)) + margin)
+                band = _as_image(read_reduced(first, last))
+                resized = band.resize((width, out_bottom - out_top), Image.Resampling.LANCZOS,
+                                      box=(0, top - first, source_width, bottom - first))
+                writer.write_rows(out_top, np.asarray(resized))
+                if progress_callback:
+                    progress_callback(out_bottom, height)
+
+def _tiled_probe(operation, source, output, argument):
+    # Runs in a fresh process so the peak RSS belongs to one operation only
+    started = time.perf_counter()
+    operation(source, output, argument)
+    return time.perf_counter() - started, peak_memory_kb()
+
+def write_synthetic_tiff(path, side, mode='RGB'):
+    """Stream a side x side synthetic uncompressed TIFF to disk, a band at a time"""
+    columns = np.arange(side, dtype=np.uint32)[None, :]
+    with TiffStreamWriter(path, (side, side), mode) as writer:
+        for top in range(0, side, TILE_SIZE):
+            rows = np.arange(top, min(side, top + TILE_SIZE), dtype=np.uint32)[:, None]
+            channels = [(rows + columns) // 157, rows ^ columns, columns * 255 // side, rows * 255 // side]
+            band = np.stack([np.broadcast_to(channel & 255, (len(rows), side)).astype(np.uint8)
+                             for channel in channels[:TIFF_BANDS[mode]]], axis=-1)
+            writer.write_rows(top, band)
+
+def benchmark_tiled(side=40000, work_dir=None):
+    """
+    Stress-test tiled_rotate and tiled_resize on a synthetic side x side RGB TIFF.
+
+    The input is streamed to a temporary directory (under work_dir if
+    given; a 40k image is 4.8 GB, plus as much again for the rotation).
+    Each operation runs in its own process to report time and peak RSS.
+
+    Returns:
+        Dictionary with 'raster_bytes' and operation -> (seconds, peak RSS in KB)
+    """
+    with tempfile.TemporaryDirectory(dir=work_dir) as temp_dir:
+        source = Path(temp_dir) / "stress.tif"
+        started = time.perf_counter()
+        write_synthetic_tiff(source, side)
+        results = {'raster_bytes': side * side * 3, 'write': (time.perf_counter() - started, None)}
+
+        context = multiprocessing.get_context('spawn')
+        jobs = {'rotate 90°': (tiled_rotate, 90), f'resize to {side // 10}²': (tiled_resize, (side // 10, side // 10))}
+        for label, (operation, argument) in jobs.items():
+            output = Path(temp_dir) / "output.tif"
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                results[label] = executor.submit(_tiled_probe, operation, str(source), str(output), argument).result()
+            output.unlink()
+        return results
+
+# Candidate encodings for the "auto" output format: (label, format, extension, params, lossy)
+FORMAT_CANDIDATES = [
+    ('WebP', 'WEBP', '.webp', {'method': 4}, True),
+    ('WebP lossless', 'WEBP', '.webp', {'lossless': True, 'method': 4}, False),
+    ('JPEG progressive', 'JPEG', '.jpg', {'progressive': True}, True),
+    ('PNG optimized', 'PNG', '.png', {}, False),
+]
+if features.check('avif'):
+    FORMAT_CANDIDATES.append(('AVIF', 'AVIF', '.avif', {'speed': 8}, True))
+
+DEFAULT_MIN_SSIM = 0.95
+
+def has_alpha(img):
+    """True if the image has any pixel that is not fully opaque"""
+    if img.mode == 'P' and 'transparency' in img.info:
+        img = img.convert('RGBA')
+    if img.mode not in ('RGBA', 'LA'):
+        return False
+    return img.getchannel('A').getextrema()[0] < 255
+
+def encode_candidates(img, min_ssim=DEFAULT_MIN_SSIM, workers=None):
+    """
+    Encode img with every FORMAT_CANDIDATES entry in parallel, in memory.
+
+    Lossy formats get the lowest quality that still reaches min_ssim;
+    lossless formats always meet it. JPEG is skipped when the image has
+    real transparency, since it would be flattened.
+
+    Returns:
+        List of candidate dictionaries ('label', 'format', 'extension',
+        'data', 'quality', 'ssim', 'met', 'seconds', 'error'), smallest
+        qualifying candidate first
+    """
+    if img.mode not in ('RGB', 'RGBA', 'L', 'LA', 'P'):
+        img = img.convert('RGB')
+    transparent = has_alpha(img)
+    if img.mode == 'P':
+        img = img.convert('RGBA' if transparent else 'RGB')
+    img.load()
+
+    def encode(candidate):
+        label, fmt, extension, params, lossy = candidate
+        result = {'label': label, 'format': fmt, 'extension': extension, 'data': None,
+                  'quality': None, 'ssim': None, 'met': False, 'seconds': 0.0, 'error': None}
+        started = time.perf_counter()
+        try:
+            # save() keeps its params on the image object, so threads can't share one
+            source = prepare_for_format(img.copy(), extension)
+            if lossy:
+                found = find_quality(source, fmt, min_ssim=min_ssim, **params)
+                result.update(data=found['data'], quality=found['quality'], ssim=found['ssim'], met=found['met'])
+            else:
+                result.update(data=encode_to_buffer(source, fmt, optimize=True, **params), ssim=1.0, met=True)
+        except Exception as e:
+            result['error'] = str(e)
+        result['seconds'] = time.perf_counter() - started
+        return result
+
+    candidates = [candidate for candidate in FORMAT_CANDIDATES if not (transparent and candidate[1] == 'JPEG')]
+    # Encoders release the GIL, so threads run them side by side
+    with ThreadPoolExecutor(max_workers=workers or len(candidates)) as executor:
+        results = list(executor.map(encode, candidates))
+    return sorted(results, key=lambda result: (not result['met'], result['data'] is None,
+                                               len(result['data'] or b'')))
+
+class OutputCache:
+    """
+    Content-addressed store of finished outputs, bounded by total size.
+
+    Entries are keyed by a hash of the input file's bytes plus the recipe
+    and output format, so a hit needs no decode at all. Each entry is the
+    encoded output and a small JSON sidecar with the result details. Hits
+    refresh the entry's mtime, and evict() removes the least recently used
+    entries until the cache fits in max_bytes. Writes go through a
+    temporary file, so several processes can share one cache directory.
+    """
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_SIZE):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def file_digest(path, chunk_size=1024 * 1024):
+        """Hash of a file's bytes, read in chunks"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as handle:
+            for chunk in iter(lambda: handle.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def key(self, source, recipe, output_suffix):
+        """Cache key for running recipe on source into an output_suffix file"""
+        digest = hashlib.sha256(self.file_digest(source).encode())
+        digest.update(f"\0{recipe}\0{output_suffix.lower()}".encode())
+        return digest.hexdigest()
+
+    def _paths(self, key):
+        shard = self.root / key[:2]
+        return shard / key, shard / f"{key}.json"
+
+    def get(self, key, output):
+        """
+        Copy a cached output to output and return its details, or None on a miss.
+
+        The copy takes the extension the entry was stored with, which can
+        differ from output's when the format was chosen automatically; the
+        path written is returned as 'output'.
+        """
+        data_path, meta_path = self._paths(key)
+        try:
+            meta = json.loads(meta_path.read_text())
+            output = Path(output)
+            meta['output'] = str(output.with_suffix(meta.pop('extension', None) or output.suffix))
+            write_atomic(data_path.read_bytes(), meta['output'])
+            os.utime(data_path)  # Most recently used
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return meta
+
+    def put(self, key, output, meta):
+        """Store a finished output and its details"""
+        data_path, meta_path = self._paths(key)
+        data_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = data_path.with_name(f".{key}.{os.getpid()}.tmp")
+        try:
+            shutil.copyfile(output, temp_path)
+            os.replace(temp_path, data_path)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+        write_atomic(json.dumps(meta).encode(), meta_path)
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits; returns how many"""
+        entries, total = [], 0
+        if not self.root.is_dir():
+            return 0
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith('.json') or entry.name.startswith('.'):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            for stale in (path, f"{path}.json"):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(stale)
+            total -= size
+            removed += 1
+        return removed
+
+    def hit_rate(self):
+        """Fraction of lookups that were hits"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+# Columns of a --scan report; EXIF fields are empty when a file has none
+HEADER_FIELDS = ['path', 'format', 'mode', 'width', 'height', 'frames', 'dpi_x', 'dpi_y', 'file_size',
+                 'orientation', 'make', 'model', 'taken', 'error']
+
+def read_header(path):
+    """
+    Read one image's metadata from its header, without decoding pixels.
+
+    Image.open only parses the header; load() is never called, and EXIF
+    comes from the already-read header segments.
+    """
+    row = dict.fromkeys(HEADER_FIELDS)
+    row['path'] = str(path)
+    try:
+        row['file_size'] = os.path.getsize(path)
+        with Image.open(path) as img:
+            dpi = img.info.get('dpi') or (None, None)
+            row.update(format=img.format, mode=img.mode, width=img.width, height=img.height,
+                       frames=getattr(img, 'n_frames', 1), dpi_x=dpi[0], dpi_y=dpi[1])
+            if img.format == 'PNG':
+                # getexif() on a PNG decodes the image to reach a trailing eXIf chunk
+                exif = Image.Exif()
+                if 'exif' in img.info:
+                    exif.load(img.info['exif'])
+            else:
+                exif = img.getexif()
+            if exif:
+                # Orientation, Make, Model, and DateTimeOriginal (falling back to DateTime)
+                row.update(orientation=exif.get(274), make=exif.get(271), model=exif.get(272),
+                           taken=exif.get_ifd(0x8769).get(36867) or exif.get(306))
+        for field in ('dpi_x', 'dpi_y'):
+            if row[field] is not None:
+                row[field] = float(row[field])
+        for field in ('make', 'model', 'taken'):
+            if isinstance(row[field], str):
+                row[field] = row[field].strip('\x00 ')
+    except Exception as e:
+        row['error'] = str(e)
+    return row
+
+# Lossless transposes for right-angle rotations (angles are clockwise)
+RIGHT_ANGLES = {
+    90: Image.Transpose.ROTATE_270,
+    180: Image.Transpose.ROTATE_180,
+    270: Image.Transpose.ROTATE_90,
+}
+
+class Pipeline:
+    """
+    A recipe of rotate / resize / compress steps run with one decode and one encode.
+
+    Build one in Python:
+        Pipeline().rotate(90).resize("800x").compress(quality=70).run("photo.jpg")
+    or parse the CLI form:
+        Pipeline.parse("rotate:90,resize:800x,compress:70")
+
+    resize takes "WxH", "Wx" or "xH" (keeping the aspect ratio) or "N%".
+    compress takes a quality (70), a maximum size (200KB), a minimum
+    SSIM (0.95), or "auto" / "auto=0.97" to pick the smallest output
+    format that reaches an SSIM floor (the extension then follows it).
+    """
+
+    def __init__(self, steps=None):
+        self.steps = list(steps or [])
+
+    @classmethod
+    def parse(cls, recipe):
+        """Build a pipeline from 'step:value,step:value'"""
+        pipeline = cls()
+        for part in filter(None, (part.strip() for part in recipe.split(','))):
+            name, _, value = part.partition(':')
+            name = name.strip().lower()
+            if name == 'rotate':
+                pipeline.rotate(float(value))
+            elif name == 'resize':
+                pipeline.resize(value)
+            elif name == 'compress':
+                value = value.strip()
+                if value.lower().startswith('auto'):
+                    floor = value.partition('=')[2]
+                    pipeline.compress(min_ssim=float(floor) if floor else None, auto=True)
+                elif any(char.isalpha() for char in value):
+                    pipeline.compress(max_bytes=parse_size(value))
+                elif '.' in value:
+                    pipeline.compress(min_ssim=float(value))
+                else:
+                    pipeline.compress(quality=int(value or 70))
+            else:
+                raise ValueError(f"Unknown pipeline step: {name!r}")
+        return pipeline
+
+    def rotate(self, angle):
+        """Rotate clockwise by angle degrees"""
+        angle = float(angle) % 360
+        self.steps.append(('rotate', int(angle) if angle.is_integer() else angle))
+        return self
+
+    def resize(self, size):
+        """Resize to (width, height) or a 'WxH' / 'Wx' / 'xH' / 'N%' spec"""
+        if not isinstance(size, str):
+            size = f"{size[0]}x{size[1]}"
+        size = size.strip().lower()
+        if not (size.endswith('%') or 'x' in size):
+            raise ValueError(f"Invalid resize spec: {size!r}")
+        self.steps.append(('resize', size))
+        return self
+
+    def compress(self, quality=None, max_bytes=None, min_ssim=None, auto=False):
+        """Encode with a quality, search one for a size / SSIM target, or pick the format (auto)"""
+        if auto:
+            self.steps.append(('compress', f"auto={min_ssim or DEFAULT_MIN_SSIM}"))
+        elif max_bytes:
+            self.steps.append(('compress', f"{int(max_bytes)}B"))
+        elif min_ssim:
+            self.steps.append(('compress', str(float(min_ssim))))
+        else:
+            self.steps.append(('compress', str(quality or 70)))
+        return self
+
+    @property
+    def recipe(self):
+        """The pipeline in its 'step:value' form"""
+        return ','.join(f"{name}:{value}" for name, value in self.steps)
+
+    def suffix(self):
+        """Output name suffix, matching what the single actions produce"""
+        parts = []
+        for name, value in self.steps:
+            if name == 'rotate':
+                parts.append(f"_rotated_{value}deg")
+            elif name == 'resize':
+                parts.append(f"_resized_{value.replace('%', 'pct')}")
+            elif value.isdigit():
+                parts.append(f"_compressed_q{value}")
+            elif value.startswith('auto'):
+                parts.append("_compressed_auto")
+            else:
+                parts.append("_compressed_target")
+        return ''.join(parts) or "_copy"
+
+    @staticmethod
+    def _target_size(img, spec):
+        if spec.endswith('%'):
+            scale = float(spec[:-1]) / 100
+            return max(1, round(img.width * scale)), max(1, round(img.height * scale))
+        width, _, height = spec.partition('x')
+        if width and height:
+            return int(width), int(height)
+        if width:
+            width = int(width)
+            return width, max(1, round(img.height * width / img.width))
+        height = int(height)
+        return max(1, round(img.width * height / img.height)), height
+
+    def apply(self, img):
+        """Run the rotate and resize steps in memory and return the result"""
+        for name, value in self.steps:
+            if name == 'rotate' and value:
+                if value in RIGHT_ANGLES:
+                    img = img.transpose(RIGHT_ANGLES[value])
+                else:
+                    img = img.rotate(-value, expand=True, fillcolor='white')
+            elif name == 'resize':
+                # Still a fresh JPEG if this is the first step, so it shrinks on load
+                img = shrink_image(img, self._target_size(img, value))
+        return img
+
+    def run(self, source, output=None, cache=None):
+        """
+        Decode source once, apply every step, and encode once to output.
+
+        With an OutputCache, an identical earlier run is copied from the
+        cache instead, without decoding anything.
+
+        Returns:
+            Dictionary with 'output', 'original_size', 'output_size',
+            'quality', 'ssim', 'probes', 'met' (False if a size/SSIM target
+            was missed), 'cached', and for "auto" the chosen 'format' and
+            every 'candidates' entry (without its data)
+        """
+        source = Path(source)
+        output = Path(output) if output else source.with_name(f"{source.stem}{self.suffix()}{source.suffix}")
+        compress = [value for name, value in self.steps if name == 'compress']
+        result = {'output': str(output), 'original_size': source.stat().st_size, 'quality': None,
+                  'ssim': None, 'probes': None, 'met': True, 'cached': False, 'format': None, 'candidates': None}
+        details = ('quality', 'ssim', 'probes', 'met', 'format', 'candidates')
+
+        key = cache.key(source, self.recipe, output.suffix) if cache else None
+        if key:
+            meta = cache.get(key, output)
+            if meta is not None:
+                result.update(meta, cached=True, output_size=Path(meta['output']).stat().st_size)
+                return result
+
+        with Image.open(source) as img:
+            img = self.apply(img)
+            if not (compress and compress[-1].startswith('auto')):
+                img = prepare_for_format(img, output.suffix)
+            if not compress:
+                save_atomic(img, output)
+            elif compress[-1].startswith('auto'):
+                candidates = encode_candidates(img, float(compress[-1].partition('=')[2]))
+                best = candidates[0]
+                if best['data'] is None:
+                    raise ValueError(f"No format could encode this image: {best['error']}")
+                output = output.with_suffix(best['extension'])
+                write_atomic(best['data'], output)
+                result.update(output=str(output), quality=best['quality'], ssim=best['ssim'], met=best['met'],
+                              format=best['label'],
+                              candidates=[{field: value for field, value in candidate.items() if field != 'data'}
+                                          | {'size': len(candidate['data'] or b'')} for candidate in candidates])
+            elif compress[-1].isdigit():
+                result['quality'] = int(compress[-1])
+                save_atomic(img, output, optimize=True, quality=result['quality'])
+            else:
+                img.load()
+                target = compress[-1]
+                found = find_quality(img, Image.registered_extensions()[output.suffix.lower()],
+                                     max_bytes=parse_size(target) if target.endswith('B') else None,
+                                     min_ssim=None if target.endswith('B') else float(target))
+                write_atomic(found['data'], output)
+                result.update((field, found[field]) for field in ('quality', 'ssim', 'probes', 'met'))
+
+        result['output_size'] = output.stat().st_size
+        if key:
+            cache.put(key, output, {field: result[field] for field in details} | {'extension': output.suffix})
+        return result
+
+def compress_file(job):
+    """
+    Run a pipeline recipe on one file; runs in a worker process during batch mode.
+
+    Args:
+        job: Dictionary with 'source', 'output', 'params' (holding the 'recipe')
+             and 'cache' (an OutputCache root and size limit, or None)
+
+    Returns:
+        Dictionary with the job fields plus sizes, or an 'error' message
+    """
+    result = dict(job, original_size=0, compressed_size=0, quality=None, met=True, cached=False, error=None)
+    try:
+        cache = OutputCache(*job['cache']) if job['cache'] else None
+        outcome = Pipeline.parse(job['params']['recipe']).run(job['source'], job['output'], cache)
+        result.update(output=outcome['output'], original_size=outcome['original_size'],
+                      compressed_size=outcome['output_size'],
+                      quality=outcome['quality'], met=outcome['met'], cached=outcome['cached'])
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
 class ImageProcessor:
-    def __init__(self):
+    def __init__(self, cache=None):
+        self.cache = cache
         self.supported_formats = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp'}
         self.unit_conversions = {
             'mm': 1,
@@ -55,7 +1002,9 @@ class ImageProcessor:
                              ('🗜️  Compress Image', 'compress'),
                              ('🔄 Rotate Image', 'rotate'),
                              ('📏 Resize Image', 'resize'),
+                             ('🧪 Pipeline (chain operations)', 'pipeline'),
                              ('🔍 Get Image Info', 'info'),
+                             ('📂 Scan Folder Metadata', 'scan'),
                              ('❌ Exit', 'exit')
                          ],
                          carousel=True)
@@ -96,12 +1045,22 @@ class ImageProcessor:
                              ('⭐ Good Quality (70%)', 70),
                              ('💾 Medium Quality (50%)', 50),
                              ('📱 Low Quality (30%)', 30),
-                             ('🎯 Custom Quality', 'custom')
+                             ('🎯 Custom Quality', 'custom'),
+                             ('📦 Target File Size', 'size'),
+                             ('👁️ Minimum Visual Quality (SSIM)', 'ssim'),
+                             ('✨ Auto Format (smallest that looks right)', 'auto')
                          ])
         ]
         
         quality = inquirer.prompt(questions)['quality']
         
+        if quality in ('size', 'ssim'):
+            self._compress_to_target(img_path, quality)
+            return
+        if quality == 'auto':
+            self._compress_auto_format(img_path)
+            return
+        
         if quality == 'custom':
             while True:
                 try:
@@ -119,17 +1078,10 @@ class ImageProcessor:
             task = progress.add_task("🗜️ Compressing image...", total=None)
             
             try:
-                with Image.open(img_path) as img:
-                    # Convert RGBA to RGB if saving as JPEG
-                    if output_path.suffix.lower() in ['.jpg', '.jpeg'] and img.mode == 'RGBA':
-                        rgb_img = Image.new('RGB', img.size, (255, 255, 255))
-                        rgb_img.paste(img, mask=img.split()[-1] if len(img.split()) == 4 else None)
-                        img = rgb_img
-                    
-                    img.save(output_path, optimize=True, quality=quality)
+                result = Pipeline().compress(quality).run(img_path, output_path, self.cache)
                 
-                original_size = img_path.stat().st_size
-                compressed_size = output_path.stat().st_size
+                original_size = result['original_size']
+                compressed_size = result['output_size']
                 reduction = ((original_size - compressed_size) / original_size) * 100
                 
                 progress.update(task, completed=True)
@@ -139,7 +1091,81 @@ class ImageProcessor:
                 return
         
         # Show results
-        self._show_compression_results(img_path, output_path, original_size, compressed_size, reduction)
+        self._show_compression_results(img_path, output_path, original_size, compressed_size, reduction,
+                                       self._cache_details(result))
+    
+    def _compress_to_target(self, img_path, target):
+        """Compress to a file size or SSIM target by searching the quality"""
+        max_bytes = min_ssim = None
+        while True:
+            try:
+                if target == 'size':
+                    max_bytes = parse_size(input(f"{Fore.YELLOW}Enter maximum file size (e.g. 200KB, 1.5MB): {Style.RESET_ALL}"))
+                    if max_bytes > 0:
+                        break
+                    console.print("❌ Size must be positive", style="red")
+                else:
+                    min_ssim = float(input(f"{Fore.YELLOW}Enter minimum SSIM (0-1, e.g. 0.95): {Style.RESET_ALL}"))
+                    if 0 < min_ssim <= 1:
+                        break
+                    console.print("❌ SSIM must be between 0 and 1", style="red")
+            except ValueError:
+                console.print("❌ Please enter a valid number", style="red")
+        
+        output_path = self._get_output_path(img_path, "_compressed_target")
+        
+        with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}")) as progress:
+            task = progress.add_task("🎯 Searching for the best quality...", total=None)
+            
+            try:
+                # Decoded once; every probe only re-encodes
+                found = Pipeline().compress(max_bytes=max_bytes, min_ssim=min_ssim).run(img_path, output_path, self.cache)
+                
+                original_size = found['original_size']
+                compressed_size = found['output_size']
+                reduction = ((original_size - compressed_size) / original_size) * 100
+                
+                progress.update(task, completed=True)
+            
+            except Exception as e:
+                console.print(f"❌ Error compressing image: {e}", style="red")
+                return
+        
+        details = {"Quality Found": str(found['quality'] or "n/a (lossless format)"),
+                   "Encodes Tried": str(found['probes']), **self._cache_details(found)}
+        if found['ssim'] is not None:
+            details["SSIM"] = f"{found['ssim']:.4f}"
+        self._show_compression_results(img_path, output_path, original_size, compressed_size, reduction, details)
+        if not found['met']:
+            console.print("⚠️ [yellow]The target could not be reached; kept the closest setting[/yellow]")
+    
+    def _compress_auto_format(self, img_path):
+        """Try every candidate format and keep the smallest that meets an SSIM floor"""
+        while True:
+            try:
+                floor = input(f"{Fore.YELLOW}Minimum SSIM (0-1) [{DEFAULT_MIN_SSIM}]: {Style.RESET_ALL}").strip()
+                min_ssim = float(floor) if floor else DEFAULT_MIN_SSIM
+                if 0 < min_ssim <= 1:
+                    break
+                console.print("❌ SSIM must be between 0 and 1", style="red")
+            except ValueError:
+                console.print("❌ Please enter a valid number", style="red")
+        
+        with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}")) as progress:
+            task = progress.add_task("✨ Trying formats...", total=None)
+            
+            try:
+                result = Pipeline().compress(min_ssim=min_ssim, auto=True).run(img_path, cache=self.cache)
+                progress.update(task, completed=True)
+            except Exception as e:
+                console.print(f"❌ Error compressing image: {e}", style="red")
+                return
+        
+        original_size, compressed_size = result['original_size'], result['output_size']
+        details = {"Chosen Format": result['format'], **self._cache_details(result)}
+        self._show_compression_results(img_path, Path(result['output']), original_size, compressed_size,
+                                       ((original_size - compressed_size) / original_size) * 100, details,
+                                       result['candidates'])
     
     def rotate_image(self):
         """Rotate image with angle selection"""
@@ -174,13 +1200,18 @@ class ImageProcessor:
         
         output_path = self._get_output_path(img_path, f"_rotated_{angle}deg")
         
+        if needs_tiling(img_path):
+            if float(angle) % 360 in RIGHT_ANGLES and can_tile(img_path):
+                if self._run_tiled("🔄 Rotating in tiles...", tiled_rotate, img_path, output_path, angle):
+                    console.print(f"✅ [green]Image rotated {angle}° and saved to:[/green] [cyan]{output_path}[/cyan]")
+                return
+            console.print("⚠️ [yellow]Tiles need an uncompressed TIFF and a multiple of 90°; rotating in memory[/yellow]")
+        
         with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}")) as progress:
             task = progress.add_task("🔄 Rotating image...", total=None)
             
             try:
-                with Image.open(img_path) as img:
-                    rotated_img = img.rotate(-angle, expand=True, fillcolor='white')
-                    rotated_img.save(output_path)
+                Pipeline().rotate(angle).run(img_path, output_path, self.cache)
                 
                 progress.update(task, completed=True)
                 
@@ -196,9 +1227,9 @@ class ImageProcessor:
         
         img_path = self.get_image_path()
         
-        with Image.open(img_path) as img:
-            current_width, current_height = img.size
-            dpi = img.info.get('dpi', (72, 72))[0]  # Default to 72 DPI
+        header = image_header(img_path)
+        current_width, current_height = header['width'], header['height']
+        dpi = header['dpi'][0]  # Default to 72 DPI
         
         # Show current dimensions
         table = Table(title="Current Image Dimensions")
@@ -241,13 +1272,18 @@ class ImageProcessor:
         
         output_path = self._get_output_path(img_path, f"_resized_{new_width}x{new_height}")
         
+        if needs_tiling(img_path):
+            if can_tile(img_path):
+                if self._run_tiled("📏 Resizing in bands...", tiled_resize, img_path, output_path, (new_width, new_height)):
+                    console.print(f"✅ [green]Image resized to {new_width}x{new_height} and saved to:[/green] [cyan]{output_path}[/cyan]")
+                return
+            console.print("⚠️ [yellow]Tiles need an uncompressed TIFF; resizing in memory[/yellow]")
+        
         with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}")) as progress:
             task = progress.add_task("📏 Resizing image...", total=None)
             
             try:
-                with Image.open(img_path) as img:
-                    resized_img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                    resized_img.save(output_path)
+                Pipeline().resize((new_width, new_height)).run(img_path, output_path, self.cache)
                 
                 progress.update(task, completed=True)
                 
@@ -257,6 +1293,60 @@ class ImageProcessor:
         
         console.print(f"✅ [green]Image resized to {new_width}x{new_height} and saved to:[/green] [cyan]{output_path}[/cyan]")
     
+    def _run_tiled(self, description, operation, *args):
+        """Run a tiled_* operation with a progress bar; returns True on success"""
+        console.print("🧩 [cyan]Large TIFF: processing in tiles to keep memory bounded[/cyan]")
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            TimeElapsedColumn(),
+            TimeRemainingColumn(),
+            console=console
+        ) as progress:
+            task = progress.add_task(description, total=None)
+            try:
+                operation(*args, progress_callback=lambda done, total: progress.update(task, completed=done, total=total))
+            except Exception as e:
+                console.print(f"❌ Error processing image: {e}", style="red")
+                return False
+        return True
+    
+    def pipeline_image(self):
+        """Run several operations with a single decode and encode"""
+        console.print("\n🧪 [bold cyan]IMAGE PIPELINE[/bold cyan]")
+        
+        img_path = self.get_image_path()
+        
+        console.print("Steps: [cyan]rotate:ANGLE[/cyan], [cyan]resize:WxH|Wx|xH|N%[/cyan], "
+                      "[cyan]compress:QUALITY|SIZE|SSIM[/cyan]")
+        while True:
+            try:
+                recipe = input(f"{Fore.YELLOW}Enter recipe (e.g. rotate:90,resize:1280x,compress:75): {Style.RESET_ALL}")
+                pipeline = Pipeline.parse(recipe)
+                if pipeline.steps:
+                    break
+                console.print("❌ Please enter at least one step", style="red")
+            except ValueError as e:
+                console.print(f"❌ {e}", style="red")
+        
+        with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}")) as progress:
+            task = progress.add_task("🧪 Running pipeline...", total=None)
+            
+            try:
+                result = pipeline.run(img_path, cache=self.cache)
+                progress.update(task, completed=True)
+            except Exception as e:
+                console.print(f"❌ Error running pipeline: {e}", style="red")
+                return
+        
+        original_size, output_size = result['original_size'], result['output_size']
+        details = {"Steps": pipeline.recipe, **self._cache_details(result)}
+        if result['quality']:
+            details["Quality"] = str(result['quality'])
+        self._show_compression_results(img_path, Path(result['output']), original_size, output_size,
+                                       ((original_size - output_size) / original_size) * 100, details)
+    
     def get_image_info(self):
         """Display detailed image information"""
         console.print("\n🔍 [bold cyan]IMAGE INFORMATION[/bold cyan]")
@@ -294,6 +1384,293 @@ class ImageProcessor:
         except Exception as e:
             console.print(f"❌ Error reading image info: {e}", style="red")
     
+    def scan_folder(self):
+        """Prompt for a folder and write a header-only metadata report"""
+        console.print("\n📂 [bold cyan]FOLDER METADATA SCAN[/bold cyan]")
+        
+        while True:
+            folder = input(f"\n{Fore.CYAN}📁 Enter folder path: {Style.RESET_ALL}")
+            if folder and Path(folder).is_dir():
+                break
+            console.print("❌ Folder not found!", style="red")
+        
+        report_path = input(f"{Fore.YELLOW}Report file [image_report.jsonl]: {Style.RESET_ALL}").strip()
+        report_path = report_path or "image_report.jsonl"
+        
+        try:
+            stats = self.scan_images(folder, report_path)
+        except OSError as e:
+            console.print(f"❌ Error writing report: {e}", style="red")
+            return
+        self._show_scan_results(stats, report_path)
+    
+    def scan_images(self, source, report_path, workers=None):
+        """
+        Write a metadata report for every image under source, reading headers only.
+
+        Headers are read on a thread pool (the work is mostly file I/O). The
+        report is JSON Lines, or CSV when report_path ends in .csv.
+
+        Returns:
+            Dictionary with 'files', 'errors', 'bytes' and 'seconds'
+        """
+        source = Path(source)
+        if source.is_dir():
+            paths = [Path(folder) / name for folder, _, names in os.walk(source) for name in names
+                     if Path(name).suffix.lower() in self.supported_formats]
+        else:
+            paths = [Path(path) for path in sorted(glob.glob(str(source), recursive=True))]
+
+        report_path = Path(report_path)
+        as_csv = report_path.suffix.lower() == '.csv'
+        stats = {'files': len(paths), 'errors': 0, 'bytes': 0, 'seconds': 0.0}
+        started = time.perf_counter()
+
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            MofNCompleteColumn(),
+            TimeElapsedColumn(),
+            TimeRemainingColumn(),
+            console=console
+        ) as progress, open(report_path, 'w', encoding='utf-8', newline='') as report, \
+                ThreadPoolExecutor(max_workers=workers) as executor:
+            task = progress.add_task("🔍 Reading headers...", total=len(paths))
+            writer = csv.DictWriter(report, fieldnames=HEADER_FIELDS) if as_csv else None
+            if writer:
+                writer.writeheader()
+
+            for row in executor.map(read_header, paths):
+                stats['errors'] += row['error'] is not None
+                stats['bytes'] += row['file_size'] or 0
+                if writer:
+                    writer.writerow(row)
+                else:
+                    report.write(json.dumps(row) + "\n")
+                progress.update(task, advance=1)
+
+        stats['seconds'] = time.perf_counter() - started
+        return stats
+    
+    def _show_scan_results(self, stats, report_path):
+        """Display the totals of a header scan"""
+        table = Table(title="🔍 Metadata Scan Results")
+        table.add_column("Metric", style="cyan")
+        table.add_column("Value", style="magenta")
+
+        table.add_row("Images Scanned", str(stats['files']))
+        table.add_row("Unreadable", str(stats['errors']))
+        table.add_row("Total Size", self._format_file_size(stats['bytes']))
+        table.add_row("Report", str(report_path))
+        if stats['seconds']:
+            table.add_row("Time", f"{stats['seconds']:.1f}s ({stats['files'] / stats['seconds']:.0f} files/s)")
+
+        console.print(table)
+    
+    def discover_images(self, source, exclude_dir=None):
+        """Find supported images under a directory (recursively) or matching a glob pattern"""
+        source_path = Path(source)
+        if source_path.is_dir():
+            candidates = (path for path in source_path.rglob('*') if path.is_file())
+        elif source_path.is_file():
+            candidates = [source_path]
+        else:
+            candidates = (Path(path) for path in glob.iglob(source, recursive=True))
+
+        exclude_dir = Path(exclude_dir).resolve() if exclude_dir else None
+        images = []
+        for path in candidates:
+            if path.suffix.lower() not in self.supported_formats or path.name.startswith('.'):
+                continue
+            # Never pick up our own outputs on a re-run
+            if any(marker in path.stem for marker in ('_compressed_q', '_compressed_target', '_compressed_auto')):
+                continue
+            if exclude_dir and exclude_dir in path.resolve().parents:
+                continue
+            images.append(path)
+        return sorted(images)
+
+    def _batch_root(self, source):
+        """Directory that relative output paths are computed from"""
+        source_path = Path(source)
+        if source_path.is_dir():
+            return source_path
+        if source_path.is_file():
+            return source_path.parent
+        # Fixed leading part of a glob pattern
+        fixed = []
+        for part in source_path.parts:
+            if glob.has_magic(part):
+                break
+            fixed.append(part)
+        return Path(*fixed) if fixed else Path('.')
+
+    def _load_manifest(self, manifest_path):
+        """Entries of previous runs, keyed by source path"""
+        done = {}
+        if manifest_path.exists():
+            with open(manifest_path, encoding='utf-8') as manifest:
+                for line in manifest:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # A line cut short by an interrupted run
+                    done[entry['source']] = entry
+        return done
+
+    def batch_compress(self, source, quality=70, output_dir=None, workers=None, resume=True,
+                       max_bytes=None, min_ssim=None, pipeline=None, auto_format=False):
+        """
+        Compress every image in a directory or glob across a process pool.
+
+        With max_bytes or min_ssim, each image gets its own quality, found
+        by find_quality, instead of the fixed quality. A Pipeline replaces
+        the compression settings with its own steps. auto_format picks
+        each image's output format, with min_ssim as the quality floor.
+
+        Finished files are appended to a manifest, so an interrupted run can be
+        restarted and skips everything it already did. A manifest entry with
+        other settings, or for an older version of the source, is redone. A
+        file with no entry is skipped when its output exists and is newer than
+        the source.
+
+        Returns:
+            Dictionary with stats about the batch
+        """
+        root = self._batch_root(source)
+        images = self.discover_images(source, exclude_dir=output_dir)
+        manifest_path = Path(output_dir or root) / MANIFEST_NAME
+        done = self._load_manifest(manifest_path) if resume else {}
+
+        pipeline = pipeline or Pipeline().compress(quality, max_bytes, min_ssim, auto=auto_format)
+        cache = (str(self.cache.root), self.cache.max_bytes) if self.cache else None
+        params = {'recipe': pipeline.recipe}
+        suffix = pipeline.suffix()
+        images = [path for path in images if not path.stem.endswith(suffix)]
+        stats = {'found': len(images), 'compressed': 0, 'skipped': 0, 'failed': 0, 'missed_target': 0,
+                 'cache_hits': 0, 'evicted': 0,
+                 'original_size': 0, 'compressed_size': 0, 'seconds': 0.0, 'errors': []}
+        jobs = []
+        for path in images:
+            if output_dir:
+                relative = path.relative_to(root) if root in path.parents else Path(path.name)
+                output = Path(output_dir) / relative
+            else:
+                output = self._get_output_path(path, suffix)
+
+            source_stat = path.stat()
+            entry = done.get(str(path.resolve()))
+            if entry and entry.get('params') == params:
+                # The recorded name, since auto format can change the extension
+                output = Path(entry['output'])
+            if resume and output.exists():
+                if entry:
+                    if entry['size'] == source_stat.st_size and entry['mtime_ns'] == source_stat.st_mtime_ns \
+                            and entry.get('params') == params:
+                        stats['skipped'] += 1
+                        continue
+                elif output.stat().st_mtime_ns >= source_stat.st_mtime_ns:
+                    stats['skipped'] += 1
+                    continue
+
+            jobs.append({'source': str(path), 'output': str(output), 'params': params, 'cache': cache,
+                         'size': source_stat.st_size, 'mtime_ns': source_stat.st_mtime_ns})
+
+        if not jobs:
+            return stats
+
+        Path(manifest_path).parent.mkdir(parents=True, exist_ok=True)
+        started = time.perf_counter()
+
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            MofNCompleteColumn(),
+            TextColumn("[green]{task.fields[saved]} saved"),
+            TimeElapsedColumn(),
+            TimeRemainingColumn(),
+            console=console
+        ) as progress, open(manifest_path, 'a', encoding='utf-8') as manifest, \
+                ProcessPoolExecutor(max_workers=workers) as executor:
+            task = progress.add_task("🗜️ Compressing images...", total=len(jobs), saved="0 B")
+            futures = [executor.submit(compress_file, job) for job in jobs]
+
+            for future in as_completed(futures):
+                result = future.result()
+                if result['error']:
+                    stats['failed'] += 1
+                    stats['errors'].append((result['source'], result['error']))
+                else:
+                    stats['compressed'] += 1
+                    stats['missed_target'] += not result['met']
+                    stats['cache_hits'] += result['cached']
+                    stats['original_size'] += result['original_size']
+                    stats['compressed_size'] += result['compressed_size']
+
+                    # Recorded as soon as each file is done, so a crash loses nothing
+                    manifest.write(json.dumps({
+                        'source': str(Path(result['source']).resolve()),
+                        'output': result['output'],
+                        'params': result['params'],
+                        'quality': result['quality'],
+                        'size': result['size'],
+                        'mtime_ns': result['mtime_ns'],
+                        'compressed_size': result['compressed_size'],
+                    }) + "\n")
+                    manifest.flush()
+
+                saved = stats['original_size'] - stats['compressed_size']
+                progress.update(task, advance=1, saved=self._format_file_size(max(saved, 0)))
+
+        stats['seconds'] = time.perf_counter() - started
+        if self.cache:
+            # Workers count their own hits; fold them into this session's totals
+            self.cache.hits += stats['cache_hits']
+            self.cache.misses += stats['compressed'] - stats['cache_hits']
+            stats['evicted'] = self.cache.evict()
+        return stats
+
+    def _cache_details(self, result):
+        """Cache row for a results table, if caching is on"""
+        if not self.cache:
+            return {}
+        lookups = self.cache.hits + self.cache.misses
+        status = "hit" if result['cached'] else "miss"
+        return {"Cache": f"{status} ({self.cache.hits}/{lookups} hits this session)"}
+    
+    def _show_batch_results(self, stats):
+        """Display the totals of a batch run"""
+        table = Table(title="🗜️ Batch Compression Results")
+        table.add_column("Metric", style="cyan")
+        table.add_column("Value", style="magenta")
+
+        saved = stats['original_size'] - stats['compressed_size']
+        reduction = (saved / stats['original_size'] * 100) if stats['original_size'] else 0
+
+        table.add_row("Images Found", str(stats['found']))
+        table.add_row("Compressed", str(stats['compressed']))
+        table.add_row("Skipped (already done)", str(stats['skipped']))
+        table.add_row("Failed", str(stats['failed']))
+        if stats['missed_target']:
+            table.add_row("Target Not Reached", str(stats['missed_target']))
+        table.add_row("Original Size", self._format_file_size(stats['original_size']))
+        table.add_row("Compressed Size", self._format_file_size(stats['compressed_size']))
+        table.add_row("Space Saved", f"{self._format_file_size(max(saved, 0))} ({reduction:.1f}%)")
+        if self.cache and stats['compressed']:
+            rate = stats['cache_hits'] / stats['compressed'] * 100
+            table.add_row("Cache Hits", f"{stats['cache_hits']}/{stats['compressed']} ({rate:.0f}%)")
+            if stats['evicted']:
+                table.add_row("Cache Evictions", str(stats['evicted']))
+        if stats['seconds']:
+            table.add_row("Time", f"{stats['seconds']:.1f}s ({stats['compressed'] / stats['seconds']:.1f} images/s)")
+
+        console.print(table)
+
+        for path, error in stats['errors'][:10]:
+            console.print(f"❌ [red]{path}: {error}[/red]")
+
     def _get_pixel_dimensions(self):
         """Get new dimensions in pixels"""
         try:
@@ -391,8 +1768,9 @@ class ImageProcessor:
         
         return output_dir / f"{stem}{suffix}{extension}"
     
-    def _show_compression_results(self, original_path, compressed_path, original_size, compressed_size, reduction):
-        """Display compression results"""
+    def _show_compression_results(self, original_path, compressed_path, original_size, compressed_size, reduction,
+                                  details=None, candidates=None):
+        """Display compression results, with any extra rows from details and one row per candidate format"""
         table = Table(title="🗜️ Compression Results")
         table.add_column("Metric", style="cyan")
         table.add_column("Value", style="magenta")
@@ -403,6 +1781,22 @@ class ImageProcessor:
         table.add_row("Compressed Size", self._format_file_size(compressed_size))
         table.add_row("Size Reduction", f"{reduction:.1f}%")
         table.add_row("Space Saved", self._format_file_size(original_size - compressed_size))
+        for metric, value in (details or {}).items():
+            table.add_row(metric, value)
+        for index, candidate in enumerate(candidates or []):
+            if candidate['error']:
+                value = f"[red]failed: {candidate['error']}[/red]"
+            else:
+                value = self._format_file_size(candidate['size'])
+                if candidate['quality']:
+                    value += f" · q{candidate['quality']}"
+                value += f" · SSIM {candidate['ssim']:.3f}" if candidate['ssim'] < 1 else " · lossless"
+                value += f" · {candidate['seconds']:.2f}s"
+                if not candidate['met']:
+                    value = f"[dim]{value} (below floor)[/dim]"
+                elif index == 0:
+                    value = f"[bold green]{value} ✓[/bold green]"
+            table.add_row(f"  {candidate['label']}", value)
         
         console.print(table)
         
@@ -441,8 +1835,12 @@ class ImageProcessor:
                     self.rotate_image()
                 elif action == 'resize':
                     self.resize_image()
+                elif action == 'pipeline':
+                    self.pipeline_image()
                 elif action == 'info':
                     self.get_image_info()
+                elif action == 'scan':
+                    self.scan_folder()
                 
                 # Ask if user wants to continue
                 console.print("\n" + "="*60)
@@ -457,9 +1855,92 @@ class ImageProcessor:
             except Exception as e:
                 console.print(f"\n❌ [red]An error occurred: {e}[/red]")
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Image Processor CLI Tool")
+    parser.add_argument("--batch", metavar="PATH",
+                        help="compress every image in a directory or matching a glob, without prompts")
+    parser.add_argument("--quality", type=int, default=70, help="JPEG/WebP quality for --batch (1-100)")
+    parser.add_argument("--max-size", metavar="SIZE",
+                        help="largest output per image for --batch, e.g. 200KB; quality is searched per image")
+    parser.add_argument("--min-ssim", type=float, metavar="SSIM",
+                        help="smallest SSIM (0-1) per image for --batch; quality is searched per image")
+    parser.add_argument("--auto-format", action="store_true",
+                        help="for --batch, keep whichever of WebP/JPEG/PNG/AVIF is smallest at --min-ssim "
+                             f"(default {DEFAULT_MIN_SSIM})")
+    parser.add_argument("--pipeline", metavar="RECIPE",
+                        help="run a recipe such as 'rotate:90,resize:1280x,compress:75' on --batch PATH "
+                             "with one decode and encode per image")
+    parser.add_argument("--output-dir", help="write batch outputs here, mirroring the source tree")
+    parser.add_argument("--workers", type=int,
+                        help="worker processes for --batch (default: CPU count), or threads for --scan")
+    parser.add_argument("--no-resume", action="store_true", help="reprocess files finished by an earlier run")
+    parser.add_argument("--scan", metavar="PATH",
+                        help="write a header-only metadata report for every image in a directory or glob")
+    parser.add_argument("--report", default="image_report.jsonl",
+                        help="report file for --scan; .csv for CSV, otherwise JSON Lines")
+    parser.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR), help="where finished outputs are cached")
+    parser.add_argument("--cache-size", default="1GB", metavar="SIZE", help="evict least recently used outputs beyond this")
+    parser.add_argument("--no-cache", action="store_true", help="always reprocess instead of reusing cached outputs")
+    parser.add_argument("--benchmark-resize", nargs="?", const="", metavar="IMAGE",
+                        help="time plain Lanczos against shrink-on-load resizing (default: synthetic 24 MP JPEG)")
+    parser.add_argument("--benchmark-tiled", nargs="?", type=int, const=40000, metavar="SIDE",
+                        help="stress-test tiled rotate/resize on a synthetic SIDE x SIDE TIFF (default 40000)")
+    parser.add_argument("--thumb-size", default="320x240", metavar="WxH", help="target size for --benchmark-resize")
+    return parser.parse_args(argv)
+
 def main():
     """Main entry point"""
-    processor = ImageProcessor()
+    args = parse_args()
+    processor = ImageProcessor(None if args.no_cache else OutputCache(args.cache_dir, parse_size(args.cache_size)))
+
+    if args.benchmark_resize is not None:
+        size = tuple(int(part) for part in args.thumb_size.lower().split('x'))
+        results = benchmark_resize(args.benchmark_resize or None, size)
+        table = Table(title=f"📏 Resize Benchmark ({size[0]}x{size[1]})")
+        table.add_column("Method", style="cyan")
+        table.add_column("Time", style="magenta")
+        table.add_column("Peak Memory", style="magenta")
+        for method, (seconds, peak_kb) in results.items():
+            memory = processor._format_file_size(peak_kb * 1024) if peak_kb else "n/a"
+            table.add_row(method, f"{seconds * 1000:.0f} ms", memory)
+        console.print(table)
+        speedup = results['lanczos'][0] / results['shrink'][0]
+        console.print(f"⚡ [green]Shrink-on-load is {speedup:.1f}x faster[/green]")
+        return
+
+    if args.scan:
+        stats = processor.scan_images(args.scan, args.report, args.workers)
+        processor._show_scan_results(stats, args.report)
+        return
+
+    if args.benchmark_tiled:
+        side = args.benchmark_tiled
+        console.print(f"🧩 Writing a synthetic {side}x{side} TIFF and processing it in tiles...")
+        results = benchmark_tiled(side)
+        raster_bytes = results.pop('raster_bytes')
+        table = Table(title=f"🧩 Tiled Benchmark ({side}x{side}, {processor._format_file_size(raster_bytes)} raster)")
+        table.add_column("Operation", style="cyan")
+        table.add_column("Time", style="magenta")
+        table.add_column("Throughput", style="magenta")
+        table.add_column("Peak Memory", style="magenta")
+        for operation, (seconds, peak_kb) in results.items():
+            memory = processor._format_file_size(peak_kb * 1024) if peak_kb else "n/a"
+            table.add_row(operation, f"{seconds:.1f}s", f"{side * side / 1e6 / seconds:.0f} MP/s", memory)
+        console.print(table)
+        return
+
+    if args.batch:
+        if not 1 <= args.quality <= 100:
+            console.print("❌ Quality must be between 1-100", style="red")
+            sys.exit(2)
+        stats = processor.batch_compress(
+            args.batch, args.quality, args.output_dir, args.workers, not args.no_resume,
+            max_bytes=parse_size(args.max_size) if args.max_size else None, min_ssim=args.min_ssim,
+            pipeline=Pipeline.parse(args.pipeline) if args.pipeline else None, auto_format=args.auto_format
+        )
+        processor._show_batch_results(stats)
+        sys.exit(1 if stats['failed'] else 0)
+
     processor.run()
 
 if __name__ == "__main__":